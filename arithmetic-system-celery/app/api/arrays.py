@@ -0,0 +1,16 @@
+from fastapi import APIRouter
+import logging
+from ..models.models import UploadArrayRequest, UploadArrayResponse
+from .calculate_expression import orchestrator
+from http import HTTPStatus
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.post(
+    "/arrays", response_model=UploadArrayResponse, status_code=HTTPStatus.CREATED
+)
+def upload_array(request: UploadArrayRequest) -> UploadArrayResponse:
+    array_id = orchestrator.arrays.put(request.values)
+    return UploadArrayResponse(id=array_id, length=len(request.values))
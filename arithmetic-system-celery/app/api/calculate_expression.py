@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Query, HTTPException
+from fastapi import APIRouter, Header, Query, HTTPException, Response
+from fastapi.responses import ORJSONResponse
 import logging
+import time
+from contextlib import nullcontext
 from ..services.orchestrator import WorkflowOrchestrator
+from ..services.profiler import ProfileMode, get_profile_store
+from ..services.traffic_capture import CapturedRequest, get_traffic_capture
 from ..models.models import CalculateExpressionResponse
 from http import HTTPStatus
 from app.types.errors import (
+    ArrayNotFoundError,
+    ArrayShapeError,
     ExpressionSyntaxError,
+    ServiceUnavailableError,
     UnsupportedOperatorError,
     UnsupportedNodeError,
     UnsupportedUnaryOperatorError,
@@ -15,13 +23,57 @@ logger = logging.getLogger(__name__)
 orchestrator = WorkflowOrchestrator()
 
 
-@router.get("/calculate", response_model=CalculateExpressionResponse)
+@router.get(
+    "/calculate",
+    response_model=CalculateExpressionResponse,
+    response_model_exclude_none=True,
+    response_class=ORJSONResponse,
+)
 def evaluate(
     expression: str = Query(..., description="Arithmetic expression to evaluate"),
+    describe: bool = Query(
+        False, description="Include the rendered Celery workflow in the response"
+    ),
+    profile: ProfileMode | None = Query(
+        None, description="Profile this request; needs profile_dir to be set"
+    ),
+    x_profile: ProfileMode | None = Header(None),
+    response: Response = None,
+) -> CalculateExpressionResponse:
+    capture = get_traffic_capture()
+    if capture is None or not capture.sampled():
+        return _evaluate(expression, describe, profile or x_profile, response)
+
+    arrived = time.time()
+    started = time.perf_counter()
+    status = HTTPStatus.OK
+    try:
+        return _evaluate(expression, describe, profile or x_profile, response)
+    except HTTPException as e:
+        status = e.status_code
+        raise
+    finally:
+        capture.record(
+            CapturedRequest(
+                arrived, expression, (time.perf_counter() - started) * 1000, status
+            )
+        )
+
+
+def _evaluate(
+    expression: str, describe: bool, mode: ProfileMode | None, response: Response
 ) -> CalculateExpressionResponse:
     try:
         logger.info(f"Received expression to evaluate: {expression}")
-        result = orchestrator.calculate(expression)
+        store = get_profile_store()
+        with (
+            store.profile("request", "calculate", mode)
+            if mode is not None and store is not None
+            else nullcontext([])
+        ) as captured:
+            result = orchestrator.calculate(expression, describe=describe)
+        if captured:
+            response.headers["X-Profile-Name"] = captured[0]
         return result
 
     except ExpressionSyntaxError as e:
@@ -36,12 +88,20 @@ def evaluate(
         logger.error(f"Unsupported operation in expression '{expression}': {str(e)}")
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
 
+    except (ArrayNotFoundError, ArrayShapeError) as e:
+        logger.error(f"Invalid array operand in expression '{expression}': {str(e)}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
     except ZeroDivisionError as e:
         logger.error(f"Division by zero in expression '{expression}': {str(e)}")
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST, detail="Cannot divide by zero"
         )
 
+    except ServiceUnavailableError as e:
+        logger.error(f"Could not evaluate '{expression}': {str(e)}")
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail=str(e))
+
     except Exception as e:
         logger.error(f"Unexpected error while evaluating '{expression}': {str(e)}")
         raise HTTPException(
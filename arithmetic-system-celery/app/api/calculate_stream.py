@@ -0,0 +1,137 @@
+import asyncio
+import contextvars
+import functools
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from ..models.models import (
+    CalculateStreamRequest,
+    CalculateStreamResponse,
+    ErrorResponse,
+)
+from .calculate_expression import orchestrator
+from app.types.errors import (
+    ArrayNotFoundError,
+    ArrayShapeError,
+    ExpressionSyntaxError,
+    ServiceUnavailableError,
+    UnsupportedOperatorError,
+    UnsupportedNodeError,
+    UnsupportedUnaryOperatorError,
+)
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+def _error(e: Exception) -> ErrorResponse:
+    if isinstance(
+        e,
+        (
+            ExpressionSyntaxError,
+            UnsupportedOperatorError,
+            UnsupportedNodeError,
+            UnsupportedUnaryOperatorError,
+            ArrayNotFoundError,
+            ArrayShapeError,
+        ),
+    ):
+        return ErrorResponse(code=HTTPStatus.BAD_REQUEST, message=str(e))
+    if isinstance(e, ZeroDivisionError):
+        return ErrorResponse(
+            code=HTTPStatus.BAD_REQUEST, message="Cannot divide by zero"
+        )
+    if isinstance(e, ServiceUnavailableError):
+        return ErrorResponse(code=HTTPStatus.SERVICE_UNAVAILABLE, message=str(e))
+    return ErrorResponse(
+        code=HTTPStatus.INTERNAL_SERVER_ERROR, message="An unexpected error occurred"
+    )
+
+
+def _tag_of(message: str) -> str | None:
+    try:
+        tag = json.loads(message).get("tag")
+    except (ValueError, AttributeError):
+        return None
+    return tag if isinstance(tag, str) else None
+
+
+@router.websocket("/ws/calculate")
+async def calculate_stream(websocket: WebSocket) -> None:
+    """Evaluate a stream of tagged expressions over one connection.
+
+    Replies are sent as soon as each expression finishes, so they can arrive
+    out of order; the tag matches them to requests. Once
+    ``websocket_max_outstanding`` expressions are in flight the server stops
+    reading until one completes.
+    """
+    await websocket.accept()
+    outstanding = asyncio.Semaphore(orchestrator.settings.websocket_max_outstanding)
+    send_lock = asyncio.Lock()
+    pending: set[asyncio.Task] = set()
+    # Expressions run on the connection's own threads: in the shared anyio
+    # pool (40 threads) its backlog would starve the sync HTTP endpoints.
+    executor = ThreadPoolExecutor(
+        max_workers=orchestrator.settings.websocket_max_outstanding,
+        thread_name_prefix="calculate-stream",
+    )
+
+    async def reply(response: CalculateStreamResponse) -> None:
+        async with send_lock:
+            await websocket.send_text(response.model_dump_json(exclude_none=True))
+
+    async def evaluate(request: CalculateStreamRequest) -> None:
+        try:
+            call = functools.partial(
+                orchestrator.calculate, request.expression, request.describe
+            )
+            result = await asyncio.get_running_loop().run_in_executor(
+                executor, contextvars.copy_context().run, call
+            )
+            response = CalculateStreamResponse(
+                tag=request.tag,
+                result=result.result,
+                summary=result.summary,
+                workflow=result.workflow,
+                evaluated_locally=result.evaluated_locally,
+            )
+        except Exception as e:
+            logger.error(f"Error evaluating '{request.expression}': {str(e)}")
+            response = CalculateStreamResponse(tag=request.tag, error=_error(e))
+        finally:
+            outstanding.release()
+        await reply(response)
+
+    try:
+        while True:
+            await outstanding.acquire()
+            message = await websocket.receive_text()
+            try:
+                request = CalculateStreamRequest.model_validate_json(message)
+            except ValidationError as e:
+                outstanding.release()
+                await reply(
+                    CalculateStreamResponse(
+                        tag=_tag_of(message),
+                        error=ErrorResponse(
+                            code=HTTPStatus.UNPROCESSABLE_ENTITY, message=str(e)
+                        ),
+                    )
+                )
+                continue
+
+            task = asyncio.create_task(evaluate(request))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+    except WebSocketDisconnect:
+        logger.info(f"WebSocket closed with {len(pending)} expressions in flight")
+    finally:
+        for task in pending:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+import logging
+from http import HTTPStatus
+
+from ..models.models import ExplainResponse
+from .calculate_expression import orchestrator
+from app.types.errors import ExpressionError
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/explain",
+    response_model=ExplainResponse,
+    response_model_exclude_none=True,
+    response_class=ORJSONResponse,
+)
+def explain(
+    expression: str = Query(..., description="Arithmetic expression to explain"),
+    analyze: bool = Query(
+        False, description="Execute the workflow and report per-node timings"
+    ),
+) -> ExplainResponse:
+    try:
+        return orchestrator.explain(expression, analyze=analyze)
+
+    except ExpressionError as e:
+        logger.error(f"Cannot explain '{expression}': {str(e)}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    except ZeroDivisionError as e:
+        logger.error(f"Division by zero in expression '{expression}': {str(e)}")
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail="Cannot divide by zero"
+        )
+
+    except Exception as e:
+        logger.error(f"Unexpected error while explaining '{expression}': {str(e)}")
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
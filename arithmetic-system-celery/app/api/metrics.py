@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+
+from ..config import get_settings
+from ..models.models import MetricsResponse, WorkerMemoryResponse
+from ..services.memory_stats import MemoryStatsStore
+from .calculate_expression import orchestrator
+
+router = APIRouter()
+
+settings = get_settings()
+memory_stats = (
+    MemoryStatsStore.from_url(settings.memory_stats_redis_url)
+    if settings.memory_stats_redis_url
+    else None
+)
+
+
+@router.get("/metrics", response_model=MetricsResponse)
+def metrics() -> MetricsResponse:
+    return orchestrator.metrics()
+
+
+@router.get("/metrics/workers", response_model=WorkerMemoryResponse)
+def worker_memory() -> WorkerMemoryResponse:
+    return WorkerMemoryResponse(
+        enabled=memory_stats is not None,
+        max_memory_per_child_kib=settings.worker_max_memory_per_child_kib,
+        max_tasks_per_child=settings.worker_max_tasks_per_child,
+        process_starts=memory_stats.process_starts() if memory_stats else {},
+        tasks=memory_stats.task_stats() if memory_stats else [],
+    )
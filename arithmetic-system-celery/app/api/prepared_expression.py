@@ -0,0 +1,82 @@
+from fastapi import APIRouter, HTTPException
+import logging
+from ..services.prepared_expressions import PreparedExpressionService
+from ..models.models import (
+    EvaluatePreparedRequest,
+    EvaluatePreparedResponse,
+    PrepareExpressionRequest,
+    PreparedExpressionResponse,
+)
+from http import HTTPStatus
+from app.types.errors import (
+    ExpressionSyntaxError,
+    PreparedExpressionNotFoundError,
+    UnsupportedOperatorError,
+    UnsupportedNodeError,
+    UnsupportedUnaryOperatorError,
+    VariableBindingError,
+)
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+prepared_service = PreparedExpressionService()
+
+
+@router.post(
+    "/prepared",
+    response_model=PreparedExpressionResponse,
+    status_code=HTTPStatus.CREATED,
+)
+def prepare(request: PrepareExpressionRequest) -> PreparedExpressionResponse:
+    try:
+        prepared = prepared_service.register(request.expression)
+        return PreparedExpressionResponse(
+            id=prepared.id,
+            expression=prepared.expression,
+            variables=prepared.variables,
+        )
+
+    except (
+        ExpressionSyntaxError,
+        UnsupportedOperatorError,
+        UnsupportedNodeError,
+        UnsupportedUnaryOperatorError,
+    ) as e:
+        logger.error(f"Cannot prepare expression '{request.expression}': {str(e)}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+
+@router.post(
+    "/prepared/{prepared_id}/evaluate", response_model=EvaluatePreparedResponse
+)
+def evaluate_prepared(
+    prepared_id: str, request: EvaluatePreparedRequest
+) -> EvaluatePreparedResponse:
+    try:
+        evaluation = prepared_service.evaluate(prepared_id, request.bindings)
+        return EvaluatePreparedResponse(
+            result=evaluation.result,
+            rows=evaluation.rows,
+            chunks=evaluation.chunks,
+        )
+
+    except PreparedExpressionNotFoundError as e:
+        logger.error(str(e))
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e))
+
+    except VariableBindingError as e:
+        logger.error(f"Invalid bindings for '{prepared_id}': {str(e)}")
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(e))
+
+    except ZeroDivisionError as e:
+        logger.error(f"Division by zero in prepared '{prepared_id}': {str(e)}")
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail="Cannot divide by zero"
+        )
+
+    except Exception as e:
+        logger.error(f"Unexpected error while evaluating '{prepared_id}': {str(e)}")
+        raise HTTPException(
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            detail="An unexpected error occurred",
+        )
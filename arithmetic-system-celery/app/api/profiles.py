@@ -0,0 +1,27 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from http import HTTPStatus
+from ..models.models import ProfileListResponse
+from ..services.profiler import get_profile_store
+from app.types.errors import ProfileNotFoundError
+
+router = APIRouter()
+
+
+@router.get("/profiles", response_model=ProfileListResponse)
+def list_profiles() -> ProfileListResponse:
+    store = get_profile_store()
+    return ProfileListResponse(
+        enabled=store is not None, profiles=store.list() if store else []
+    )
+
+
+@router.get("/profiles/{name}", response_class=FileResponse)
+def download_profile(name: str) -> FileResponse:
+    store = get_profile_store()
+    try:
+        if store is None:
+            raise ProfileNotFoundError(name)
+        return FileResponse(store.path(name), filename=name)
+    except ProfileNotFoundError as e:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(e))
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException
+from http import HTTPStatus
+from ..models.models import TraceResponse, TraceSpan
+from ..services.tracing import InMemorySpanExporter, critical_path, get_tracer
+
+router = APIRouter()
+
+
+def _collector() -> InMemorySpanExporter | None:
+    tracer = get_tracer()
+    if tracer is None or not isinstance(tracer.exporter, InMemorySpanExporter):
+        return None
+    return tracer.exporter
+
+
+@router.get("/traces", response_model=list[str])
+def list_traces() -> list[str]:
+    collector = _collector()
+    return collector.trace_ids() if collector else []
+
+
+@router.get("/traces/{trace_id}", response_model=TraceResponse)
+def get_trace(trace_id: str) -> TraceResponse:
+    collector = _collector()
+    spans = collector.spans(trace_id) if collector else []
+    if not spans:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail=f"Trace not found: '{trace_id}'"
+        )
+    return TraceResponse(
+        trace_id=trace_id,
+        spans=[
+            TraceSpan(
+                span_id=span.span_id,
+                parent_id=span.parent_id,
+                name=span.name,
+                start=span.start,
+                duration_seconds=span.duration,
+                attributes=span.attributes,
+            )
+            for span in sorted(spans, key=lambda span: span.start)
+        ],
+        critical_path=[span.span_id for span in critical_path(spans)],
+    )
@@ -1,9 +1,30 @@
+from contextvars import ContextVar
+
 from celery import Celery
+from kombu import Producer
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# Set while app.services.bulk_publisher lays out a workflow. Chains and chords
+# do not pass a producer on to their members, so every publish of the canvas
+# is routed here instead.
+publish_producer: ContextVar[Producer | None] = ContextVar(
+    "publish_producer", default=None
+)
+
+
+class ArithmeticCelery(Celery):
+    def producer_or_acquire(self, producer=None):
+        return super().producer_or_acquire(producer or publish_producer.get())
+
 
-app = Celery(
+app = ArithmeticCelery(
     "arithmetic_system",
-    broker="pyamqp://guest@rabbitmq//",
-    backend="redis://redis:6379/0",
+    broker=settings.broker_url,
+    backend=settings.result_backend,
+    task_cls="app.workers.base:ArithmeticTask",
     include=[
         "app.workers.add_service",
         "app.workers.sub_service",
@@ -11,6 +32,18 @@ app = Celery(
         "app.workers.div_service",
         "app.workers.xsum_service",
         "app.workers.xprod_service",
+        "app.workers.eval_columns_service",
+        "app.workers.concat_service",
+        "app.workers.add_batch_service",
+        "app.workers.sub_batch_service",
+        "app.workers.mul_batch_service",
+        "app.workers.div_batch_service",
+        "app.workers.eval_expression_service",
+        "app.workers.memory_monitor",
+        "app.workers.subtree_recorder",
+        "app.workers.task_profiler",
+        "app.workers.task_tracer",
+        "app.workers.load_reporter",
     ],
 )
 
@@ -24,5 +57,11 @@ app.conf.update(
     task_time_limit=30 * 60,
     task_soft_time_limit=25 * 60,
     worker_prefetch_multiplier=1,
-    worker_max_tasks_per_child=1000,
+    worker_max_tasks_per_child=settings.worker_max_tasks_per_child,
+    worker_max_memory_per_child=settings.worker_max_memory_per_child_kib,
+    worker_autoscaler="app.workers.autoscaler:QueueDepthAutoscaler",
+    broker_transport_options=settings.broker_transport_options,
+    # Every worker also consumes <hostname>.dq2 for load-aware and affinity
+    # routing.
+    worker_direct=settings.load_aware_routing or settings.affinity_routing,
 )
@@ -0,0 +1,141 @@
+from functools import lru_cache
+from typing import Literal
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="ARITHMETIC_")
+
+    broker_url: str = "pyamqp://guest@rabbitmq//"
+    result_backend: str = "redis://redis:6379/0"
+    broker_transport_options: dict = {}
+
+    # "embedded" evaluates plans in the API process, for single-node deployments.
+    execution_mode: Literal["distributed", "embedded"] = "distributed"
+    plan_cache_size: int = 1024
+    result_timeout: float = 3.0
+    workflow_description_max_chars: int = 4096
+    # Coalesce identical in-flight expressions across API replicas when set.
+    single_flight_redis_url: str | None = None
+    reduction_fan_in: int = 32
+    # None auto-tunes the batch size; 1 disables leaf batching.
+    leaf_batch_size: int | None = None
+    # Choose inline, fused or distributed execution per subtree from telemetry.
+    adaptive_planner: bool = False
+    inline_max_operations: int = 64
+    telemetry_refresh_seconds: float = 1.0
+
+    # Reuse values of already evaluated subtrees, keyed by content hash, so an
+    # edited expression only dispatches its changed parts. Workers report the
+    # values to Redis at subtree_store_redis_url; without it they are only
+    # shared within one process (embedded mode).
+    subtree_reuse: bool = False
+    subtree_store_size: int = 100_000
+    subtree_store_redis_url: str | None = None
+    subtree_store_ttl_seconds: float = 3600.0
+
+    # Lists of at least claim_check_min_items numbers travel as references to
+    # a side store instead of inside messages: files in claim_check_mmap_dir
+    # for co-located workers (e.g. on /dev/shm), else Redis when a URL is set.
+    claim_check_mmap_dir: str | None = None
+    claim_check_redis_url: str | None = None
+    claim_check_min_items: int = 4096
+    claim_check_ttl_seconds: float = 600.0
+
+    # Uploaded arrays kept per API replica, and array elements per worker task.
+    array_store_capacity: int = 256
+    array_chunk_size: int = 10_000
+
+    # Send each task to the least-loaded replica's direct queue, judged by
+    # the load workers report with their heartbeats; reports older than
+    # worker_load_stale_seconds are ignored.
+    load_aware_routing: bool = False
+    worker_load_stale_seconds: float = 10.0
+
+    # Send memoizable tasks to the replica a consistent hash of their
+    # arguments picks, from the same worker reports, so repeated calls meet
+    # that replica's task memo, shared by its pool: task_memo_size slots for
+    # calls serializing to at most task_memo_max_key_bytes with results of
+    # at most task_memo_max_result_bytes.
+    affinity_routing: bool = False
+    affinity_virtual_nodes: int = 64
+    task_memo_size: int = 0
+    task_memo_max_key_bytes: int = 512
+    task_memo_max_result_bytes: int = 1024
+
+    # Publish all messages of a workflow in one batch over one pooled
+    # connection, with a single confirm wait when confirm_publish is on.
+    bulk_publish: bool = False
+
+    # Duplicate workflows still running past this percentile of their shape's
+    # recent latencies; the first copy to finish wins.
+    hedge_enabled: bool = False
+    hedge_percentile: float = 95.0
+    hedge_min_samples: int = 20
+    hedge_latency_window: int = 256
+    hedge_poll_interval: float = 0.005
+
+    # Stop dispatching after breaker_failure_threshold consecutive publish or
+    # result failures or slow workflows, or when a queue has no consumers
+    # (AMQP brokers only). While open, expressions of at most
+    # breaker_fallback_max_operations operations are evaluated in the API;
+    # after breaker_reset_seconds one request probes the workers again.
+    breaker_enabled: bool = False
+    breaker_failure_threshold: int = 3
+    breaker_slow_publish_seconds: float = 0.5
+    breaker_slow_result_seconds: float = 2.0
+    breaker_reset_seconds: float = 10.0
+    breaker_fallback_max_operations: int = 1000
+    breaker_consumer_check_seconds: float = 5.0
+
+    # Pool sizing of workers started with --autoscale=max,min.
+    autoscale_interval_seconds: float = 1.0
+    autoscale_target_wait_seconds: float = 0.5
+    autoscale_idle_seconds: float = 30.0
+
+    # Worker processes are replaced once their RSS passes this many KiB.
+    worker_max_memory_per_child_kib: int | None = 256_000
+    worker_max_tasks_per_child: int | None = None
+    # Share of tasks whose memory is sampled with tracemalloc; reported to
+    # Redis at this URL when set.
+    task_memory_sample_rate: float = 0.0
+    memory_stats_redis_url: str | None = None
+
+    # Profiles of requests asking for one (?profile= or X-Profile) and of a
+    # share of worker tasks are written to profile_dir; off when unset.
+    profile_dir: str | None = None
+    task_profile_sample_rate: float = 0.0
+    profile_sample_interval_ms: float = 1.0
+
+    # Trace workflows across the API and workers. Spans are appended to
+    # trace_file when set; workers record task spans only then, so it must be
+    # a file they share with the API. Unset, the API keeps its own spans (and
+    # those of eager tasks) in-process for /api/traces.
+    tracing_enabled: bool = False
+    trace_file: str | None = None
+    trace_collector_traces: int = 1000
+
+    # Record a sample of /api/calculate requests to capture_file for replay
+    # (benchmarks.replay_capture); rotated past capture_max_bytes.
+    capture_file: str | None = None
+    capture_sample_rate: float = 1.0
+    capture_max_bytes: int = 64 * 1024 * 1024
+    capture_backup_count: int = 5
+
+    # Expressions a WebSocket connection may have in flight at once, each on
+    # a thread of the connection's own pool, apart from the HTTP threadpool.
+    websocket_max_outstanding: int = 64
+
+    # Micro-batching consumer (python -m app.workers.batch_consumer).
+    consumer_batch_size: int = 64
+    consumer_batch_max_wait_ms: float = 5.0
+
+    prepared_expression_capacity: int = 1024
+    prepared_chunk_size: int = 10_000
+    prepared_result_timeout: float = 30.0
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
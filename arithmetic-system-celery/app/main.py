@@ -1,5 +1,12 @@
 from fastapi import FastAPI
+from .api.arrays import router as arrays_router
 from .api.calculate_expression import router as evaluate_router
+from .api.calculate_stream import router as stream_router
+from .api.explain import router as explain_router
+from .api.metrics import router as metrics_router
+from .api.prepared_expression import router as prepared_router
+from .api.profiles import router as profiles_router
+from .api.traces import router as traces_router
 import logging
 
 logging.basicConfig(
@@ -9,3 +16,10 @@ logging.basicConfig(
 app = FastAPI()
 
 app.include_router(evaluate_router, prefix="/api")
+app.include_router(arrays_router, prefix="/api")
+app.include_router(stream_router, prefix="/api")
+app.include_router(metrics_router, prefix="/api")
+app.include_router(prepared_router, prefix="/api")
+app.include_router(profiles_router, prefix="/api")
+app.include_router(traces_router, prefix="/api")
+app.include_router(explain_router, prefix="/api")
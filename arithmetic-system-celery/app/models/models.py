@@ -6,8 +6,336 @@ class ErrorResponse(BaseModel):
     message: str = Field(..., description="Error message")
 
 
+class WorkflowSummary(BaseModel):
+    tasks: int = Field(..., description="Task messages the workflow publishes")
+    chords: int = Field(..., description="Chords in the workflow")
+    depth: int = Field(..., description="Tasks on the longest dependency path")
+    shape_hash: str = Field(
+        ..., description="Hash of the workflow structure, ignoring operands"
+    )
+
+
 class CalculateExpressionResponse(BaseModel):
-    result: float = Field(..., description="Calculation result")
-    workflow: str = Field(
-        ..., description="The Celery workflow structure used for the calculation."
+    result: float | list[float] = Field(
+        ..., description="Calculation result, element-wise for array operands"
+    )
+    summary: WorkflowSummary
+    workflow: str | None = Field(
+        None,
+        description="The Celery workflow structure used for the calculation. "
+        "Only rendered on request, and truncated to a configured length.",
+    )
+    trace_id: str | None = Field(None, description="Trace id, when tracing is on")
+    evaluated_locally: bool | None = Field(
+        None,
+        description="Set when the API evaluated the expression itself because "
+        "the circuit breaker to the workers was open",
+    )
+
+
+class ExplainNode(BaseModel):
+    kind: str = Field(..., description="task, chain, chord or group")
+    task: str | None = Field(None, description="Task name, for task nodes")
+    queue: str | None = Field(None, description="Queue the task is published to")
+    task_id: str | None = Field(None, description="Task id the node runs under")
+    body_bytes: int | None = Field(
+        None, description="Serialized arguments of the task message"
+    )
+    width: int | None = Field(None, description="Header tasks, for chord nodes")
+    finished_ms: float | None = Field(
+        None, description="ANALYZE: when the node finished, after dispatch"
+    )
+    elapsed_ms: float | None = Field(
+        None,
+        description="ANALYZE: time from the node's inputs being ready to it "
+        "finishing, queue wait included",
+    )
+    children: list["ExplainNode"] = Field(
+        default_factory=list,
+        description="Chord header tasks then body, chain steps, or group members",
+    )
+
+
+class ExplainResponse(BaseModel):
+    expression: str
+    operations: int = Field(..., description="Arithmetic operations in the tree")
+    summary: WorkflowSummary
+    tasks_per_queue: dict[str, int] = Field(
+        ..., description="Task messages per queue, chord bodies included"
+    )
+    chord_widths: list[int] = Field(
+        ..., description="Header width of every chord, outermost first"
+    )
+    critical_path_depth: int = Field(
+        ..., description="Tasks on the longest dependency path"
+    )
+    estimated_messages: int = Field(..., description="Task messages to publish")
+    estimated_bytes: int = Field(
+        ...,
+        description="Serialized task arguments across all messages, before "
+        "claim-check offloading; headers not included",
+    )
+    plan_seconds: float = Field(..., description="Time spent parsing and planning")
+    plan: ExplainNode | None = Field(
+        None, description="The canvas, or none when the expression is constant"
+    )
+    analyzed: bool = Field(False, description="Whether the workflow was executed")
+    result: float | list[float] | None = Field(None, description="ANALYZE: result")
+    execution_ms: float | None = Field(
+        None, description="ANALYZE: time from dispatch to the result"
+    )
+
+
+class CalculateStreamRequest(BaseModel):
+    tag: str = Field(..., description="Client-chosen id echoed in the reply")
+    expression: str = Field(..., description="Arithmetic expression to evaluate")
+    describe: bool = Field(
+        False, description="Include the rendered Celery workflow in the reply"
+    )
+
+
+class CalculateStreamResponse(BaseModel):
+    tag: str | None = Field(..., description="Tag of the request this answers")
+    result: float | list[float] | None = None
+    summary: WorkflowSummary | None = None
+    workflow: str | None = None
+    evaluated_locally: bool | None = None
+    error: ErrorResponse | None = None
+
+
+class UploadArrayRequest(BaseModel):
+    values: list[float] = Field(..., min_length=1, description="Array elements")
+
+
+class UploadArrayResponse(BaseModel):
+    id: str = Field(..., description="Reference to use in expressions")
+    length: int = Field(..., description="Number of elements")
+
+
+class PlanCacheStats(BaseModel):
+    size: int = Field(..., description="Number of cached expression plans")
+    capacity: int = Field(..., description="Maximum number of cached plans")
+    hits: int = Field(..., description="Dispatched plans taken from the cache")
+    replanned: int = Field(
+        ...,
+        description="Dispatched cache hits planned again from the cached parse "
+        "(adaptive planner or subtree reuse)",
+    )
+    misses: int = Field(..., description="Dispatched plans parsed and planned")
+    evictions: int = Field(..., description="Plans evicted to respect capacity")
+    hit_rate: float = Field(..., description="hits / (hits + replanned + misses)")
+    saved_seconds: float = Field(
+        ..., description="Parse and plan time avoided by dispatched cache hits"
+    )
+
+
+class SingleFlightStats(BaseModel):
+    leaders: int = Field(..., description="Requests that dispatched a workflow")
+    followers: int = Field(
+        ..., description="Requests that joined a workflow running in this process"
+    )
+    remote_followers: int = Field(
+        ..., description="Requests that joined a workflow dispatched by another replica"
+    )
+    coalescing_rate: float = Field(
+        ..., description="Share of requests answered by another request's workflow"
+    )
+
+
+class QueueTelemetry(BaseModel):
+    task_latency_seconds: float = Field(
+        ..., description="Smoothed latency of one task on this queue"
+    )
+    backlog: int = Field(..., description="Messages waiting at the last probe")
+    consumers: int = Field(..., description="Consumers at the last probe")
+
+
+class PlannerStats(BaseModel):
+    enabled: bool = Field(..., description="Whether the adaptive planner is active")
+    decisions: dict[str, int] = Field(
+        ..., description="Subtrees planned per execution mode"
+    )
+    workflows: int = Field(..., description="Expressions evaluated")
+    mean_latency_seconds: float = Field(
+        ..., description="Mean end-to-end latency of evaluated expressions"
+    )
+    mean_absolute_error_seconds: float = Field(
+        ..., description="Mean gap between predicted and observed latency"
+    )
+    broker_rtt_seconds: float = Field(
+        ..., description="Smoothed time to publish a workflow to the broker"
+    )
+    inline_operation_seconds: float = Field(
+        ..., description="Smoothed time of one operation evaluated in the API"
+    )
+    queues: dict[str, QueueTelemetry]
+
+
+class HedgingStats(BaseModel):
+    enabled: bool = Field(..., description="Whether straggler hedging is active")
+    workflows: int = Field(..., description="Workflows run through the hedger")
+    hedged: int = Field(..., description="Workflows that got a duplicate dispatched")
+    hedge_wins: int = Field(..., description="Hedges that finished before the original")
+    hedge_rate: float = Field(..., description="hedged / workflows")
+    p50_seconds: float = Field(..., description="Median recent workflow latency")
+    p99_seconds: float = Field(..., description="99th percentile recent latency")
+
+
+class RoutingStats(BaseModel):
+    enabled: bool = Field(..., description="Whether load-aware routing is active")
+    workers: int = Field(..., description="Replicas with a fresh load report")
+    routed: int = Field(..., description="Tasks sent to a replica's direct queue")
+    shared: int = Field(
+        ..., description="Tasks left on the shared queue (fewer than two replicas)"
+    )
+
+
+class CircuitBreakerStats(BaseModel):
+    enabled: bool = Field(..., description="Whether the circuit breaker is active")
+    state: str = Field(..., description="closed, open or half_open")
+    consecutive_failures: int = Field(
+        ..., description="Failed or slow workflows since the last success"
+    )
+    trips: int = Field(..., description="Times the breaker opened")
+    fallbacks: int = Field(..., description="Expressions evaluated in the API")
+    rejected: int = Field(
+        ..., description="Expressions too large to evaluate in the API while open"
+    )
+    transitions: dict[str, int] = Field(
+        ..., description="State changes, by the state entered"
+    )
+    last_trip_reason: str | None = Field(None, description="Why the breaker opened")
+
+
+class WorkerMemoStats(BaseModel):
+    hits: int = Field(..., description="Task calls answered from the memo")
+    misses: int = Field(..., description="Memoizable task calls that ran")
+    hit_rate: float = Field(..., description="hits / (hits + misses)")
+
+
+class AffinityStats(BaseModel):
+    enabled: bool = Field(..., description="Whether affinity routing is active")
+    routed: int = Field(..., description="Tasks sent to their replica by hash")
+    shared: int = Field(..., description="Memoizable tasks left on the shared queue")
+    workers: dict[str, WorkerMemoStats] = Field(
+        ..., description="Task memo of each replica with a fresh load report"
+    )
+
+
+class PublishStats(BaseModel):
+    bulk: bool = Field(..., description="Whether workflows are published in bulk")
+    workflows: int = Field(..., description="Workflows published")
+    messages: int = Field(..., description="Task messages published in bulk")
+    mean_publish_seconds: float = Field(
+        ..., description="Mean time spent publishing one workflow"
+    )
+
+
+class SubtreeReuseStats(BaseModel):
+    enabled: bool = Field(..., description="Whether known subtree values are reused")
+    size: int = Field(..., description="Subtree values held by this process")
+    lookups: int = Field(..., description="Subtrees looked up while planning")
+    reused: int = Field(..., description="Lookups that found a known value")
+    reuse_ratio: float = Field(..., description="reused / lookups")
+    operations: int = Field(..., description="Operations in planned expressions")
+    saved_operations: int = Field(
+        ..., description="Operations not dispatched because their value was known"
+    )
+    dispatch_savings: float = Field(..., description="saved_operations / operations")
+
+
+class MetricsResponse(BaseModel):
+    plan_cache: PlanCacheStats
+    single_flight: SingleFlightStats
+    planner: PlannerStats
+    hedging: HedgingStats
+    subtree_reuse: SubtreeReuseStats
+    publishing: PublishStats
+    routing: RoutingStats
+    circuit_breaker: CircuitBreakerStats
+    affinity: AffinityStats
+
+
+class PrepareExpressionRequest(BaseModel):
+    expression: str = Field(
+        ..., description="Arithmetic expression that may reference variables"
+    )
+
+
+class PreparedExpressionResponse(BaseModel):
+    id: str = Field(..., description="Identifier of the prepared expression")
+    expression: str = Field(..., description="Normalized expression")
+    variables: list[str] = Field(..., description="Variables the expression uses")
+
+
+class EvaluatePreparedRequest(BaseModel):
+    bindings: dict[str, list[float]] = Field(
+        ..., description="One column of values per variable"
+    )
+
+
+class EvaluatePreparedResponse(BaseModel):
+    result: list[float] = Field(..., description="One result per input row")
+    rows: int = Field(..., description="Number of evaluated rows")
+    chunks: int = Field(
+        ..., description="Number of worker tasks the rows were split into"
+    )
+
+
+class TaskMemoryStats(BaseModel):
+    task: str = Field(..., description="Task name")
+    samples: int = Field(..., description="Sampled executions")
+    mean_peak_bytes: float = Field(
+        ..., description="Mean tracemalloc peak of a sampled execution"
+    )
+    max_peak_bytes: int = Field(..., description="Largest tracemalloc peak seen")
+    mean_rss_growth_kib: float = Field(
+        ..., description="Mean growth of the process' peak RSS per execution"
+    )
+
+
+class WorkerMemoryResponse(BaseModel):
+    enabled: bool = Field(..., description="Whether workers report memory stats")
+    max_memory_per_child_kib: int | None = Field(
+        ..., description="RSS above which a worker process is replaced"
+    )
+    max_tasks_per_child: int | None = Field(
+        ..., description="Tasks after which a worker process is replaced"
+    )
+    process_starts: dict[str, int] = Field(
+        ..., description="Worker processes started per worker host, respawns included"
+    )
+    tasks: list[TaskMemoryStats]
+
+
+class ProfileInfo(BaseModel):
+    name: str = Field(..., description="File name, used to download the profile")
+    kind: str = Field(..., description="'request' or 'task'")
+    target: str = Field(..., description="Profiled endpoint or task name")
+    mode: str = Field(..., description="'cprofile' (.pstats) or 'sample' (.folded)")
+    size_bytes: int = Field(..., description="Size of the profile file")
+    created_at: float = Field(..., description="Unix time the profile was written")
+
+
+class ProfileListResponse(BaseModel):
+    enabled: bool = Field(..., description="Whether a profile directory is set")
+    profiles: list[ProfileInfo] = Field(..., description="Newest first")
+
+
+class TraceSpan(BaseModel):
+    span_id: str
+    parent_id: str | None
+    name: str = Field(..., description="API phase or task name")
+    start: float = Field(..., description="Unix time; publish time for tasks")
+    duration_seconds: float
+    attributes: dict = Field(
+        ..., description="For tasks, queue_wait_seconds and execution_seconds"
+    )
+
+
+class TraceResponse(BaseModel):
+    trace_id: str
+    spans: list[TraceSpan]
+    critical_path: list[str] = Field(
+        ..., description="Span ids from the root to the span that finished last"
     )
@@ -0,0 +1,113 @@
+from __future__ import annotations
+import bisect
+import hashlib
+import threading
+
+from celery.utils.nodenames import WORKER_DIRECT_EXCHANGE
+
+from app.models.models import AffinityStats, WorkerMemoStats
+from app.services.load_router import LoadAwareRouter
+from app.services.task_memo import memo_key
+
+
+def _hash(value: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing over replicas, each at ``virtual_nodes`` points.
+
+    When a replica joins or leaves, only the keys between its points and
+    their neighbours change owner (about 1/n of them); every other key keeps
+    its replica and the results that replica remembers.
+    """
+
+    def __init__(self, hostnames: frozenset[str], virtual_nodes: int):
+        points = sorted(
+            (_hash(f"{hostname}#{i}".encode()), hostname)
+            for hostname in hostnames
+            for i in range(virtual_nodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._hostnames = [hostname for _, hostname in points]
+
+    def lookup(self, key: bytes) -> str:
+        index = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._hostnames[index]
+
+
+class AffinityRouter:
+    """Route memoizable tasks to a stable replica by their arguments.
+
+    Membership comes from the load reports ``LoadAwareRouter`` follows: a
+    replica joins the ring with its first report and leaves when it goes
+    offline or its reports turn stale. Tasks that are not memoizable, or whose
+    arguments are too large to remember, go to ``fallback`` (load-aware
+    routing when it is on) or stay on the shared queue.
+    """
+
+    def __init__(
+        self,
+        workers: LoadAwareRouter,
+        virtual_nodes: int,
+        max_key_bytes: int,
+        fallback: LoadAwareRouter | None = None,
+    ):
+        self.workers = workers
+        self.virtual_nodes = virtual_nodes
+        self.max_key_bytes = max_key_bytes
+        self.fallback = fallback
+        self.routed = 0
+        self.shared = 0
+        self._rings: dict[frozenset[str], HashRing] = {}
+        self._lock = threading.Lock()
+
+    def choose(self, key: bytes, queue: str) -> str | None:
+        hostnames = frozenset(load.hostname for load in self.workers.fresh(queue))
+        with self._lock:
+            if len(hostnames) < 2:
+                self.shared += 1
+                return None
+            ring = self._rings.get(hostnames)
+            if ring is None:
+                # One ring per set of replicas consuming a queue; sets of
+                # departed replicas are dropped now and then.
+                if len(self._rings) >= 64:
+                    self._rings.clear()
+                ring = self._rings[hostnames] = HashRing(hostnames, self.virtual_nodes)
+            self.routed += 1
+        return ring.lookup(key)
+
+    def route(self, sig, queue: str) -> None:
+        key = (
+            memo_key(sig.task, sig.args, sig.kwargs, self.max_key_bytes)
+            if getattr(sig.type, "memoize", False)
+            else None
+        )
+        if key is None and self.fallback is not None:
+            self.fallback.route(sig, queue)
+            return
+        hostname = self.choose(key, queue) if key is not None else None
+        if hostname is None:
+            # A cached plan may still carry the route of an earlier dispatch.
+            sig.options.pop("exchange", None)
+            sig.options.pop("routing_key", None)
+        else:
+            sig.set(exchange=WORKER_DIRECT_EXCHANGE.name, routing_key=hostname)
+
+    def stats(self, enabled: bool) -> AffinityStats:
+        workers = {
+            load.hostname: WorkerMemoStats(
+                hits=load.memo_hits,
+                misses=load.memo_misses,
+                hit_rate=load.memo_hits / (load.memo_hits + load.memo_misses)
+                if load.memo_hits + load.memo_misses
+                else 0.0,
+            )
+            for load in self.workers.fresh()
+        }
+        with self._lock:
+            routed, shared = self.routed, self.shared
+        return AffinityStats(
+            enabled=enabled, routed=routed, shared=shared, workers=workers
+        )
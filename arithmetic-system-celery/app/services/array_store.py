@@ -0,0 +1,29 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class ArrayStore:
+    """Uploaded arrays that expressions reference as ``arr_<id>``.
+
+    Ids are derived from the values, so uploading the same array twice, or to
+    another API replica, yields the same reference.
+    """
+
+    def __init__(self, capacity: int):
+        self._arrays: LRUCache[str, list[float]] = LRUCache(capacity)
+
+    def put(self, values: list[float]) -> str:
+        digest = hashlib.sha256(json.dumps(values).encode()).hexdigest()[:16]
+        array_id = f"arr_{digest}"
+        self._arrays.put(array_id, values)
+        logger.info(f"Stored array {array_id} of {len(values)} elements")
+        return array_id
+
+    def get(self, array_id: str) -> list[float] | None:
+        return self._arrays.get(array_id)
@@ -0,0 +1,254 @@
+"""Evaluate a file of newline-separated expressions, offline.
+
+The input is memory-mapped and read one line at a time, so its size is not
+bounded by memory. Expressions are parsed with ``ExpressionParser`` and
+planned by the same ``WorkflowBuilder`` as the API, then either published to
+the workers with at most --window workflows in flight (``celery``) or
+evaluated by the embedded engine in a pool of --processes local processes
+(``local``). Results are written in input order, one JSON line per non-blank
+input line: ``{"line": 3, "result": 7.0}`` or ``{"line": 4, "error": "..."}``.
+
+Progress is checkpointed next to the output every --checkpoint-every lines;
+rerunning the same command resumes after the last checkpoint.
+
+Usage: python -m app.services.bulk_evaluator INPUT OUTPUT [--mode celery]
+       [--window 256] [--processes N] [--chunk-size 1000]
+       [--checkpoint-every 10000]
+"""
+
+from __future__ import annotations
+import argparse
+import logging
+import mmap
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Iterator
+
+import orjson
+
+from app.config import Settings, get_settings
+from app.services.orchestrator import WorkflowOrchestrator
+from app.types.errors import ExpressionError
+
+logger = logging.getLogger(__name__)
+
+# (line number, byte offset just past the line, expression)
+InputLine = tuple[int, int, str]
+
+
+@dataclass
+class Checkpoint:
+    """Input consumed and output written up to the last durable flush."""
+
+    offset: int = 0
+    line: int = 0
+    output_bytes: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> Checkpoint:
+        try:
+            with open(path, "rb") as f:
+                return cls(**orjson.loads(f.read()))
+        except FileNotFoundError:
+            return cls()
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps(asdict(self)))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+
+def read_lines(path: str, offset: int = 0, line: int = 0) -> Iterator[InputLine]:
+    """Non-blank lines of ``path`` from byte ``offset``, numbered from
+    ``line`` + 1."""
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        while offset < size:
+            end = mm.find(b"\n", offset)
+            end = size if end == -1 else end + 1
+            line += 1
+            expression = mm[offset:end].strip()
+            offset = end
+            if expression:
+                yield line, offset, expression.decode()
+
+
+def format_result(line: int, outcome) -> bytes:
+    if isinstance(outcome, BaseException):
+        return orjson.dumps({"line": line, "error": describe_error(outcome)}) + b"\n"
+    return orjson.dumps({"line": line, "result": outcome}) + b"\n"
+
+
+def describe_error(e: BaseException) -> str:
+    if isinstance(e, ZeroDivisionError):
+        return "Cannot divide by zero"
+    if isinstance(e, ExpressionError):
+        return str(e)
+    return f"{type(e).__name__}: {e}"
+
+
+def evaluate_with_celery(
+    orchestrator: WorkflowOrchestrator, lines: Iterator[InputLine], window: int
+) -> Iterator[tuple[InputLine, bytes]]:
+    """Publish expressions as the window allows and yield results in input
+    order; the oldest in-flight workflow is awaited before publishing more."""
+    in_flight: deque = deque()
+    for item in lines:
+        try:
+            pending = orchestrator.submit(item[2])
+        except Exception as e:
+            pending = e
+        in_flight.append((item, pending))
+        if len(in_flight) >= window:
+            yield _collect(orchestrator, *in_flight.popleft())
+    while in_flight:
+        yield _collect(orchestrator, *in_flight.popleft())
+
+
+def _collect(orchestrator: WorkflowOrchestrator, item: InputLine, pending):
+    if not isinstance(pending, Exception):
+        try:
+            pending = orchestrator.result(pending)
+        except Exception as e:
+            pending = e
+    return item, format_result(item[0], pending)
+
+
+_local_orchestrator: WorkflowOrchestrator | None = None
+
+
+def _init_local_process() -> None:
+    global _local_orchestrator
+    logging.disable(logging.INFO)
+    _local_orchestrator = WorkflowOrchestrator(Settings(execution_mode="embedded"))
+
+
+def _evaluate_chunk(chunk: list[InputLine]) -> list[bytes]:
+    results = []
+    for line, _, expression in chunk:
+        try:
+            outcome = _local_orchestrator.submit(expression)
+        except Exception as e:
+            outcome = e
+        results.append(format_result(line, outcome))
+    return results
+
+
+def evaluate_locally(
+    lines: Iterator[InputLine], processes: int | None, chunk_size: int
+) -> Iterator[tuple[InputLine, bytes]]:
+    """Evaluate chunks of lines in a process pool, keeping two chunks per
+    process in flight, and yield results in input order."""
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(processes, initializer=_init_local_process) as pool:
+        in_flight: deque[tuple[list[InputLine], Future]] = deque()
+        limit = 2 * processes
+        while True:
+            while len(in_flight) < limit:
+                chunk = list(islice(lines, chunk_size))
+                if not chunk:
+                    break
+                in_flight.append((chunk, pool.submit(_evaluate_chunk, chunk)))
+            if not in_flight:
+                return
+            chunk, future = in_flight.popleft()
+            yield from zip(chunk, future.result())
+
+
+def run(
+    input_path: str,
+    output_path: str,
+    mode: str = "celery",
+    window: int = 256,
+    processes: int | None = None,
+    chunk_size: int = 1000,
+    checkpoint_every: int = 10_000,
+    orchestrator: WorkflowOrchestrator | None = None,
+) -> int:
+    """Evaluate ``input_path`` into ``output_path``, resuming from its
+    checkpoint; returns the number of expressions evaluated by this run."""
+    checkpoint_path = f"{output_path}.checkpoint"
+    checkpoint = Checkpoint.load(checkpoint_path)
+    if checkpoint.line:
+        logger.info(f"Resuming after line {checkpoint.line}")
+
+    lines = read_lines(input_path, checkpoint.offset, checkpoint.line)
+    if mode == "local":
+        results = evaluate_locally(lines, processes, chunk_size)
+    else:
+        results = evaluate_with_celery(
+            orchestrator or WorkflowOrchestrator(), lines, window
+        )
+
+    evaluated = 0
+    started = time.perf_counter()
+    with open(output_path, "ab") as out:
+        # Drop output written after the last checkpoint; it is redone.
+        out.truncate(checkpoint.output_bytes)
+        for (line, offset, _), result in results:
+            out.write(result)
+            evaluated += 1
+            checkpoint.line, checkpoint.offset = line, offset
+            if evaluated % checkpoint_every == 0:
+                _flush(out, checkpoint, checkpoint_path)
+                rate = evaluated / (time.perf_counter() - started)
+                logger.info(f"Line {line}: {rate:.0f} expressions/s")
+        _flush(out, checkpoint, checkpoint_path)
+    return evaluated
+
+
+def _flush(out, checkpoint: Checkpoint, path: str) -> None:
+    out.flush()
+    os.fsync(out.fileno())
+    checkpoint.output_bytes = out.tell()
+    checkpoint.save(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--mode", choices=["celery", "local"], default="celery")
+    parser.add_argument("--window", type=int, default=256)
+    parser.add_argument("--processes", type=int)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--checkpoint-every", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # Planning logs every expression at INFO; only this module's progress is
+    # of interest here.
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    logger.setLevel(logging.INFO)
+    settings = get_settings()
+    started = time.perf_counter()
+    evaluated = run(
+        args.input,
+        args.output,
+        mode=args.mode,
+        window=args.window,
+        processes=args.processes,
+        chunk_size=args.chunk_size,
+        checkpoint_every=args.checkpoint_every,
+        orchestrator=WorkflowOrchestrator(settings) if args.mode == "celery" else None,
+    )
+    logger.info(
+        f"Evaluated {evaluated} expressions in {time.perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+import weakref
+from typing import Any
+
+import amqp
+from amqp import spec
+from amqp.exceptions import MessageNacked
+from celery import Signature
+from celery.result import AsyncResult
+from kombu import Producer
+
+from app.celery import ArithmeticCelery, app as celery_app, publish_producer
+from app.models.models import PublishStats
+
+logger = logging.getLogger(__name__)
+
+
+class _BufferingProducer:
+    """Stand-in for a pooled producer that keeps messages instead of sending
+    them. Everything but ``publish`` goes to the real producer, so result
+    backends can still subscribe and declare through it."""
+
+    def __init__(self, producer: Producer):
+        self._producer = producer
+        self.messages: list[tuple[Any, dict]] = []
+
+    def publish(self, body, **kwargs) -> None:
+        self.messages.append((body, kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._producer, name)
+
+
+class _ConfirmChannel:
+    """A channel of its own per connection, in confirm mode, whose delivery
+    tags are counted here so one wait can cover a whole batch."""
+
+    def __init__(self, connection: amqp.Connection):
+        self.channel = connection.channel()
+        self.channel.confirm_select()
+        # Publish without py-amqp's wait for each message's confirm.
+        self.channel.basic_publish = self.channel._basic_publish
+        self.producer = Producer(self.channel, auto_declare=False)
+        self.last_tag = 0
+
+    def publish(self, messages: list[tuple[Any, dict]]) -> None:
+        timeout = None
+        first = self.last_tag + 1
+        for body, kwargs in messages:
+            timeout = kwargs.get("confirm_timeout") or kwargs.get("timeout")
+            self.producer.publish(body, **kwargs)
+            self.last_tag += 1
+        wait_for_confirms(self.channel, set(range(first, self.last_tag + 1)), timeout)
+
+
+def wait_for_confirms(channel, pending: set[int], timeout: float | None) -> None:
+    """Wait until the broker confirmed every delivery tag in ``pending``."""
+
+    def on_confirm(method, delivery_tag, multiple):
+        if method == spec.Basic.Nack:
+            raise MessageNacked()
+        if multiple:
+            pending.difference_update([tag for tag in pending if tag <= delivery_tag])
+        else:
+            pending.discard(delivery_tag)
+
+    while pending:
+        channel.wait(
+            [spec.Basic.Ack, spec.Basic.Nack], callback=on_confirm, timeout=timeout
+        )
+
+
+class BulkPublisher:
+    """Publish every message of a workflow as one batch.
+
+    ``apply_async`` runs against a buffering producer, so Celery lays the
+    canvas out as usual (ids, chord bookkeeping, result subscriptions) but
+    nothing is sent. The buffered messages then go out back to back over a
+    single pooled connection; with publisher confirms on, they share one
+    confirm wait instead of one round trip per message. Publish-phase
+    latency is recorded either way.
+    """
+
+    def __init__(self, bulk: bool, app: ArithmeticCelery = celery_app):
+        self.bulk = bulk
+        self.app = app
+        self.workflows = 0
+        self.messages = 0
+        self.seconds = 0.0
+        self._confirm_channels: weakref.WeakKeyDictionary[
+            amqp.Connection, _ConfirmChannel
+        ] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def dispatch(self, workflow: Signature) -> AsyncResult:
+        started = time.perf_counter()
+        if self.bulk and not self.app.conf.task_always_eager:
+            result, messages = self._publish_bulk(workflow)
+        else:
+            result, messages = workflow.apply_async(), None
+        self._record(time.perf_counter() - started, messages)
+        return result
+
+    def stats(self) -> PublishStats:
+        with self._lock:
+            workflows, messages, seconds = self.workflows, self.messages, self.seconds
+        return PublishStats(
+            bulk=self.bulk,
+            workflows=workflows,
+            messages=messages,
+            mean_publish_seconds=seconds / workflows if workflows else 0.0,
+        )
+
+    def _publish_bulk(self, workflow: Signature) -> tuple[AsyncResult, int]:
+        with self.app.producer_or_acquire() as producer:
+            buffered = _BufferingProducer(producer)
+            token = publish_producer.set(buffered)
+            try:
+                result = workflow.apply_async()
+            finally:
+                publish_producer.reset(token)
+            self._flush(producer, buffered.messages)
+        logger.debug(
+            f"Published workflow {result.id} as {len(buffered.messages)} messages"
+        )
+        return result, len(buffered.messages)
+
+    def _flush(self, producer: Producer, messages: list[tuple[Any, dict]]) -> None:
+        connection = producer.connection.connection
+        if isinstance(connection, amqp.Connection) and connection.confirm_publish:
+            self._confirm_channel(connection).publish(messages)
+            return
+        for body, kwargs in messages:
+            producer.publish(body, **kwargs)
+
+    def _confirm_channel(self, connection: amqp.Connection) -> _ConfirmChannel:
+        # Pooled connections are used by one thread at a time, so only the
+        # lookup needs the lock, not the channel.
+        with self._lock:
+            channel = self._confirm_channels.get(connection)
+        if channel is None or not channel.channel.is_open:
+            channel = _ConfirmChannel(connection)
+            with self._lock:
+                self._confirm_channels[connection] = channel
+        return channel
+
+    def _record(self, seconds: float, messages: int | None) -> None:
+        with self._lock:
+            self.workflows += 1
+            self.messages += messages or 0
+            self.seconds += seconds
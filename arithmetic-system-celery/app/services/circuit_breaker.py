@@ -0,0 +1,199 @@
+from __future__ import annotations
+import logging
+import socket
+import threading
+import time
+from collections import Counter
+from enum import Enum
+from typing import Callable
+
+from amqp.exceptions import NotFound
+from celery import Celery, Signature, chord
+from celery.exceptions import TimeoutError as ResultTimeoutError
+from kombu.exceptions import OperationalError
+
+from app.celery import app as celery_app
+from app.config import Settings
+from app.models.models import CircuitBreakerStats
+
+logger = logging.getLogger(__name__)
+
+# Raised while publishing or waiting when the broker or workers are degraded.
+# Task failures (e.g. a division by zero) are not among them.
+DEGRADED_ERRORS = (
+    ResultTimeoutError,
+    OperationalError,
+    ConnectionError,
+    socket.timeout,
+)
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+def workflow_queues(sig: Signature) -> set[str]:
+    """Queues the tasks of a canvas are published to."""
+    if isinstance(sig, chord):
+        return workflow_queues(sig.body).union(*map(workflow_queues, sig.tasks))
+    if hasattr(sig, "tasks"):
+        return set().union(*map(workflow_queues, sig.tasks))
+    return {sig.options.get("queue") or sig.type.queue}
+
+
+class ConsumerCheck:
+    """Whether queues have consumers, asked of the broker at most once per
+    ``interval`` per queue. Only AMQP brokers report consumer counts; on
+    other transports, and for eager tasks, every queue counts as consumed."""
+
+    def __init__(self, interval: float, app: Celery = celery_app):
+        self.interval = interval
+        self.app = app
+        self._checked: dict[str, tuple[float, bool]] = {}
+
+    def missing(self, queues: set[str]) -> list[str]:
+        now = time.monotonic()
+        due = [
+            queue
+            for queue in queues
+            if now - self._checked.get(queue, (-self.interval, True))[0]
+            >= self.interval
+        ]
+        if due:
+            for queue, consumed in self._ask(due).items():
+                self._checked[queue] = now, consumed
+        return sorted(queue for queue in queues if not self._checked[queue][1])
+
+    def _ask(self, queues: list[str]) -> dict[str, bool]:
+        if self.app.conf.task_always_eager:
+            return dict.fromkeys(queues, True)
+        with self.app.connection_for_write() as connection:
+            if connection.transport.driver_type != "amqp":
+                return dict.fromkeys(queues, True)
+            consumed = {}
+            for queue in queues:
+                try:
+                    ok = connection.default_channel.queue_declare(queue, passive=True)
+                    consumed[queue] = ok.consumer_count > 0
+                except NotFound:
+                    # The failed declare closed the channel.
+                    connection.default_channel
+                    consumed[queue] = False
+            return consumed
+
+
+class CircuitBreaker:
+    """Stop sending work to a degraded broker or worker pool.
+
+    Workflows that fail to publish or to return in time count as failures,
+    and so do successful ones slower than the configured publish or result
+    latency. After ``failure_threshold`` failures in a row, or when a queue
+    of the plan has no consumers, the breaker opens and ``allow`` refuses
+    work for ``reset_seconds``. Then it is half-open: one request probes the
+    workers, and its outcome closes or reopens the breaker; every outcome,
+    task errors included, releases the probe.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        consumers: ConsumerCheck | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = settings.breaker_failure_threshold
+        self.slow_publish_seconds = settings.breaker_slow_publish_seconds
+        self.slow_result_seconds = settings.breaker_slow_result_seconds
+        self.reset_seconds = settings.breaker_reset_seconds
+        self.consumers = consumers or ConsumerCheck(
+            settings.breaker_consumer_check_seconds
+        )
+        self.clock = clock
+        self.state = BreakerState.CLOSED
+        self.failures = 0
+        self.fallbacks = 0
+        self.rejected = 0
+        self.last_trip_reason: str | None = None
+        self.transitions: Counter[str] = Counter()
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self, queues: set[str]) -> bool:
+        with self._lock:
+            if self.state == BreakerState.OPEN:
+                if self.clock() - self._opened_at < self.reset_seconds:
+                    return False
+                self._transition(BreakerState.HALF_OPEN)
+            if self.state == BreakerState.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+
+        try:
+            missing = self.consumers.missing(queues)
+        except Exception as e:
+            self.record_failure(f"Could not check consumers: {e}")
+            return False
+        if missing:
+            self.record_failure(f"No consumers on {', '.join(missing)}", trip=True)
+            return False
+        return True
+
+    def record_success(self, publish_seconds: float | None, result_seconds: float):
+        if publish_seconds is not None and publish_seconds > self.slow_publish_seconds:
+            self.record_failure(f"Publishing took {publish_seconds:.3f}s")
+        elif result_seconds > self.slow_result_seconds:
+            self.record_failure(f"Result took {result_seconds:.3f}s")
+        else:
+            self.record_reachable()
+
+    def record_reachable(self) -> None:
+        """The workers answered, if only with a task error such as a
+        division by zero; a half-open probe that did so closes the breaker."""
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != BreakerState.CLOSED:
+                self._transition(BreakerState.CLOSED)
+
+    def record_failure(self, reason: str, trip: bool = False) -> None:
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if (
+                trip
+                or self.state == BreakerState.HALF_OPEN
+                or self.failures >= self.failure_threshold
+            ):
+                if self.state != BreakerState.OPEN:
+                    logger.warning(f"Circuit breaker open: {reason}")
+                    self._transition(BreakerState.OPEN)
+                self._opened_at = self.clock()
+                self.last_trip_reason = reason
+
+    def record_fallback(self, evaluated: bool) -> None:
+        with self._lock:
+            if evaluated:
+                self.fallbacks += 1
+            else:
+                self.rejected += 1
+
+    def stats(self, enabled: bool) -> CircuitBreakerStats:
+        with self._lock:
+            return CircuitBreakerStats(
+                enabled=enabled,
+                state=self.state.value,
+                consecutive_failures=self.failures,
+                trips=self.transitions[BreakerState.OPEN.value],
+                fallbacks=self.fallbacks,
+                rejected=self.rejected,
+                transitions=dict(self.transitions),
+                last_trip_reason=self.last_trip_reason,
+            )
+
+    def _transition(self, state: BreakerState) -> None:
+        logger.info(f"Circuit breaker {self.state.value} -> {state.value}")
+        self.state = state
+        self.transitions[state.value] += 1
@@ -0,0 +1,196 @@
+from __future__ import annotations
+import hashlib
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Any
+
+import numpy as np
+import redis
+from celery import Signature, chord
+from celery.canvas import _chain
+
+from app.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+# Key of the mapping that replaces an offloaded list in a message. The dash
+# keeps it apart from variable names in evaluate_columns_task bindings.
+CLAIM_CHECK_KEY = "claim-check"
+
+
+class ClaimCheckStore(ABC):
+    """Keep large operand lists out of broker messages and task results.
+
+    Lists of at least ``min_items`` numbers are stored once as float64 bytes
+    under their content hash; the message carries ``{"claim-check": key}``.
+    Workers resolve references to read-only NumPy views of the stored bytes,
+    so no JSON list is decoded or copied on the way in.
+    """
+
+    def __init__(self, min_items: int):
+        self.min_items = min_items
+
+    @abstractmethod
+    def put(self, key: str, payload: bytes) -> None: ...
+
+    @abstractmethod
+    def get(self, key: str) -> np.ndarray: ...
+
+    def offload(self, value: Any) -> Any:
+        """Return a reference for a large list of numbers, else ``value``."""
+        if (
+            not isinstance(value, (list, np.ndarray))
+            or len(value) < self.min_items
+            or not _is_flat(value)
+        ):
+            return value
+        payload = np.asarray(value, dtype=np.float64).tobytes()
+        key = hashlib.sha256(payload).hexdigest()
+        self.put(key, payload)
+        return {CLAIM_CHECK_KEY: key}
+
+    def offload_workflow(self, sig: Signature) -> Signature:
+        """Offload the large arguments of every task in a canvas, in place."""
+        if isinstance(sig, chord):
+            for task in sig.tasks:
+                self.offload_workflow(task)
+            self.offload_workflow(sig.body)
+        elif isinstance(sig, _chain) or hasattr(sig, "tasks"):
+            for task in sig.tasks:
+                self.offload_workflow(task)
+        else:
+            sig.args = tuple(self.offload(arg) for arg in sig.args)
+            sig.kwargs.update(
+                {key: self.offload(value) for key, value in sig.kwargs.items()}
+            )
+        return sig
+
+    def resolve(self, value: Any) -> Any:
+        """Replace references in ``value``, or one level inside a list or a
+        mapping, with the arrays they point to."""
+        if _is_reference(value):
+            return self.get(value[CLAIM_CHECK_KEY])
+        if isinstance(value, list) and any(_is_reference(item) for item in value):
+            return [self._resolve_item(item) for item in value]
+        if isinstance(value, dict) and any(
+            _is_reference(item) for item in value.values()
+        ):
+            return {key: self._resolve_item(item) for key, item in value.items()}
+        return value
+
+    def _resolve_item(self, item: Any) -> Any:
+        return self.get(item[CLAIM_CHECK_KEY]) if _is_reference(item) else item
+
+
+class RedisClaimCheckStore(ClaimCheckStore):
+    KEY_PREFIX = "arithmetic:claim-check:"
+
+    def __init__(self, client: redis.Redis, min_items: int, ttl_seconds: float):
+        super().__init__(min_items)
+        self.client = client
+        self.ttl_ms = int(ttl_seconds * 1000)
+
+    @classmethod
+    def from_url(
+        cls, url: str, min_items: int, ttl_seconds: float
+    ) -> RedisClaimCheckStore:
+        return cls(redis.Redis.from_url(url), min_items, ttl_seconds)
+
+    def put(self, key: str, payload: bytes) -> None:
+        self.client.set(self.KEY_PREFIX + key, payload, px=self.ttl_ms)
+
+    def get(self, key: str) -> np.ndarray:
+        payload = self.client.get(self.KEY_PREFIX + key)
+        if payload is None:
+            raise KeyError(f"Claim-checked payload expired or missing: {key}")
+        return np.frombuffer(payload, dtype=np.float64)
+
+
+class MmapClaimCheckStore(ClaimCheckStore):
+    """Payloads as files in a directory shared by co-located processes,
+    ideally on tmpfs such as /dev/shm; readers map them into memory."""
+
+    def __init__(self, directory: str, min_items: int, ttl_seconds: float):
+        super().__init__(min_items)
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._swept_at = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def put(self, key: str, payload: bytes) -> None:
+        path = self._path(key)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            # Written under a temporary name so readers never see a partial file.
+            partial = f"{path}.{os.getpid()}.partial"
+            with open(partial, "wb") as f:
+                f.write(payload)
+            os.replace(partial, path)
+        self._sweep()
+
+    def get(self, key: str) -> np.ndarray:
+        try:
+            return np.memmap(self._path(key), dtype=np.float64, mode="r")
+        except FileNotFoundError as e:
+            raise KeyError(f"Claim-checked payload expired or missing: {key}") from e
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.f64")
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._swept_at < self.ttl_seconds:
+            return
+        self._swept_at = now
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+
+def create_claim_check_store(settings: Settings) -> ClaimCheckStore | None:
+    if settings.claim_check_mmap_dir:
+        return MmapClaimCheckStore(
+            settings.claim_check_mmap_dir,
+            settings.claim_check_min_items,
+            settings.claim_check_ttl_seconds,
+        )
+    if settings.claim_check_redis_url:
+        return RedisClaimCheckStore.from_url(
+            settings.claim_check_redis_url,
+            settings.claim_check_min_items,
+            settings.claim_check_ttl_seconds,
+        )
+    return None
+
+
+@lru_cache
+def get_claim_check_store() -> ClaimCheckStore | None:
+    return create_claim_check_store(get_settings())
+
+
+def to_result(value: Any) -> Any:
+    """Plain Python form of a resolved value, for API responses."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def _is_reference(value: Any) -> bool:
+    return isinstance(value, dict) and CLAIM_CHECK_KEY in value and len(value) == 1
+
+
+def _is_flat(values) -> bool:
+    if isinstance(values, np.ndarray):
+        return values.ndim == 1
+    return all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        for value in values
+    )
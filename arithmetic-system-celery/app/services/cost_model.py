@@ -0,0 +1,197 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+from app.celery import app as celery_app
+from app.config import Settings
+from app.models.models import PlannerStats, QueueTelemetry
+from .expression_parser import ExpressionNode, OperationEnum
+
+logger = logging.getLogger(__name__)
+
+QueueProbe = Callable[[str], tuple[int, int]]
+
+
+class ExecutionMode(Enum):
+    INLINE = "inline"
+    FUSED = "fused"
+    DISTRIBUTED = "distributed"
+
+
+@dataclass
+class PlanDecision:
+    mode: ExecutionMode
+    queue: str
+    operations: int
+    hops: int
+    predicted_seconds: float
+
+
+class Ewma:
+    def __init__(self, initial: float, alpha: float = 0.2):
+        self.value = initial
+        self.alpha = alpha
+
+    def update(self, sample: float) -> None:
+        self.value += self.alpha * (sample - self.value)
+
+
+def critical_path(node: ExpressionNode | float | int) -> int:
+    """Count the task levels a distributed plan of ``node`` waits on.
+
+    Chains of one commutative operation are flattened into a single chord, so
+    they add one level however long they are.
+    """
+    if not isinstance(node, ExpressionNode):
+        return 0
+
+    if not node.operation.is_commutative:
+        return 1 + max(critical_path(node.left), critical_path(node.right))
+
+    operands, pending = [], [node]
+    while pending:
+        current = pending.pop()
+        if isinstance(current, ExpressionNode) and current.operation == node.operation:
+            pending.extend((current.left, current.right))
+        else:
+            operands.append(current)
+    return 1 + max(critical_path(operand) for operand in operands)
+
+
+def broker_queue_probe(queue: str) -> tuple[int, int]:
+    with celery_app.connection_for_read() as connection:
+        connection.ensure_connection(max_retries=1)
+        _, messages, consumers = connection.default_channel.queue_declare(
+            queue=queue, passive=True
+        )
+    return messages, consumers
+
+
+class TelemetryCostModel:
+    """Estimate the latency of a subtree under each execution mode.
+
+    Estimates come from live measurements: publish round trips, observed
+    workflow latencies per queue, and queue backlog probed from the broker.
+    ``decide`` picks the cheapest mode, and ``observe`` feeds the actual
+    latency back so the estimates and their prediction error stay current.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        queue_map: dict[OperationEnum, str],
+        queue_probe: QueueProbe = broker_queue_probe,
+    ):
+        self.settings = settings
+        self.queue_map = queue_map
+        self.queue_probe = queue_probe
+        self.broker_rtt = Ewma(0.002)
+        self.inline_operation = Ewma(0.000002)
+        self.task_latency = {queue: Ewma(0.005) for queue in queue_map.values()}
+        self.decisions = {mode: 0 for mode in ExecutionMode}
+        self.workflows = 0
+        self.total_latency = 0.0
+        self.predictions = 0
+        self.total_absolute_error = 0.0
+        self._backlog: dict[str, tuple[int, int]] = {}
+        self._backlog_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def predict(self, node: ExpressionNode) -> PlanDecision:
+        queue = self.queue_map[node.operation]
+        operations = node.operation_count
+        hops = critical_path(node)
+        compute = operations * self.inline_operation.value
+        hop = self.broker_rtt.value + self.task_latency[queue].value
+        wait = self._queue_wait(queue)
+
+        costs = {
+            ExecutionMode.FUSED: wait + hop + compute,
+            # Every level of a distributed plan is one more publish and task.
+            ExecutionMode.DISTRIBUTED: wait + hops * hop,
+        }
+        if operations <= self.settings.inline_max_operations:
+            costs[ExecutionMode.INLINE] = compute
+
+        mode = min(costs, key=costs.get)
+        return PlanDecision(mode, queue, operations, hops, costs[mode])
+
+    def decide(self, node: ExpressionNode) -> PlanDecision:
+        decision = self.predict(node)
+        with self._lock:
+            self.decisions[decision.mode] += 1
+        return decision
+
+    def observe_publish(self, seconds: float) -> None:
+        with self._lock:
+            self.broker_rtt.update(seconds)
+
+    def observe(self, decision: PlanDecision | None, actual_seconds: float) -> None:
+        with self._lock:
+            self.workflows += 1
+            self.total_latency += actual_seconds
+            if decision is None:
+                return
+
+            self.predictions += 1
+            self.total_absolute_error += abs(
+                actual_seconds - decision.predicted_seconds
+            )
+
+            if decision.mode == ExecutionMode.INLINE:
+                self.inline_operation.update(actual_seconds / decision.operations)
+                return
+
+            hops = 1 if decision.mode == ExecutionMode.FUSED else decision.hops
+            self.task_latency[decision.queue].update(
+                max(actual_seconds / hops - self.broker_rtt.value, 0.0)
+            )
+
+    def stats(self, enabled: bool) -> PlannerStats:
+        return PlannerStats(
+            enabled=enabled,
+            decisions={mode.value: count for mode, count in self.decisions.items()},
+            workflows=self.workflows,
+            mean_latency_seconds=(
+                self.total_latency / self.workflows if self.workflows else 0.0
+            ),
+            mean_absolute_error_seconds=(
+                self.total_absolute_error / self.predictions
+                if self.predictions
+                else 0.0
+            ),
+            broker_rtt_seconds=self.broker_rtt.value,
+            inline_operation_seconds=self.inline_operation.value,
+            queues={
+                queue: QueueTelemetry(
+                    task_latency_seconds=latency.value,
+                    backlog=self._backlog.get(queue, (0, 0))[0],
+                    consumers=self._backlog.get(queue, (0, 0))[1],
+                )
+                for queue, latency in self.task_latency.items()
+            },
+        )
+
+    def _queue_wait(self, queue: str) -> float:
+        self._refresh_backlog()
+        messages, consumers = self._backlog.get(queue, (0, 1))
+        return messages * self.task_latency[queue].value / max(consumers, 1)
+
+    def _refresh_backlog(self) -> None:
+        # Only the caller that claims the interval probes the broker; the rest
+        # keep planning against the previous backlog.
+        now = time.monotonic()
+        with self._lock:
+            if now - self._backlog_checked_at < self.settings.telemetry_refresh_seconds:
+                return
+            self._backlog_checked_at = now
+
+        for queue in self.task_latency:
+            try:
+                self._backlog[queue] = self.queue_probe(queue)
+            except Exception as e:
+                logger.warning(f"Could not probe backlog of queue {queue}: {e}")
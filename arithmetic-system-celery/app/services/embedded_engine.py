@@ -0,0 +1,53 @@
+from __future__ import annotations
+import logging
+from typing import Any
+
+from celery import Signature, chord, group
+from celery.canvas import _chain
+
+from app.celery import app as celery_app
+from .subtree_store import SUBTREE_HASHES_HEADER, SubtreeResultStore
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddedEngine:
+    """Evaluate a planned workflow inside the calling process.
+
+    The plan is the one ``WorkflowBuilder`` produces, interpreted with the same
+    argument passing a worker applies: a chain prepends the previous result to
+    the next task's arguments and a chord passes its header results as a list
+    to the body. Task functions run directly, so no message, ``AsyncResult`` or
+    serialized argument is involved.
+    """
+
+    def __init__(self, tasks=None, subtree_store: SubtreeResultStore | None = None):
+        self.tasks = tasks if tasks is not None else celery_app.tasks
+        self.subtree_store = subtree_store
+
+    def execute(self, workflow: Signature | float | int) -> Any:
+        if isinstance(workflow, (int, float, list)):
+            return workflow
+        return self._run(workflow, ())
+
+    def _run(self, sig: Signature, partial_args: tuple) -> Any:
+        if isinstance(sig, chord):
+            results = [self._run(task, partial_args) for task in sig.tasks]
+            return self._run(sig.body, (results,))
+
+        if isinstance(sig, _chain):
+            result = self._run(sig.tasks[0], partial_args)
+            for task in sig.tasks[1:]:
+                result = self._run(task, (result,))
+            return result
+
+        if isinstance(sig, group):
+            return [self._run(task, partial_args) for task in sig.tasks]
+
+        task = self.tasks[sig.task]
+        args = tuple(sig.args) if sig.immutable else partial_args + tuple(sig.args)
+        result = task.run(*args, **sig.kwargs)
+        hashes = sig.options.get("headers", {}).get(SUBTREE_HASHES_HEADER)
+        if hashes and self.subtree_store is not None:
+            self.subtree_store.put_many(dict.fromkeys(hashes, result))
+        return result
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from .expression_parser import ExpressionNode, OperationEnum
+
+
+def evaluate_tree(node: ExpressionNode | float | int) -> float | int:
+    if isinstance(node, (int, float)):
+        return node
+
+    if not isinstance(node, ExpressionNode):
+        raise TypeError(f"Invalid node type: {type(node)}")
+
+    left = evaluate_tree(node.left)
+    right = evaluate_tree(node.right)
+
+    if node.operation == OperationEnum.ADD:
+        return left + right
+    if node.operation == OperationEnum.SUB:
+        return left - right
+    if node.operation == OperationEnum.MUL:
+        return left * right
+    if right == 0:
+        raise ZeroDivisionError(f"Cannot divide {left} by zero.")
+    return left / right
@@ -0,0 +1,105 @@
+from __future__ import annotations
+from collections import Counter
+from datetime import datetime
+from typing import Callable
+
+from celery import Signature, chord, group
+from celery.canvas import _chain
+from kombu.serialization import dumps
+
+from app.celery import app as celery_app
+from app.models.models import ExplainNode
+
+
+def _members(sig: Signature) -> list[Signature]:
+    # A frozen chord keeps its header as a group.
+    tasks = sig.tasks
+    return list(tasks.tasks if isinstance(tasks, group) else tasks)
+
+
+def explain_workflow(sig: Signature) -> ExplainNode:
+    """The canvas as a tree of nodes, tasks annotated with their queue and
+    message size. Freeze the workflow first for nodes to carry task ids."""
+    if isinstance(sig, chord):
+        header = _members(sig)
+        return ExplainNode(
+            kind="chord",
+            task_id=sig.id,
+            width=len(header),
+            children=[explain_workflow(task) for task in header]
+            + [explain_workflow(sig.body)],
+        )
+    if isinstance(sig, (_chain, group)):
+        return ExplainNode(
+            kind="chain" if isinstance(sig, _chain) else "group",
+            children=[explain_workflow(task) for task in _members(sig)],
+        )
+    _, _, body = dumps(
+        [list(sig.args), dict(sig.kwargs)],
+        serializer=celery_app.conf.task_serializer,
+    )
+    return ExplainNode(
+        kind="task",
+        task=sig.task,
+        queue=sig.options.get("queue") or sig.type.queue,
+        task_id=sig.id,
+        body_bytes=len(body),
+    )
+
+
+def tasks(node: ExplainNode):
+    if node.kind == "task":
+        yield node
+    for child in node.children:
+        yield from tasks(child)
+
+
+def tasks_per_queue(node: ExplainNode) -> dict[str, int]:
+    return dict(Counter(task.queue for task in tasks(node)))
+
+
+def chord_widths(node: ExplainNode) -> list[int]:
+    widths = [node.width] if node.kind == "chord" else []
+    for child in node.children:
+        widths.extend(chord_widths(child))
+    return widths
+
+
+def analyze_timings(
+    node: ExplainNode,
+    finished_at: Callable[[str], datetime | None],
+    started: datetime,
+    ready_ms: float = 0.0,
+) -> float:
+    """Fill in when each node finished, from the completion time of its
+    tasks, and how long it took once its inputs were ready; returns the
+    node's finish time in ms after ``started``.
+
+    Completion times are recorded by the workers, so the figures are only
+    as exact as the clock sync between them and the API.
+    """
+    if node.kind == "task":
+        done = finished_at(node.task_id)
+        finished = (done - started).total_seconds() * 1000 if done else ready_ms
+    elif node.kind == "chord":
+        *header, body = node.children
+        body_ready = max(
+            (analyze_timings(task, finished_at, started, ready_ms) for task in header),
+            default=ready_ms,
+        )
+        finished = analyze_timings(body, finished_at, started, body_ready)
+    elif node.kind == "chain":
+        finished = ready_ms
+        for step in node.children:
+            finished = analyze_timings(step, finished_at, started, finished)
+    else:
+        finished = max(
+            (
+                analyze_timings(task, finished_at, started, ready_ms)
+                for task in node.children
+            ),
+            default=ready_ms,
+        )
+    node.finished_ms = finished
+    node.elapsed_ms = max(finished - ready_ms, 0.0)
+    return finished
@@ -1,10 +1,15 @@
 from __future__ import annotations
 import re
 import ast
+import hashlib
 import logging
 from dataclasses import dataclass
+from decimal import Decimal
 from enum import Enum, auto
+from functools import cached_property
+from typing import Callable
 from app.types.errors import (
+    ArrayNotFoundError,
     ExpressionSyntaxError,
     UnsupportedOperatorError,
     UnsupportedNodeError,
@@ -15,6 +20,10 @@ logger = logging.getLogger(__name__)
 
 REGEX_SPACES = re.compile(r"\s+")
 REGEX_VALID_CHARACTERS = re.compile(r"^[0-9+\-*/().%\s]+$")
+REGEX_VALID_CHARACTERS_WITH_VARIABLES = re.compile(r"^[0-9A-Za-z_+\-*/().%\s]+$")
+REGEX_VALID_CHARACTERS_WITH_ARRAYS = re.compile(r"^[0-9+\-*/().%\s\[\],]+$")
+REGEX_ARRAY_REFERENCE = re.compile(r"arr_[0-9a-f]{16}")
+REGEX_SPLIT_TOKEN = re.compile(r"[0-9A-Za-z_.]\s+[0-9A-Za-z_.]")
 
 
 class OperationEnum(Enum):
@@ -28,11 +37,28 @@ class OperationEnum(Enum):
         return self in {OperationEnum.ADD, OperationEnum.MUL}
 
 
+def _format_number(value) -> str:
+    """``value`` in positional notation; the parser takes no exponents, so
+    1e-05 is written 0.00001."""
+    if not isinstance(value, float):
+        return str(value)
+    text = format(Decimal(repr(value)), "f")
+    return text if "." in text else f"{text}.0"
+
+
+@dataclass(frozen=True)
+class VariableNode:
+    name: str
+
+    def __str__(self) -> str:
+        return self.name
+
+
 @dataclass
 class ExpressionNode:
     operation: OperationEnum
-    left: ExpressionNode | float
-    right: ExpressionNode | float
+    left: ExpressionNode | VariableNode | float | list[float]
+    right: ExpressionNode | VariableNode | float | list[float]
 
     def log_tree(self, indent: int = 0, prefix: str = "") -> str:
         result = []
@@ -65,6 +91,50 @@ class ExpressionNode:
         }
         return symbols.get(self.operation, "?")
 
+    @cached_property
+    def operation_count(self) -> int:
+        return 1 + sum(
+            child.operation_count
+            for child in (self.left, self.right)
+            if isinstance(child, ExpressionNode)
+        )
+
+    @cached_property
+    def has_arrays(self) -> bool:
+        return any(
+            child.has_arrays
+            if isinstance(child, ExpressionNode)
+            else isinstance(child, list)
+            for child in (self.left, self.right)
+        )
+
+    @cached_property
+    def content_hash(self) -> str:
+        """Merkle hash of the subtree.
+
+        Equal subtrees hash equal wherever they appear, and editing one
+        operand only changes the hashes on its path to the root.
+        """
+        children = [
+            f"n:{child.content_hash}"
+            if isinstance(child, ExpressionNode)
+            else f"v:{child!r}"
+            for child in (self.left, self.right)
+        ]
+        key = f"{self.operation.name}({children[0]},{children[1]})"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def to_expression(self) -> str:
+        operands = [
+            child.to_expression()
+            if isinstance(child, ExpressionNode)
+            else f"({_format_number(child)})"
+            if isinstance(child, (int, float)) and child < 0
+            else _format_number(child)
+            for child in (self.left, self.right)
+        ]
+        return f"({operands[0]} {self._get_operation_symbol()} {operands[1]})"
+
     def __str__(self) -> str:
         return self.log_tree()
 
@@ -77,8 +147,16 @@ class ExpressionParser:
         ast.Div: OperationEnum.DIV,
     }
 
-    def __init__(self):
+    def __init__(
+        self,
+        allow_variables: bool = False,
+        allow_arrays: bool = False,
+        array_lookup: Callable[[str], list[float] | None] | None = None,
+    ):
         self.operations = []
+        self.allow_variables = allow_variables
+        self.allow_arrays = allow_arrays
+        self.array_lookup = array_lookup
 
     def parse(self, expression: str) -> ExpressionNode | float | int:
         clean_expr = self._clean_expression(expression)
@@ -91,6 +169,9 @@ class ExpressionParser:
 
         return expr_tree
 
+    def clean(self, expression: str) -> str:
+        return self._clean_expression(expression)
+
     def _build_expression_tree(self, node) -> ExpressionNode | float | int:
         if isinstance(node, ast.BinOp):
             op_symbol = self.OPERATORS.get(type(node.op))
@@ -103,7 +184,26 @@ class ExpressionParser:
             return ExpressionNode(operation=op_symbol, left=left, right=right)
 
         if isinstance(node, ast.Constant):
-            return node.value
+            value = node.value
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise UnsupportedNodeError(type(value).__name__)
+            return value
+
+        if isinstance(node, ast.Name) and self.allow_variables:
+            return VariableNode(node.id)
+
+        if isinstance(node, ast.List) and self.allow_arrays:
+            return self._build_array(node)
+
+        if (
+            isinstance(node, ast.Name)
+            and self.array_lookup is not None
+            and REGEX_ARRAY_REFERENCE.fullmatch(node.id)
+        ):
+            values = self.array_lookup(node.id)
+            if values is None:
+                raise ArrayNotFoundError(node.id)
+            return values
 
         if not isinstance(node, ast.UnaryOp):
             raise UnsupportedNodeError(type(node).__name__)
@@ -114,16 +214,54 @@ class ExpressionParser:
         operand = self._build_expression_tree(node.operand)
         if isinstance(operand, (int, float)):
             return -operand
+        if isinstance(operand, list):
+            return [-value for value in operand]
         else:
             return ExpressionNode(operation=OperationEnum.SUB, left=0, right=operand)
 
+    def _build_array(self, node: ast.List) -> list[float]:
+        values = [self._build_expression_tree(element) for element in node.elts]
+        if not values:
+            raise ExpressionSyntaxError(ast.unparse(node), "Arrays cannot be empty")
+        if not all(
+            isinstance(value, (int, float)) and not isinstance(value, bool)
+            for value in values
+        ):
+            raise ExpressionSyntaxError(
+                ast.unparse(node), "Array elements must be numbers"
+            )
+        return values
+
     def _clean_expression(self, expression: str) -> str:
         clean = REGEX_SPACES.sub("", expression)
         if not clean:
             raise ExpressionSyntaxError(expression, "Expression cannot be empty")
 
-        if not REGEX_VALID_CHARACTERS.match(clean):
+        if self.allow_variables:
+            # Spaces are stripped below; "a b" must not become the name "ab".
+            if REGEX_SPLIT_TOKEN.search(expression):
+                raise ExpressionSyntaxError(
+                    expression, "Operands must be separated by an operator"
+                )
+            valid_characters = REGEX_VALID_CHARACTERS_WITH_VARIABLES
+        elif self.allow_arrays:
+            valid_characters = REGEX_VALID_CHARACTERS_WITH_ARRAYS
+        else:
+            valid_characters = REGEX_VALID_CHARACTERS
+        checked = clean
+        if self.allow_arrays:
+            # Array references are the only names the grammar accepts.
+            checked = REGEX_ARRAY_REFERENCE.sub("0", clean)
+        if not valid_characters.match(checked):
             raise ExpressionSyntaxError(
                 expression, "Expression contains invalid characters"
             )
         return clean
+
+
+def collect_variables(node) -> list[str]:
+    if isinstance(node, VariableNode):
+        return [node.name]
+    if not isinstance(node, ExpressionNode):
+        return []
+    return sorted(set(collect_variables(node.left) + collect_variables(node.right)))
@@ -0,0 +1,152 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+from celery import Signature, chord
+from celery.result import AsyncResult
+
+from app.celery import app as celery_app
+from app.config import Settings
+from app.models.models import HedgingStats
+
+logger = logging.getLogger(__name__)
+
+
+def workflow_task_ids(sig: Signature | list | tuple) -> list[str]:
+    """Collect the ids of every task in a frozen canvas."""
+    if isinstance(sig, chord):
+        return workflow_task_ids(sig.tasks) + workflow_task_ids(sig.body)
+    if isinstance(sig, (list, tuple)):
+        return [task_id for task in sig for task_id in workflow_task_ids(task)]
+    if hasattr(sig, "tasks"):
+        return workflow_task_ids(sig.tasks)
+    task_id = sig.options.get("task_id")
+    return [task_id] if task_id else []
+
+
+def _percentile(sorted_values: list[float], percentile: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(len(sorted_values) * percentile / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class LatencyTracker:
+    """Keep a window of recent workflow latencies per workflow shape."""
+
+    def __init__(self, window: int, min_samples: int):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, shape_hash: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(shape_hash)
+            if samples is None:
+                samples = self._samples[shape_hash] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def threshold(self, shape_hash: str, percentile: float) -> float | None:
+        with self._lock:
+            samples = self._samples.get(shape_hash)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            return _percentile(sorted(samples), percentile)
+
+
+class HedgedExecutor:
+    """Dispatch a duplicate of a workflow that runs past its usual latency.
+
+    Arithmetic tasks are pure, so a second copy of a slow workflow is safe to
+    run. When the first copy is still unfinished at the configured percentile
+    of the latencies observed for the same workflow shape, a copy is
+    published, whichever finishes first wins and every task of the other is
+    revoked.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        revoke: Callable[[list[str]], None] = celery_app.control.revoke,
+        publish: Callable[[Signature], AsyncResult] | None = None,
+    ):
+        self.settings = settings
+        self.revoke = revoke
+        self.publish = publish or (lambda workflow: workflow.apply_async())
+        self.tracker = LatencyTracker(
+            settings.hedge_latency_window, settings.hedge_min_samples
+        )
+        self.workflows = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies: deque[float] = deque(maxlen=settings.hedge_latency_window)
+        self._lock = threading.Lock()
+
+    def run(
+        self, shape_hash: str, new_workflow: Callable[[], Signature], timeout: float
+    ) -> Any:
+        started = time.perf_counter()
+        deadline = started + timeout
+        threshold = self.tracker.threshold(shape_hash, self.settings.hedge_percentile)
+
+        primary = self._dispatch(new_workflow())
+        winner, loser = primary, None
+        if threshold is not None and not self._wait_any([primary], started + threshold):
+            logger.info(
+                f"Workflow {primary[0].id} exceeded p{self.settings.hedge_percentile:g} "
+                f"latency of {threshold:.4f}s, dispatching a hedge"
+            )
+            backup = self._dispatch(new_workflow())
+            winner = self._wait_any([primary, backup], deadline) or primary
+            loser = backup if winner is primary else primary
+
+        try:
+            result = winner[0].get(timeout=max(deadline - time.perf_counter(), 0))
+        finally:
+            if loser is not None:
+                self.revoke(loser[1])
+
+        elapsed = time.perf_counter() - started
+        self.tracker.record(shape_hash, elapsed)
+        with self._lock:
+            self.workflows += 1
+            self._latencies.append(elapsed)
+            if loser is not None:
+                self.hedged += 1
+                self.hedge_wins += winner is not primary
+        return result
+
+    def stats(self, enabled: bool) -> HedgingStats:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            workflows, hedged, hedge_wins = self.workflows, self.hedged, self.hedge_wins
+        return HedgingStats(
+            enabled=enabled,
+            workflows=workflows,
+            hedged=hedged,
+            hedge_wins=hedge_wins,
+            hedge_rate=hedged / workflows if workflows else 0.0,
+            p50_seconds=_percentile(latencies, 50),
+            p99_seconds=_percentile(latencies, 99),
+        )
+
+    def _dispatch(self, workflow: Signature) -> tuple[AsyncResult, list[str]]:
+        # Freezing assigns the task ids up front, so the copy can be revoked.
+        workflow.freeze()
+        task_ids = workflow_task_ids(workflow)
+        return self.publish(workflow), task_ids
+
+    def _wait_any(
+        self, dispatched: list[tuple[AsyncResult, list[str]]], until: float
+    ) -> tuple[AsyncResult, list[str]] | None:
+        while True:
+            for candidate in dispatched:
+                if candidate[0].ready():
+                    return candidate
+            if time.perf_counter() >= until:
+                return None
+            time.sleep(self.settings.hedge_poll_interval)
@@ -0,0 +1,154 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from celery import Celery
+from celery.utils.nodenames import WORKER_DIRECT_EXCHANGE
+
+from app.celery import app as celery_app
+from app.models.models import RoutingStats
+
+logger = logging.getLogger(__name__)
+
+LOAD_EVENT = "worker-load"
+
+
+@dataclass
+class WorkerLoad:
+    hostname: str
+    queues: list[str]
+    backlog: int
+    concurrency: int
+    busy_seconds: float
+    seen: float
+    # Messages routed here since the report, not yet in its backlog.
+    assigned: int = 0
+    memo_hits: int = 0
+    memo_misses: int = 0
+
+    @property
+    def free_slots(self) -> int:
+        return self.concurrency - self.backlog - self.assigned
+
+    def score(self) -> tuple[float, float]:
+        # Messages waiting per pool slot, then how long the oldest running
+        # task has held its slot.
+        return (self.backlog + self.assigned) / self.concurrency, self.busy_seconds
+
+
+class LoadAwareRouter:
+    """Route tasks to the least-loaded replica's direct queue.
+
+    Workers report their backlog and the age of their oldest running task
+    with every heartbeat (``app.workers.load_reporter``); a background thread
+    follows those events. A task goes to the ``worker_direct`` queue of the
+    least-loaded replica with a free slot when at least two fresh replicas
+    consume its queue, else to the shared queue as before.
+    """
+
+    def __init__(
+        self,
+        stale_after: float,
+        app: Celery = celery_app,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.app = app
+        self.stale_after = stale_after
+        self.clock = clock
+        self.routed = 0
+        self.shared = 0
+        self._workers: dict[str, WorkerLoad] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._follow, daemon=True)
+            self._thread.start()
+
+    def update(self, event: dict) -> None:
+        load = WorkerLoad(
+            hostname=event["hostname"],
+            queues=event["queues"],
+            backlog=event["backlog"],
+            concurrency=max(event["concurrency"], 1),
+            busy_seconds=event["busy_seconds"],
+            seen=self.clock(),
+            memo_hits=event.get("memo_hits", 0),
+            memo_misses=event.get("memo_misses", 0),
+        )
+        with self._lock:
+            self._workers[load.hostname] = load
+
+    def remove(self, event: dict) -> None:
+        with self._lock:
+            self._workers.pop(event["hostname"], None)
+
+    def fresh(self, queue: str | None = None) -> list[WorkerLoad]:
+        """Replicas with a recent report, consuming ``queue`` if given."""
+        oldest = self.clock() - self.stale_after
+        with self._lock:
+            return [
+                load
+                for load in self._workers.values()
+                if load.seen >= oldest and (queue is None or queue in load.queues)
+            ]
+
+    def choose(self, queue: str) -> str | None:
+        """Hostname of the replica to send a ``queue`` message to, if any."""
+        now = self.clock()
+        with self._lock:
+            candidates = [
+                load
+                for load in self._workers.values()
+                if queue in load.queues and load.seen >= now - self.stale_after
+            ]
+            # Reports are up to a heartbeat old and say nothing about how
+            # long the next task will run, so a replica only takes direct
+            # messages for the slots it reported free. Anything more would
+            # queue up behind a task that may turn out long; it stays on the
+            # shared queue instead.
+            free = [load for load in candidates if load.free_slots > 0]
+            if len(candidates) < 2 or not free:
+                self.shared += 1
+                return None
+            target = min(free, key=WorkerLoad.score)
+            target.assigned += 1
+            self.routed += 1
+            return target.hostname
+
+    def route(self, sig, queue: str) -> None:
+        hostname = self.choose(queue)
+        if hostname is None:
+            # A cached plan may still carry the route of an earlier dispatch.
+            sig.options.pop("exchange", None)
+            sig.options.pop("routing_key", None)
+        else:
+            sig.set(exchange=WORKER_DIRECT_EXCHANGE.name, routing_key=hostname)
+
+    def stats(self, enabled: bool) -> RoutingStats:
+        workers = len(self.fresh())
+        with self._lock:
+            routed, shared = self.routed, self.shared
+        return RoutingStats(
+            enabled=enabled, workers=workers, routed=routed, shared=shared
+        )
+
+    def _follow(self) -> None:
+        while True:
+            try:
+                with self.app.connection_for_read() as connection:
+                    receiver = self.app.events.Receiver(
+                        connection,
+                        handlers={
+                            LOAD_EVENT: self.update,
+                            "worker-offline": self.remove,
+                        },
+                    )
+                    receiver.capture(limit=None, timeout=None, wakeup=False)
+            except Exception as e:
+                logger.warning(f"Lost worker load events, reconnecting: {e}")
+                time.sleep(1)
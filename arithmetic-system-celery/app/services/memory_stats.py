@@ -0,0 +1,73 @@
+from __future__ import annotations
+import logging
+
+import redis
+
+from app.models.models import TaskMemoryStats
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryStatsStore:
+    """Aggregate worker memory samples in Redis, shared by all processes.
+
+    Worker processes add per-task samples and count their own starts; the API
+    reads the totals back to report memory per task and respawns per host.
+    """
+
+    KEY_PREFIX = "arithmetic:memory:"
+
+    def __init__(self, client: redis.Redis):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> MemoryStatsStore:
+        return cls(redis.Redis.from_url(url))
+
+    def record_task(self, task_name: str, peak_bytes: int, rss_growth_kib: int) -> None:
+        with self.client.pipeline() as pipe:
+            key = self.KEY_PREFIX + "task:" + task_name
+            pipe.sadd(self.KEY_PREFIX + "tasks", task_name)
+            pipe.hincrby(key, "samples", 1)
+            pipe.hincrby(key, "peak_bytes", peak_bytes)
+            pipe.hincrby(key, "rss_growth_kib", rss_growth_kib)
+            pipe.zadd(self.KEY_PREFIX + "max_peak", {task_name: peak_bytes}, gt=True)
+            pipe.execute()
+
+    def record_process_start(self, hostname: str) -> None:
+        self.client.hincrby(self.KEY_PREFIX + "process_starts", hostname, 1)
+
+    def process_starts(self) -> dict[str, int]:
+        starts = self.client.hgetall(self.KEY_PREFIX + "process_starts")
+        return {_text(host): int(count) for host, count in starts.items()}
+
+    def task_stats(self) -> list[TaskMemoryStats]:
+        names = sorted(
+            _text(name) for name in self.client.smembers(self.KEY_PREFIX + "tasks")
+        )
+        stats = []
+        for name in names:
+            totals = {
+                _text(field): int(value)
+                for field, value in self.client.hgetall(
+                    self.KEY_PREFIX + "task:" + name
+                ).items()
+            }
+            samples = totals.get("samples", 0)
+            if not samples:
+                continue
+            max_peak = self.client.zscore(self.KEY_PREFIX + "max_peak", name) or 0
+            stats.append(
+                TaskMemoryStats(
+                    task=name,
+                    samples=samples,
+                    mean_peak_bytes=totals.get("peak_bytes", 0) / samples,
+                    max_peak_bytes=int(max_peak),
+                    mean_rss_growth_kib=totals.get("rss_growth_kib", 0) / samples,
+                )
+            )
+        return stats
+
+
+def _text(value: bytes | str) -> str:
+    return value.decode() if isinstance(value, bytes) else value
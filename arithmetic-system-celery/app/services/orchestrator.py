@@ -1,5 +1,12 @@
 import logging
+import time
+from contextlib import nullcontext
+from datetime import datetime, timezone
 
+from celery import Signature
+from celery.result import AsyncResult
+
+from app.celery import app as celery_app
 from app.workers import (
     add_task,
     subtract_task,
@@ -7,18 +14,49 @@ from app.workers import (
     divide_task,
     subtract_list_task,
     divide_list_task,
+    add_batch_task,
+    subtract_batch_task,
+    multiply_batch_task,
+    divide_batch_task,
 )
 
-from .expression_parser import ExpressionParser, OperationEnum
+from .affinity_router import AffinityRouter
+from .array_store import ArrayStore
+from .bulk_publisher import BulkPublisher
+from .circuit_breaker import DEGRADED_ERRORS, CircuitBreaker, workflow_queues
+from .claim_check import create_claim_check_store, to_result
+from .cost_model import TelemetryCostModel
+from .embedded_engine import EmbeddedEngine
+from .explain import (
+    analyze_timings,
+    chord_widths,
+    explain_workflow,
+    tasks,
+    tasks_per_queue,
+)
+from .expression_parser import ExpressionNode, ExpressionParser, OperationEnum
+from .hedging import HedgedExecutor
+from .load_router import LoadAwareRouter
+from .plan_cache import CachedPlan, PlanCache, clone_workflow
+from .single_flight import InFlightWorkflow, RedisInFlightRegistry, SingleFlight
+from .subtree_store import get_subtree_store
+from .tracing import current_span, get_tracer
 from .workflow_builder import WorkflowBuilder
-from app.models.models import CalculateExpressionResponse
-from typing import Callable
+from app.config import Settings, get_settings
+from app.models.models import (
+    CalculateExpressionResponse,
+    ExplainResponse,
+    MetricsResponse,
+)
+from app.types.errors import ServiceUnavailableError
+from typing import Any, Callable
 
 logger = logging.getLogger(__name__)
 
 
 class WorkflowOrchestrator:
-    def __init__(self):
+    def __init__(self, settings: Settings | None = None):
+        self.settings = settings or get_settings()
         self.task_map: dict[OperationEnum, Callable[..., int | float]] = {
             OperationEnum.ADD: add_task,
             OperationEnum.SUB: subtract_task,
@@ -31,14 +69,383 @@ class WorkflowOrchestrator:
             OperationEnum.DIV: divide_list_task,
         }
 
-        self.parser = ExpressionParser()
-        self.builder = WorkflowBuilder(self.task_map, self.task_map_chord)
+        self.task_map_batch: dict[OperationEnum, Callable[..., list[float]]] = {
+            OperationEnum.ADD: add_batch_task,
+            OperationEnum.SUB: subtract_batch_task,
+            OperationEnum.MUL: multiply_batch_task,
+            OperationEnum.DIV: divide_batch_task,
+        }
 
-    def calculate(self, expression: str) -> CalculateExpressionResponse:
-        parsed = self.parser.parse(expression)
-        workflow_async_result, workflow_str = self.builder.build(parsed)
-        final_result = workflow_async_result.get(timeout=3)
-        logging.info(f"Workflow String: {workflow_str}")
+        self.arrays = ArrayStore(self.settings.array_store_capacity)
+        self.parser = ExpressionParser(allow_arrays=True, array_lookup=self.arrays.get)
+        self.cost_model = TelemetryCostModel(
+            self.settings,
+            {operation: task.queue for operation, task in self.task_map.items()},
+        )
+        self.subtree_store = get_subtree_store()
+        self.publisher = BulkPublisher(self.settings.bulk_publish)
+        self.router = LoadAwareRouter(self.settings.worker_load_stale_seconds)
+        # Routing targets direct queues, which embedded and eager runs lack.
+        direct_queues = (
+            self.settings.execution_mode != "embedded"
+            and not celery_app.conf.task_always_eager
+        )
+        self.load_aware_routing = self.settings.load_aware_routing and direct_queues
+        self.affinity_routing = self.settings.affinity_routing and direct_queues
+        self.affinity = AffinityRouter(
+            self.router,
+            self.settings.affinity_virtual_nodes,
+            self.settings.task_memo_max_key_bytes,
+            fallback=self.router if self.load_aware_routing else None,
+        )
+        if self.load_aware_routing or self.affinity_routing:
+            self.router.start()
+        self.builder = WorkflowBuilder(
+            self.task_map,
+            self.task_map_chord,
+            reduction_fan_in=self.settings.reduction_fan_in,
+            task_batch_map=self.task_map_batch,
+            leaf_batch_size=self.settings.leaf_batch_size,
+            planner=self.cost_model if self.settings.adaptive_planner else None,
+            subtree_store=self.subtree_store if self.settings.subtree_reuse else None,
+            array_chunk_size=self.settings.array_chunk_size,
+            publisher=self.publisher,
+            router=(
+                self.affinity
+                if self.affinity_routing
+                else self.router
+                if self.load_aware_routing
+                else None
+            ),
+        )
+        self.plan_cache = PlanCache(self.settings.plan_cache_size)
+        self.single_flight: SingleFlight[
+            tuple[CalculateExpressionResponse, CachedPlan | None]
+        ] = SingleFlight()
+        self.embedded_engine = (
+            EmbeddedEngine(subtree_store=self.builder.subtree_store)
+            if self.settings.execution_mode == "embedded"
+            else None
+        )
+        self.in_flight_registry = (
+            RedisInFlightRegistry.from_url(
+                self.settings.single_flight_redis_url, self.settings.result_timeout
+            )
+            if self.settings.single_flight_redis_url and self.embedded_engine is None
+            else None
+        )
+        # Co-located in embedded mode, plans never go through a broker.
+        self.claim_check = (
+            create_claim_check_store(self.settings)
+            if self.embedded_engine is None
+            else None
+        )
+        # A revoked losing copy would fail replicas waiting on its task id,
+        # so hedging is not combined with cross-replica coalescing.
+        self.hedger = HedgedExecutor(self.settings, publish=self.builder.dispatch)
+        self.hedging = self.settings.hedge_enabled and self.in_flight_registry is None
+        self.tracer = get_tracer()
+        # Guards the workers; embedded mode has none to guard.
+        self.breaker = CircuitBreaker(self.settings)
+        self.breaker_enabled = (
+            self.settings.breaker_enabled and self.embedded_engine is None
+        )
+        self.local_engine = EmbeddedEngine()
+
+    def calculate(
+        self, expression: str, describe: bool = False
+    ) -> CalculateExpressionResponse:
+        key = self.parser.clean(expression)
+        with self._span("calculate", expression=expression) as span:
+            response, plan = self.single_flight.do(
+                key, lambda: self._calculate(key, expression)
+            )
+        if span is not None:
+            response = response.model_copy(update={"trace_id": span.trace_id})
+        # Rendering the full workflow is opt-in: for wide chords the string
+        # can outweigh the computation itself.
+        if describe:
+            if plan is None:
+                # Joined another replica's workflow; describe the plan this
+                # replica makes for the expression.
+                plan = self._plan(key, expression)
+            return response.model_copy(update={"workflow": self._describe(plan)})
+        return response
+
+    def explain(self, expression: str, analyze: bool = False) -> ExplainResponse:
+        """What the builder plans for an expression, and with ``analyze``
+        how the plan ran: it is executed, and every node gets timings."""
+        started = time.perf_counter()
+        tree = self.parser.parse(expression)
+        workflow = self.builder.plan(tree)
+        plan_seconds = time.perf_counter() - started
+        summary = self.builder.summarize(workflow)
+
+        plan = None
+        if isinstance(workflow, Signature):
+            # Task ids are assigned up front so timings can be matched to
+            # nodes after the run.
+            workflow.freeze()
+            plan = explain_workflow(workflow)
+        analyzed = {}
+        if analyze:
+            dispatched_at = datetime.now(timezone.utc)
+            started = time.perf_counter()
+            if self.embedded_engine is not None:
+                # Embedded runs have no task results to take timings from.
+                result = self.embedded_engine.execute(workflow)
+            else:
+                result = self._resolve(
+                    self.builder.dispatch(self._offload(workflow)).get(
+                        timeout=self.settings.result_timeout
+                    )
+                )
+                if plan is not None:
+                    analyze_timings(plan, self._finished_at, dispatched_at)
+            analyzed = dict(
+                analyzed=True,
+                result=result,
+                execution_ms=(time.perf_counter() - started) * 1000,
+            )
+
+        return ExplainResponse(
+            expression=expression,
+            operations=getattr(tree, "operation_count", 0),
+            summary=summary,
+            tasks_per_queue=tasks_per_queue(plan) if plan else {},
+            chord_widths=chord_widths(plan) if plan else [],
+            critical_path_depth=summary.depth,
+            estimated_messages=summary.tasks,
+            estimated_bytes=sum(task.body_bytes for task in tasks(plan)) if plan else 0,
+            plan_seconds=plan_seconds,
+            plan=plan,
+            **analyzed,
+        )
+
+    def submit(self, expression: str) -> AsyncResult | float | int | list[float]:
+        """Plan and publish an expression without waiting for its value.
+
+        For bulk runs that keep many expressions in flight: the plan cache
+        and single-flight are skipped, as bulk inputs rarely repeat. Pass
+        the returned handle to ``result``.
+        """
+        workflow = self.builder.plan(self.parser.parse(expression))
+        if self.embedded_engine is not None:
+            return self.embedded_engine.execute(workflow)
+        if not isinstance(workflow, Signature):
+            return workflow
+        return self.builder.dispatch(self._offload(workflow))
+
+    def result(
+        self,
+        pending: AsyncResult | float | int | list[float],
+        timeout: float | None = None,
+    ) -> float | int | list[float]:
+        if not isinstance(pending, AsyncResult):
+            return pending
+        return self._resolve(
+            pending.get(timeout=timeout or self.settings.result_timeout)
+        )
+
+    def metrics(self) -> MetricsResponse:
+        return MetricsResponse(
+            plan_cache=self.plan_cache.stats(),
+            single_flight=self.single_flight.stats(),
+            planner=self.cost_model.stats(self.settings.adaptive_planner),
+            hedging=self.hedger.stats(self.hedging),
+            subtree_reuse=self.subtree_store.stats(self.settings.subtree_reuse),
+            publishing=self.publisher.stats(),
+            routing=self.router.stats(self.load_aware_routing),
+            circuit_breaker=self.breaker.stats(self.breaker_enabled),
+            affinity=self.affinity.stats(self.affinity_routing),
+        )
+
+    def _calculate(
+        self, key: str, expression: str
+    ) -> tuple[CalculateExpressionResponse, CachedPlan | None]:
+        if self.in_flight_registry is not None:
+            in_flight = self.in_flight_registry.lookup(key)
+            if in_flight is not None:
+                self.single_flight.joined_remotely()
+                logger.info(f"Joining workflow {in_flight.task_id} of another replica")
+                final_result = self._resolve(
+                    AsyncResult(in_flight.task_id, app=celery_app).get(
+                        timeout=self.settings.result_timeout
+                    )
+                )
+                response = CalculateExpressionResponse(
+                    result=final_result, summary=in_flight.summary
+                )
+                return response, None
+
+        with self._span("plan"):
+            plan = self._plan(key, expression)
+        with self._span("execute"):
+            return self._execute(key, plan)
+
+    def _execute(
+        self, key: str, plan: CachedPlan
+    ) -> tuple[CalculateExpressionResponse, CachedPlan | None]:
+        decision = (
+            self.cost_model.predict(plan.tree)
+            if self.builder.planner is not None
+            and isinstance(plan.tree, ExpressionNode)
+            else None
+        )
+
+        self.plan_cache.record_dispatch(plan)
+        started = time.perf_counter()
+        if self.embedded_engine is not None:
+            final_result = self.embedded_engine.execute(plan.workflow)
+            self.cost_model.observe(decision, time.perf_counter() - started)
+            response = CalculateExpressionResponse(
+                result=final_result, summary=plan.summary
+            )
+            return response, plan
+
+        if self.breaker_enabled and isinstance(plan.workflow, Signature):
+            final_result, evaluated_locally = self._run_guarded(key, plan, started)
+        else:
+            final_result, _ = self._run_distributed(key, plan, started)
+            evaluated_locally = False
+        if not evaluated_locally:
+            self.cost_model.observe(decision, time.perf_counter() - started)
+
+        logger.info(f"Workflow Summary: {plan.summary}")
         logger.info(f"Final Result: {final_result}")
 
-        return CalculateExpressionResponse(result=final_result, workflow=workflow_str)
+        response = CalculateExpressionResponse(
+            result=final_result,
+            summary=plan.summary,
+            evaluated_locally=evaluated_locally or None,
+        )
+        return response, plan
+
+    def _run_distributed(
+        self, key: str, plan: CachedPlan, started: float
+    ) -> tuple[Any, float | None]:
+        """The workflow's result and, unless hedged, its publish time."""
+        if self.hedging and isinstance(plan.workflow, Signature):
+            final_result = self.hedger.run(
+                plan.summary.shape_hash,
+                lambda: self._offload(clone_workflow(plan.workflow)),
+                self.settings.result_timeout,
+            )
+            return self._resolve(final_result), None
+
+        publish_seconds = None
+        workflow_async_result = self.builder.dispatch(self._offload(plan.workflow))
+        if isinstance(plan.workflow, Signature):
+            publish_seconds = time.perf_counter() - started
+            self.cost_model.observe_publish(publish_seconds)
+            span = current_span()
+            if span is not None:
+                span.attributes["publish_seconds"] = publish_seconds
+
+        shared = None
+        if self.in_flight_registry is not None and isinstance(plan.workflow, Signature):
+            shared = InFlightWorkflow(workflow_async_result.id, plan.summary)
+            self.in_flight_registry.claim(key, shared)
+
+        try:
+            final_result = self._resolve(
+                workflow_async_result.get(timeout=self.settings.result_timeout)
+            )
+        finally:
+            if shared is not None:
+                self.in_flight_registry.release(key, shared)
+        return final_result, publish_seconds
+
+    def _run_guarded(
+        self, key: str, plan: CachedPlan, started: float
+    ) -> tuple[Any, bool]:
+        """Run through the workers unless the breaker is open or the run
+        fails for lack of them; the flag says the result was computed here."""
+        if self.breaker.allow(workflow_queues(plan.workflow)):
+            try:
+                final_result, publish_seconds = self._run_distributed(
+                    key, plan, started
+                )
+            except DEGRADED_ERRORS as e:
+                self.breaker.record_failure(f"{type(e).__name__}: {e}")
+                logger.warning(f"Workflow failed to run on the workers: {e!r}")
+            except Exception:
+                self.breaker.record_reachable()
+                raise
+            else:
+                self.breaker.record_success(
+                    publish_seconds, time.perf_counter() - started
+                )
+                return final_result, False
+
+        operations = getattr(plan.tree, "operation_count", 0)
+        limit = self.settings.breaker_fallback_max_operations
+        if operations > limit:
+            self.breaker.record_fallback(evaluated=False)
+            raise ServiceUnavailableError(
+                f"Workers are unavailable and the expression has {operations} "
+                f"operations, more than the {limit} evaluated locally"
+            )
+        self.breaker.record_fallback(evaluated=True)
+        with self._span("evaluate_locally", operations=operations):
+            # Dispatching may have swapped operands for claim-check
+            # references, so the tree is planned again.
+            return self.local_engine.execute(self.builder.plan(plan.tree)), True
+
+    def _finished_at(self, task_id: str) -> datetime | None:
+        done = AsyncResult(task_id, app=celery_app).date_done
+        if isinstance(done, str):
+            done = datetime.fromisoformat(done)
+        if done is not None and done.tzinfo is None:
+            done = done.replace(tzinfo=timezone.utc)
+        return done
+
+    def _span(self, name: str, **attributes):
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(name, **attributes)
+
+    def _offload(self, workflow: Signature | float | int) -> Signature | float | int:
+        if self.claim_check is not None and isinstance(workflow, Signature):
+            self.claim_check.offload_workflow(workflow)
+        return workflow
+
+    def _resolve(self, result):
+        if self.claim_check is None:
+            return result
+        return to_result(self.claim_check.resolve(result))
+
+    def _describe(self, plan: CachedPlan) -> str:
+        description = self.builder.describe(plan.workflow)
+        limit = self.settings.workflow_description_max_chars
+        if len(description) > limit:
+            return description[:limit] + "..."
+        return description
+
+    def _plan(self, key: str, expression: str) -> CachedPlan:
+        cached = self.plan_cache.get(key)
+        replan = (
+            self.builder.planner is not None or self.builder.subtree_store is not None
+        )
+        if cached is not None and not replan:
+            return cached
+        if cached is not None:
+            # Telemetry and known subtree values move between requests, so
+            # only the parse is reused.
+            workflow = self.builder.plan(cached.tree)
+            cached.workflow = workflow
+            cached.summary = self.builder.summarize(workflow)
+            cached.reused = False
+            cached.replanned = True
+            return cached
+
+        started = time.perf_counter()
+        parsed = self.parser.parse(expression)
+        workflow = self.builder.plan(parsed)
+        plan = CachedPlan(
+            tree=parsed,
+            workflow=workflow,
+            summary=self.builder.summarize(workflow),
+            plan_seconds=time.perf_counter() - started,
+        )
+        return self.plan_cache.put(key, plan)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+import json
+import logging
+import threading
+from dataclasses import dataclass, replace
+
+from celery import Signature
+from celery.canvas import signature
+
+from app.models.models import PlanCacheStats, WorkflowSummary
+from .expression_parser import ExpressionNode
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedPlan:
+    tree: ExpressionNode | float | int
+    workflow: Signature | float | int
+    summary: WorkflowSummary
+    plan_seconds: float
+    # Whether the workflow is the cached canvas, not planned for this
+    # request, or was planned again from the cached parse.
+    reused: bool = False
+    replanned: bool = False
+
+
+def clone_workflow(workflow: Signature | float | int) -> Signature | float | int:
+    """Return an independent copy of a planned canvas.
+
+    Celery freezes task ids into a canvas when it is applied, so a cached
+    template is never dispatched itself; every dispatch gets a copy rebuilt
+    from the canvas' wire format, which will be assigned fresh task ids.
+    """
+    if not isinstance(workflow, Signature):
+        return workflow
+    return signature(json.loads(json.dumps(workflow)), app=workflow.app)
+
+
+class PlanCache:
+    """Plans by cleaned expression. Lookups are counted when the plan is
+    dispatched (``record_dispatch``): a hit is a cached canvas that ran as
+    is, a replanned hit only reused the parse, and a miss planned from
+    scratch. Plans looked up but never dispatched are not counted."""
+
+    def __init__(self, capacity: int):
+        self._plans: LRUCache[str, CachedPlan] = LRUCache(capacity)
+        self.hits = 0
+        self.replanned = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedPlan | None:
+        plan = self._plans.get(key)
+        if plan is None:
+            return None
+        logger.info(f"Plan cache hit for expression: {key}")
+        return replace(plan, workflow=clone_workflow(plan.workflow), reused=True)
+
+    def record_dispatch(self, plan: CachedPlan) -> None:
+        with self._lock:
+            if plan.reused:
+                self.hits += 1
+                self.saved_seconds += plan.plan_seconds
+            elif plan.replanned:
+                self.replanned += 1
+            else:
+                self.misses += 1
+
+    def put(self, key: str, plan: CachedPlan) -> CachedPlan:
+        self._plans.put(key, replace(plan, workflow=clone_workflow(plan.workflow)))
+        return plan
+
+    def clear(self) -> None:
+        self._plans.clear()
+
+    def stats(self) -> PlanCacheStats:
+        with self._lock:
+            hits, replanned, misses = self.hits, self.replanned, self.misses
+            saved_seconds = self.saved_seconds
+        dispatched = hits + replanned + misses
+        return PlanCacheStats(
+            size=len(self._plans),
+            capacity=self._plans.capacity,
+            hits=hits,
+            replanned=replanned,
+            misses=misses,
+            evictions=self._plans.evictions,
+            hit_rate=hits / dispatched if dispatched else 0.0,
+            saved_seconds=saved_seconds,
+        )
@@ -0,0 +1,121 @@
+from __future__ import annotations
+import hashlib
+import logging
+from dataclasses import dataclass
+
+from celery import chord, group
+
+from app.config import Settings, get_settings
+from app.types.errors import PreparedExpressionNotFoundError, VariableBindingError
+from app.workers import concat_task, evaluate_columns_task
+from .claim_check import create_claim_check_store, to_result
+from .expression_parser import ExpressionNode, ExpressionParser, collect_variables
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PreparedExpression:
+    id: str
+    expression: str
+    variables: list[str]
+    tree: ExpressionNode | float | int
+
+
+@dataclass
+class PreparedEvaluation:
+    result: list[float]
+    rows: int
+    chunks: int
+
+
+class PreparedExpressionService:
+    def __init__(self, settings: Settings | None = None):
+        self.settings = settings or get_settings()
+        self.parser = ExpressionParser(allow_variables=True)
+        self.claim_check = create_claim_check_store(self.settings)
+        self._prepared: LRUCache[str, PreparedExpression] = LRUCache(
+            self.settings.prepared_expression_capacity
+        )
+
+    def register(self, expression: str) -> PreparedExpression:
+        clean_expr = self.parser.clean(expression)
+        tree = self.parser.parse(expression)
+        # Content-addressed ids are the same on every API replica, but each
+        # keeps its own registry: a formula must be registered with the
+        # replica it is evaluated on.
+        prepared_id = hashlib.sha256(clean_expr.encode()).hexdigest()[:16]
+        prepared = PreparedExpression(
+            id=prepared_id,
+            expression=clean_expr,
+            variables=collect_variables(tree),
+            tree=tree,
+        )
+        self._prepared.put(prepared_id, prepared)
+        logger.info(f"Prepared expression {prepared_id}: {clean_expr}")
+        return prepared
+
+    def get(self, prepared_id: str) -> PreparedExpression:
+        prepared = self._prepared.get(prepared_id)
+        if prepared is None:
+            raise PreparedExpressionNotFoundError(prepared_id)
+        return prepared
+
+    def evaluate(
+        self, prepared_id: str, bindings: dict[str, list[float]]
+    ) -> PreparedEvaluation:
+        prepared = self.get(prepared_id)
+        rows = self._validate_bindings(prepared, bindings)
+        chunk_size = self.settings.prepared_chunk_size
+        claim_check = self.claim_check
+        offload = claim_check.offload if claim_check is not None else lambda v: v
+
+        chunk_tasks = [
+            evaluate_columns_task.s(
+                prepared.expression,
+                {
+                    name: offload(bindings[name][start : start + chunk_size])
+                    for name in prepared.variables
+                },
+                min(chunk_size, rows - start),
+            )
+            for start in range(0, max(rows, 1), chunk_size)
+        ]
+
+        if len(chunk_tasks) == 1:
+            workflow = chunk_tasks[0]
+        else:
+            workflow = chord(group(chunk_tasks), concat_task.s())
+
+        logger.info(
+            f"Evaluating prepared expression {prepared_id} over {rows} rows "
+            f"in {len(chunk_tasks)} chunks"
+        )
+        result = workflow.apply_async().get(
+            timeout=self.settings.prepared_result_timeout
+        )
+        if claim_check is not None:
+            result = to_result(claim_check.resolve(result))
+        return PreparedEvaluation(result=result, rows=rows, chunks=len(chunk_tasks))
+
+    def _validate_bindings(
+        self, prepared: PreparedExpression, bindings: dict[str, list[float]]
+    ) -> int:
+        missing = [name for name in prepared.variables if name not in bindings]
+        if missing:
+            raise VariableBindingError(
+                f"Missing bindings for variables: {', '.join(missing)}"
+            )
+
+        unknown = sorted(set(bindings) - set(prepared.variables))
+        if unknown:
+            raise VariableBindingError(
+                f"Bindings for unknown variables: {', '.join(unknown)}"
+            )
+
+        lengths = {len(bindings[name]) for name in prepared.variables}
+        if len(lengths) > 1:
+            raise VariableBindingError("All binding columns must have the same length")
+
+        return lengths.pop() if lengths else 1
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import cProfile
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from enum import Enum
+from functools import lru_cache
+from typing import Iterator
+
+from app.config import get_settings
+from app.models.models import ProfileInfo
+from app.types.errors import ProfileNotFoundError
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME = re.compile(r"^(\d+)-(request|task)-([\w.-]+)\.(pstats|folded)$")
+
+
+class ProfileMode(str, Enum):
+    CPROFILE = "cprofile"
+    SAMPLE = "sample"
+
+
+class StackSampler:
+    """Sample one thread's stack at a fixed interval.
+
+    Stacks are kept in the collapsed format flamegraph.pl and speedscope
+    read: frames from the root down joined by ``;``, then a sample count.
+    """
+
+    def __init__(self, interval_seconds: float, thread_id: int | None = None):
+        self.interval = interval_seconds
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+
+class ProfileStore:
+    """Capture profiles into a local directory and serve them back.
+
+    cProfile output is written as ``.pstats`` (open with ``pstats`` or
+    snakeviz); sampled stacks as ``.folded`` for flame graphs.
+    """
+
+    def __init__(self, directory: str, sample_interval_ms: float = 1.0):
+        self.directory = directory
+        self.sample_interval = sample_interval_ms / 1000
+        os.makedirs(directory, exist_ok=True)
+
+    @contextmanager
+    def profile(self, kind: str, name: str, mode: ProfileMode) -> Iterator[list[str]]:
+        """Profile the block; the yielded list receives the file name."""
+        captured: list[str] = []
+        if mode == ProfileMode.SAMPLE:
+            sampler = StackSampler(self.sample_interval)
+            sampler.start()
+            try:
+                yield captured
+            finally:
+                sampler.stop()
+                captured.append(self._write(kind, name, "folded", sampler.folded()))
+            return
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Only one cProfile may run at a time, e.g. when a task runs
+            # eagerly inside a profiled request.
+            logger.warning(f"Skipping profile of {name}: a profiler is already active")
+            yield captured
+            return
+        try:
+            yield captured
+        finally:
+            profiler.disable()
+            path = self._path(kind, name, "pstats")
+            profiler.dump_stats(path)
+            captured.append(os.path.basename(path))
+
+    def list(self) -> list[ProfileInfo]:
+        profiles = []
+        for filename in sorted(os.listdir(self.directory), reverse=True):
+            match = PROFILE_NAME.match(filename)
+            if match is None:
+                continue
+            created_ns, kind, name, extension = match.groups()
+            profiles.append(
+                ProfileInfo(
+                    name=filename,
+                    kind=kind,
+                    target=name,
+                    mode=(
+                        ProfileMode.SAMPLE
+                        if extension == "folded"
+                        else ProfileMode.CPROFILE
+                    ).value,
+                    size_bytes=os.path.getsize(os.path.join(self.directory, filename)),
+                    created_at=int(created_ns) / 1e9,
+                )
+            )
+        return profiles
+
+    def path(self, filename: str) -> str:
+        # Only names this store wrote, which also rules out path traversal.
+        path = os.path.join(self.directory, filename)
+        if PROFILE_NAME.match(filename) is None or not os.path.isfile(path):
+            raise ProfileNotFoundError(filename)
+        return path
+
+    def _path(self, kind: str, name: str, extension: str) -> str:
+        name = re.sub(r"[^\w.-]", "_", name)
+        return os.path.join(
+            self.directory, f"{time.time_ns()}-{kind}-{name}.{extension}"
+        )
+
+    def _write(self, kind: str, name: str, extension: str, content: str) -> str:
+        path = self._path(kind, name, extension)
+        with open(path, "w") as f:
+            f.write(content)
+        return os.path.basename(path)
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore | None:
+    settings = get_settings()
+    if not settings.profile_dir:
+        return None
+    return ProfileStore(settings.profile_dir, settings.profile_sample_interval_ms)
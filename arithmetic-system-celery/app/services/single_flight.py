@@ -0,0 +1,134 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Generic, TypeVar
+
+import redis
+
+from app.models.models import SingleFlightStats, WorkflowSummary
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    done: threading.Event = field(default_factory=threading.Event)
+    result: T | None = None
+    error: BaseException | None = None
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one call per key at a time inside this process.
+
+    Callers that arrive while a call for the same key is running wait for it
+    and share its result (or its exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self.leaders = 0
+        self.followers = 0
+        self.remote_followers = 0
+        self._calls: dict[str, _Call[T]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if not is_leader:
+            logger.info(f"Coalescing request for in-flight expression: {key}")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def joined_remotely(self) -> None:
+        """Count the running leader as a follower of another replica's
+        workflow, which it joined instead of dispatching its own."""
+        with self._lock:
+            self.leaders -= 1
+            self.remote_followers += 1
+
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            leaders, followers = self.leaders, self.followers
+            remote_followers = self.remote_followers
+        total = leaders + followers + remote_followers
+        coalesced = followers + remote_followers
+        return SingleFlightStats(
+            leaders=leaders,
+            followers=followers,
+            remote_followers=remote_followers,
+            coalescing_rate=coalesced / total if total else 0.0,
+        )
+
+
+@dataclass
+class InFlightWorkflow:
+    task_id: str
+    summary: WorkflowSummary
+
+
+class RedisInFlightRegistry:
+    """Share in-flight workflows between API replicas through Redis keys.
+
+    The first replica to dispatch an expression records the id of the
+    workflow's final task; other replicas wait on that result instead of
+    dispatching the same workflow again.
+    """
+
+    KEY_PREFIX = "arithmetic:inflight:"
+
+    def __init__(self, client: redis.Redis, ttl_seconds: float):
+        self.client = client
+        self.ttl_ms = int(ttl_seconds * 1000)
+
+    @classmethod
+    def from_url(cls, url: str, ttl_seconds: float) -> RedisInFlightRegistry:
+        return cls(redis.Redis.from_url(url), ttl_seconds)
+
+    def lookup(self, key: str) -> InFlightWorkflow | None:
+        value = self.client.get(self._key(key))
+        if value is None:
+            return None
+        data = json.loads(value)
+        return InFlightWorkflow(
+            data["task_id"], WorkflowSummary.model_validate(data["summary"])
+        )
+
+    def claim(self, key: str, in_flight: InFlightWorkflow) -> bool:
+        value = json.dumps(
+            {"task_id": in_flight.task_id, "summary": in_flight.summary.model_dump()}
+        )
+        return bool(self.client.set(self._key(key), value, nx=True, px=self.ttl_ms))
+
+    def release(self, key: str, in_flight: InFlightWorkflow) -> None:
+        redis_key = self._key(key)
+        value = self.client.get(redis_key)
+        if value is not None and json.loads(value)["task_id"] == in_flight.task_id:
+            self.client.delete(redis_key)
+
+    def _key(self, key: str) -> str:
+        return self.KEY_PREFIX + hashlib.sha256(key.encode()).hexdigest()
@@ -0,0 +1,146 @@
+from __future__ import annotations
+import json
+import logging
+import threading
+from functools import lru_cache
+
+import redis
+
+from app.config import get_settings
+from app.models.models import SubtreeReuseStats
+from .expression_parser import ExpressionNode
+from .lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Message header listing the content hashes of the subtrees a task's result
+# is the value of.
+SUBTREE_HASHES_HEADER = "subtree_hashes"
+
+
+class SubtreeResultStore:
+    """Values of evaluated subtrees, keyed by ``ExpressionNode.content_hash``.
+
+    Held in a bounded in-process LRU; ``RedisSubtreeResultStore`` shares them
+    between API replicas and workers. Reuse counters are per process.
+    """
+
+    def __init__(self, capacity: int):
+        self._values: LRUCache[str, int | float] = LRUCache(capacity)
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.reused = 0
+        self.operations = 0
+        self.saved_operations = 0
+
+    def get_many(self, hashes: list[str]) -> dict[str, int | float]:
+        known = {}
+        for subtree_hash in hashes:
+            value = self._values.get(subtree_hash)
+            if value is not None:
+                known[subtree_hash] = value
+        return known
+
+    def put_many(self, values: dict[str, int | float]) -> None:
+        for subtree_hash, value in values.items():
+            self._values.put(subtree_hash, value)
+
+    def known_subtrees(self, node: ExpressionNode) -> dict[str, int | float]:
+        """Look up every subtree of ``node`` and count what the plan saves."""
+        subtrees = _subtree_hashes(node)
+        known = self.get_many(list(subtrees)) if subtrees else {}
+        with self._lock:
+            self.lookups += len(subtrees)
+            self.reused += len(known)
+            self.operations += node.operation_count
+            self.saved_operations += _saved_operations(node, known)
+        return known
+
+    def clear(self) -> None:
+        self._values.clear()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def stats(self, enabled: bool) -> SubtreeReuseStats:
+        return SubtreeReuseStats(
+            enabled=enabled,
+            size=len(self),
+            lookups=self.lookups,
+            reused=self.reused,
+            reuse_ratio=self.reused / self.lookups if self.lookups else 0.0,
+            operations=self.operations,
+            saved_operations=self.saved_operations,
+            dispatch_savings=(
+                self.saved_operations / self.operations if self.operations else 0.0
+            ),
+        )
+
+
+class RedisSubtreeResultStore(SubtreeResultStore):
+    """Subtree values in Redis, each expiring ``ttl_seconds`` after it was
+    last computed."""
+
+    KEY_PREFIX = "arithmetic:subtree:"
+
+    def __init__(self, client: redis.Redis, ttl_seconds: float):
+        super().__init__(capacity=0)
+        self.client = client
+        self.ttl_ms = int(ttl_seconds * 1000)
+
+    @classmethod
+    def from_url(cls, url: str, ttl_seconds: float) -> RedisSubtreeResultStore:
+        return cls(redis.Redis.from_url(url), ttl_seconds)
+
+    def get_many(self, hashes: list[str]) -> dict[str, int | float]:
+        values = self.client.mget([self.KEY_PREFIX + h for h in hashes])
+        return {
+            subtree_hash: json.loads(value)
+            for subtree_hash, value in zip(hashes, values)
+            if value is not None
+        }
+
+    def put_many(self, values: dict[str, int | float]) -> None:
+        with self.client.pipeline() as pipe:
+            for subtree_hash, value in values.items():
+                pipe.set(
+                    self.KEY_PREFIX + subtree_hash, json.dumps(value), px=self.ttl_ms
+                )
+            pipe.execute()
+
+    def __len__(self) -> int:
+        # The shared store is bounded by its TTL; this process holds nothing.
+        return 0
+
+
+@lru_cache
+def get_subtree_store() -> SubtreeResultStore:
+    """The process-wide store; workers write to the one the API reads."""
+    settings = get_settings()
+    if settings.subtree_store_redis_url:
+        return RedisSubtreeResultStore.from_url(
+            settings.subtree_store_redis_url, settings.subtree_store_ttl_seconds
+        )
+    return SubtreeResultStore(settings.subtree_store_size)
+
+
+def _subtree_hashes(node: ExpressionNode) -> dict[str, None]:
+    hashes: dict[str, None] = {}
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        hashes[current.content_hash] = None
+        stack.extend(
+            child
+            for child in (current.left, current.right)
+            if isinstance(child, ExpressionNode)
+        )
+    return hashes
+
+
+def _saved_operations(node, known: dict[str, int | float]) -> int:
+    if not isinstance(node, ExpressionNode):
+        return 0
+    if node.content_hash in known:
+        return node.operation_count
+    return _saved_operations(node.left, known) + _saved_operations(node.right, known)
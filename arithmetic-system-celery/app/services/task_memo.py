@@ -0,0 +1,114 @@
+from __future__ import annotations
+import hashlib
+import multiprocessing
+import struct
+from functools import lru_cache
+from typing import Any
+
+import orjson
+
+from app.config import get_settings
+
+
+def memo_key(name: str, args: tuple, kwargs: dict, max_bytes: int) -> bytes | None:
+    """The serialized call, or None when its arguments are too large to be
+    worth remembering or are not plain JSON (e.g. claim-checked arrays).
+
+    Serializing keeps 1 and 1.0 apart and is stable across processes, so the
+    API can hash the same key to route the call.
+    """
+    try:
+        key = orjson.dumps([name, args, kwargs])
+    except TypeError:
+        return None
+    return key if len(key) <= max_bytes else None
+
+
+class TaskMemo:
+    """Results of pure tasks, shared by the pool of one worker replica.
+
+    Affinity routing picks a replica, not a pool child, so the memo lives in
+    shared memory created before the pool forks: ``capacity`` slots, each a
+    call of at most ``max_key_bytes`` and its result of at most
+    ``max_result_bytes`` serialized. A call maps to one slot by its hash and
+    replaces whatever was remembered there. Slots are guarded by a set of
+    locks shared the same way, and so are the hit and miss counters, which
+    the worker's main process reports for the whole replica.
+    """
+
+    HEADER = struct.Struct("<QII")
+    LOCKS = 64
+
+    def __init__(self, capacity: int, max_key_bytes: int, max_result_bytes: int):
+        self.capacity = capacity
+        self.max_key_bytes = max_key_bytes
+        self.max_result_bytes = max_result_bytes
+        self._slot_bytes = self.HEADER.size + max_key_bytes + max_result_bytes
+        self._slots = memoryview(
+            multiprocessing.RawArray("B", capacity * self._slot_bytes)
+        ).cast("B")
+        self._locks = [multiprocessing.Lock() for _ in range(min(capacity, self.LOCKS))]
+        self._hits = multiprocessing.Value("q", 0)
+        self._misses = multiprocessing.Value("q", 0)
+
+    def key(self, name: str, args: tuple, kwargs: dict) -> bytes | None:
+        return memo_key(name, args, kwargs, self.max_key_bytes)
+
+    def get(self, key: bytes) -> Any | None:
+        digest, slot = self._slot(key)
+        start = slot * self._slot_bytes
+        with self._locks[slot % len(self._locks)]:
+            stored, key_size, result_size = self.HEADER.unpack_from(self._slots, start)
+            start += self.HEADER.size
+            found = (
+                stored == digest
+                and key_size == len(key)
+                and self._slots[start : start + key_size] == key
+            )
+            if found:
+                start += key_size
+                result = bytes(self._slots[start : start + result_size])
+        counter = self._hits if found else self._misses
+        with counter.get_lock():
+            counter.value += 1
+        return orjson.loads(result) if found else None
+
+    def put(self, key: bytes, result: Any) -> None:
+        try:
+            value = orjson.dumps(result)
+        except TypeError:
+            return
+        if len(value) > self.max_result_bytes:
+            return
+        digest, slot = self._slot(key)
+        start = slot * self._slot_bytes
+        with self._locks[slot % len(self._locks)]:
+            self.HEADER.pack_into(self._slots, start, digest, len(key), len(value))
+            start += self.HEADER.size
+            self._slots[start : start + len(key)] = key
+            start += len(key)
+            self._slots[start : start + len(value)] = value
+
+    def _slot(self, key: bytes) -> tuple[int, int]:
+        digest = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+        return digest, digest % self.capacity
+
+    @property
+    def hits(self) -> int:
+        return self._hits.value
+
+    @property
+    def misses(self) -> int:
+        return self._misses.value
+
+
+@lru_cache
+def get_task_memo() -> TaskMemo | None:
+    settings = get_settings()
+    if settings.task_memo_size <= 0:
+        return None
+    return TaskMemo(
+        settings.task_memo_size,
+        settings.task_memo_max_key_bytes,
+        settings.task_memo_max_result_bytes,
+    )
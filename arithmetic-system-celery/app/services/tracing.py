@@ -0,0 +1,260 @@
+"""Trace workflows from the API through every task that computes them.
+
+Spans of the API process (planning, then publishing and waiting for the
+result) and of each task share a trace id. The trace context travels in a task message
+header stamped at publish time; a task's span starts when its message was
+published, so its ``queue_wait_seconds`` and ``execution_seconds`` add up to
+its duration. Queue wait compares clocks of two hosts and is only as exact
+as their clock sync.
+
+Show the critical path of traces written to a file:
+
+Usage: python -m app.services.tracing traces.jsonl [--trace TRACE_ID]
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Any, Iterator
+
+from celery.signals import before_task_publish
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TRACE_HEADER = "trace_context"
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start: float
+    end: float | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end or self.start) - self.start
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class InMemorySpanExporter:
+    """In-process collector keeping the spans of the most recent traces."""
+
+    def __init__(self, max_traces: int):
+        self.max_traces = max_traces
+        self._traces: OrderedDict[str, list[Span]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(span)
+
+    def spans(self, trace_id: str) -> list[Span]:
+        with self._lock:
+            return list(self._traces.get(trace_id, ()))
+
+    def trace_ids(self) -> list[str]:
+        with self._lock:
+            return list(reversed(self._traces))
+
+
+class FileSpanExporter:
+    """Append spans to a JSON lines file; API and worker processes on the
+    same host can share one file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(asdict(span), default=str) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+
+
+class Tracer:
+    def __init__(self, exporter: InMemorySpanExporter | FileSpanExporter):
+        self.exporter = exporter
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """A child of the current span, or the root of a new trace."""
+        parent = _current_span.get()
+        span = Span(
+            trace_id=parent.trace_id if parent else _new_id(16),
+            span_id=_new_id(8),
+            parent_id=parent.span_id if parent else None,
+            name=name,
+            start=time.time(),
+            attributes=attributes,
+        )
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.attributes["error"] = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end = time.time()
+            self.finish(span)
+
+    def start_task_span(self, name: str, context: dict | None) -> tuple[Span, Any]:
+        """Open the span of a task and make it current.
+
+        ``context`` is the message's trace header. Eager tasks run inside the
+        publishing span and have none, so they use the current span instead.
+        """
+        started = time.time()
+        parent = _current_span.get()
+        if context is not None:
+            trace_id, parent_id = context["trace_id"], context["parent_id"]
+            published_at = context["published_at"]
+        elif parent is not None:
+            trace_id, parent_id, published_at = parent.trace_id, parent.span_id, started
+        else:
+            return None, None
+        span = Span(
+            trace_id=trace_id,
+            span_id=_new_id(8),
+            parent_id=parent_id,
+            name=name,
+            start=min(published_at, started),
+            attributes={"queue_wait_seconds": max(started - published_at, 0.0)},
+        )
+        return span, _current_span.set(span)
+
+    def finish_task_span(self, span: Span, token: Any) -> None:
+        _current_span.reset(token)
+        span.end = time.time()
+        span.attributes["execution_seconds"] = (
+            span.duration - span.attributes["queue_wait_seconds"]
+        )
+        self.finish(span)
+
+    def finish(self, span: Span) -> None:
+        if span.end is None:
+            span.end = time.time()
+        try:
+            self.exporter.export(span)
+        except Exception as e:
+            logger.warning(f"Could not export span {span.name}: {e}")
+
+
+@lru_cache
+def get_tracer() -> Tracer | None:
+    settings = get_settings()
+    if not settings.tracing_enabled:
+        return None
+    if settings.trace_file:
+        return Tracer(FileSpanExporter(settings.trace_file))
+    return Tracer(InMemorySpanExporter(settings.trace_collector_traces))
+
+
+@before_task_publish.connect
+def inject_trace_context(headers=None, **kwargs):
+    # Fires wherever a message is published: the API for the workflow's
+    # first tasks, workers for chain continuations and chord bodies.
+    span = _current_span.get()
+    if span is not None and headers is not None:
+        headers[TRACE_HEADER] = {
+            "trace_id": span.trace_id,
+            "parent_id": span.span_id,
+            "published_at": time.time(),
+        }
+
+
+def critical_path(spans: list[Span]) -> list[Span]:
+    """From the root down, the child that finished last at each level: the
+    chain of spans that determined when the trace finished."""
+    children: dict[str | None, list[Span]] = defaultdict(list)
+    for span in spans:
+        children[span.parent_id].append(span)
+    ids = {span.span_id for span in spans}
+    roots = [span for span in spans if span.parent_id not in ids]
+    if not roots:
+        return []
+
+    path = [max(roots, key=lambda span: span.end or span.start)]
+    while children.get(path[-1].span_id):
+        path.append(
+            max(children[path[-1].span_id], key=lambda span: span.end or span.start)
+        )
+    return path
+
+
+def format_critical_path(spans: list[Span]) -> str:
+    path = critical_path(spans)
+    if not path:
+        return "no spans"
+    origin = path[0].start
+    lines = [f"trace {path[0].trace_id}: {path[0].duration * 1000:.2f} ms"]
+    for depth, span in enumerate(path):
+        line = (
+            f"{'  ' * depth}{span.name} +{(span.start - origin) * 1000:.2f} ms "
+            f"{span.duration * 1000:.2f} ms"
+        )
+        queue_wait = span.attributes.get("queue_wait_seconds")
+        if queue_wait is not None:
+            line += (
+                f" (queue {queue_wait * 1000:.2f} ms, "
+                f"execution {(span.duration - queue_wait) * 1000:.2f} ms)"
+            )
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def read_spans(path: str) -> dict[str, list[Span]]:
+    traces: dict[str, list[Span]] = defaultdict(list)
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                span = Span(**json.loads(line))
+                traces[span.trace_id].append(span)
+    return traces
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file", help="JSON lines written by the file exporter")
+    parser.add_argument("--trace", help="Only show this trace id")
+    args = parser.parse_args()
+
+    traces = read_spans(args.file)
+    trace_ids = [args.trace] if args.trace else list(traces)
+    for trace_id in trace_ids:
+        print(format_critical_path(traces.get(trace_id, [])))
+        print()
+
+
+if __name__ == "__main__":
+    main()
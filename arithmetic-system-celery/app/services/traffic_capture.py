@@ -0,0 +1,110 @@
+"""Record the expressions ``/api/calculate`` receives, for replay.
+
+Each sampled request is one JSON line: arrival time (``t``, epoch seconds),
+expression (``e``), latency in milliseconds (``l``) and HTTP status (``s``).
+The file rotates at a size limit, keeping a few older files next to it as
+``capture.jsonl.1``, ``capture.jsonl.2``, ... (``benchmarks.replay_capture``
+reads them back in arrival order).
+"""
+
+from __future__ import annotations
+import logging
+import os
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from logging.handlers import RotatingFileHandler
+from typing import Callable, Iterator
+
+import orjson
+
+from app.config import get_settings
+
+
+@dataclass(frozen=True)
+class CapturedRequest:
+    arrived: float
+    expression: str
+    latency_ms: float
+    status: int
+
+    def to_line(self) -> bytes:
+        return orjson.dumps(
+            {
+                "t": round(self.arrived, 6),
+                "e": self.expression,
+                "l": round(self.latency_ms, 3),
+                "s": self.status,
+            }
+        )
+
+    @classmethod
+    def from_line(cls, line: str | bytes) -> CapturedRequest:
+        fields = orjson.loads(line)
+        return cls(fields["t"], fields["e"], fields["l"], fields["s"])
+
+
+class TrafficCapture:
+    """Append a sample of requests to a size-rotated file.
+
+    Writes go through a ``RotatingFileHandler``, which serializes them with
+    its own lock, so requests served by concurrent threads never interleave.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 1.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        backup_count: int = 5,
+        rand: Callable[[], float] = random.random,
+    ):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.rand = rand
+        self._handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def sampled(self) -> bool:
+        return self.sample_rate >= 1 or self.rand() < self.sample_rate
+
+    def record(self, request: CapturedRequest) -> None:
+        line = request.to_line().decode()
+        self._handler.handle(logging.makeLogRecord({"msg": line}))
+
+    def close(self) -> None:
+        self._handler.close()
+
+
+def capture_files(path: str) -> list[str]:
+    """The capture file and its rotated backups, oldest first."""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    current = [path] if os.path.exists(path) else []
+    return list(reversed(backups)) + current
+
+
+def read_capture(path: str) -> Iterator[CapturedRequest]:
+    for filename in capture_files(path):
+        with open(filename, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield CapturedRequest.from_line(line)
+
+
+@lru_cache
+def get_traffic_capture() -> TrafficCapture | None:
+    settings = get_settings()
+    if not settings.capture_file:
+        return None
+    return TrafficCapture(
+        settings.capture_file,
+        sample_rate=settings.capture_sample_rate,
+        max_bytes=settings.capture_max_bytes,
+        backup_count=settings.capture_backup_count,
+    )
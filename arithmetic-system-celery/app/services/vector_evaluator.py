@@ -0,0 +1,123 @@
+from __future__ import annotations
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from app.types.errors import ArrayShapeError
+from .expression_parser import ExpressionNode, OperationEnum, VariableNode
+
+Operand = int | float | list[float] | np.ndarray
+# Arrays arrive as lists from JSON messages, or as NumPy arrays when they
+# were claim-checked.
+ARRAY_TYPES = (list, np.ndarray)
+
+_UFUNCS = {
+    OperationEnum.ADD: np.add,
+    OperationEnum.SUB: np.subtract,
+    OperationEnum.MUL: np.multiply,
+    OperationEnum.DIV: np.divide,
+}
+
+
+def evaluate_columns(
+    node: ExpressionNode | VariableNode | float | int,
+    columns: Mapping[str, np.ndarray],
+) -> np.ndarray | float | int:
+    if isinstance(node, (int, float)):
+        return node
+
+    if isinstance(node, VariableNode):
+        return columns[node.name]
+
+    if not isinstance(node, ExpressionNode):
+        raise TypeError(f"Invalid node type: {type(node)}")
+
+    left = evaluate_columns(node.left, columns)
+    right = evaluate_columns(node.right, columns)
+    return _apply(node.operation, left, right)
+
+
+def elementwise(operation: OperationEnum, left: Operand, right: Operand) -> Operand:
+    """Apply ``operation`` to scalar or array operands, broadcasting scalars.
+
+    Arrays are computed with NumPy and returned as lists, ready to be
+    serialized as a task result.
+    """
+    if not isinstance(left, ARRAY_TYPES) and not isinstance(right, ARRAY_TYPES):
+        return _apply(operation, left, right)
+    return _apply(
+        operation,
+        np.asarray(left, dtype=np.float64),
+        np.asarray(right, dtype=np.float64),
+    ).tolist()
+
+
+def reduce_elementwise(
+    operation: OperationEnum, operands: Sequence[Operand]
+) -> Operand:
+    """Reduce ``operands`` with ``operation``, element-wise if any is an array."""
+    if not any(isinstance(operand, ARRAY_TYPES) for operand in operands):
+        raise TypeError("reduce_elementwise expects at least one array operand")
+    stacked = np.stack(
+        np.broadcast_arrays(
+            *(np.asarray(operand, dtype=np.float64) for operand in operands)
+        )
+    )
+    return _UFUNCS[operation].reduce(stacked, axis=0).tolist()
+
+
+def is_operand(value) -> bool:
+    if isinstance(value, np.ndarray):
+        return value.ndim == 1
+    if isinstance(value, list):
+        return all(isinstance(v, (int, float)) for v in value)
+    return isinstance(value, (int, float))
+
+
+def describe_operand(value: Operand) -> str:
+    """Loggable form of an operand; arrays are summarized by their length."""
+    if isinstance(value, ARRAY_TYPES):
+        return f"array[{len(value)}]"
+    return str(value)
+
+
+def array_length(node: ExpressionNode | list[float] | float | int) -> int | None:
+    """Length shared by the arrays in ``node``, or None if it has none."""
+    if isinstance(node, list):
+        return len(node)
+    if not isinstance(node, ExpressionNode) or not node.has_arrays:
+        return None
+
+    lengths = {array_length(node.left), array_length(node.right)} - {None}
+    if len(lengths) > 1:
+        raise ArrayShapeError(
+            f"Arrays in an expression must have the same length, got {sorted(lengths)}"
+        )
+    return lengths.pop()
+
+
+def slice_arrays(node, start: int, stop: int):
+    """Copy of ``node`` with every array cut to ``[start:stop]``."""
+    if isinstance(node, list):
+        return node[start:stop]
+    if not isinstance(node, ExpressionNode) or not node.has_arrays:
+        return node
+    return ExpressionNode(
+        operation=node.operation,
+        left=slice_arrays(node.left, start, stop),
+        right=slice_arrays(node.right, start, stop),
+    )
+
+
+def _apply(operation: OperationEnum, left, right):
+    if operation == OperationEnum.DIV and np.any(np.asarray(right) == 0):
+        raise ZeroDivisionError("Cannot divide by zero.")
+    if isinstance(left, np.ndarray) or isinstance(right, np.ndarray):
+        return _UFUNCS[operation](left, right)
+    if operation == OperationEnum.ADD:
+        return left + right
+    if operation == OperationEnum.SUB:
+        return left - right
+    if operation == OperationEnum.MUL:
+        return left * right
+    return left / right
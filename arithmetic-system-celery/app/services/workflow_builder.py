@@ -1,51 +1,185 @@
 from celery import group, Signature, chord
 from celery.result import EagerResult, AsyncResult
+import math
 import uuid
+from .affinity_router import AffinityRouter
+from .bulk_publisher import BulkPublisher
+from .cost_model import ExecutionMode, TelemetryCostModel
+from .evaluator import evaluate_tree
 from .expression_parser import ExpressionNode, OperationEnum
+from .load_router import LoadAwareRouter
+from .subtree_store import SUBTREE_HASHES_HEADER, SubtreeResultStore
+from .vector_evaluator import array_length, slice_arrays
 import logging
-from app.workers import xsum_task, xprod_task
+from app.workers import xsum_task, xprod_task, evaluate_expression_task, concat_task
 from typing import Callable
 from celery.canvas import _chain
+import hashlib
+from app.models.models import WorkflowSummary
 
 logger = logging.getLogger(__name__)
 
+# Operands a plan can carry as task arguments: scalars and arrays.
+CONSTANT_TYPES = (int, float, list)
+
 
 class WorkflowBuilder:
     def __init__(
         self,
         task_map: dict[OperationEnum, Callable[..., int | float]],
         task_chord_map: dict[OperationEnum, Callable[..., int | float]] = None,
+        reduction_fan_in: int | None = None,
+        task_batch_map: dict[OperationEnum, Callable[..., list[float]]] = None,
+        leaf_batch_size: int | None = None,
+        planner: TelemetryCostModel | None = None,
+        subtree_store: SubtreeResultStore | None = None,
+        array_chunk_size: int | None = None,
+        publisher: BulkPublisher | None = None,
+        router: LoadAwareRouter | AffinityRouter | None = None,
     ):
+        if reduction_fan_in is not None and reduction_fan_in < 2:
+            raise ValueError(f"reduction_fan_in must be >= 2, got {reduction_fan_in}")
+
         self.task_map = task_map
         self.task_chord_map = task_chord_map
+        self.reduction_fan_in = reduction_fan_in
+        self.task_batch_map = task_batch_map or {}
+        self.leaf_batch_size = leaf_batch_size
+        self.planner = planner
+        self.subtree_store = subtree_store
+        self.array_chunk_size = array_chunk_size
+        self.publisher = publisher
+        self.router = router
 
     def build(self, node) -> tuple[AsyncResult, str]:
-        workflow_or_result = self._build_recursive(node)
-        workflow_string = ""
+        workflow_or_result = self.plan(node)
+        workflow_string = self.describe(workflow_or_result)
+        return self.dispatch(workflow_or_result), workflow_string
+
+    def plan(self, node) -> Signature | float | int | list[float]:
+        length = array_length(node)
+        chunk_size = self.array_chunk_size
+        if (
+            isinstance(node, ExpressionNode)
+            and length is not None
+            and chunk_size
+            and length > chunk_size
+        ):
+            # Every chunk is the whole expression over a slice of the arrays,
+            # so chunks run on different workers and only meet in concat_task.
+            logger.info(
+                f"Splitting {length} array elements into chunks of {chunk_size}"
+            )
+            chunks = [
+                self._plan_tree(slice_arrays(node, start, start + chunk_size))
+                for start in range(0, length, chunk_size)
+            ]
+            return chord(group(chunks), concat_task.s())
+        return self._plan_tree(node)
+
+    def _plan_tree(self, node) -> Signature | float | int | list[float]:
+        known = (
+            self.subtree_store.known_subtrees(node)
+            if self.subtree_store is not None and isinstance(node, ExpressionNode)
+            else None
+        )
+        return self._build_recursive(node, known)
+
+    def describe(self, workflow_or_result: Signature | float | int) -> str:
+        if isinstance(workflow_or_result, CONSTANT_TYPES):
+            return f"constant({workflow_or_result})"
+        if isinstance(workflow_or_result, Signature):
+            return self._signature_to_string(workflow_or_result)
+        raise TypeError(
+            f"Build process returned an unexpected type: {type(workflow_or_result)}"
+        )
 
-        if isinstance(workflow_or_result, (int, float)):
-            task_id = str(uuid.uuid4())
-            async_result = EagerResult(task_id, workflow_or_result, "SUCCESS")
-            workflow_string = f"constant({workflow_or_result})"
+    def summarize(self, workflow_or_result: Signature | float | int) -> WorkflowSummary:
+        """Describe the structure of a workflow without rendering its operands.
+
+        The cost is one walk over the canvas; unlike ``describe`` it does not
+        grow with the size of argument lists.
+        """
+        if isinstance(workflow_or_result, CONSTANT_TYPES):
+            shape, tasks, chords, depth = "constant", 0, 0, 0
         elif isinstance(workflow_or_result, Signature):
-            async_result = workflow_or_result.apply_async()
-            workflow_string = self._signature_to_string(workflow_or_result)
+            shape, tasks, chords, depth = self._signature_shape(workflow_or_result)
         else:
             raise TypeError(
                 f"Build process returned an unexpected type: {type(workflow_or_result)}"
             )
+        return WorkflowSummary(
+            tasks=tasks,
+            chords=chords,
+            depth=depth,
+            shape_hash=hashlib.sha256(shape.encode()).hexdigest()[:16],
+        )
+
+    def dispatch(self, workflow_or_result: Signature | float | int) -> AsyncResult:
+        if isinstance(workflow_or_result, CONSTANT_TYPES):
+            task_id = str(uuid.uuid4())
+            return EagerResult(task_id, workflow_or_result, "SUCCESS")
+        if isinstance(workflow_or_result, Signature):
+            if self.router is not None:
+                self.route(workflow_or_result)
+            if self.publisher is not None:
+                return self.publisher.dispatch(workflow_or_result)
+            return workflow_or_result.apply_async()
+        raise TypeError(
+            f"Build process returned an unexpected type: {type(workflow_or_result)}"
+        )
 
-        return async_result, workflow_string
+    def route(self, sig: Signature) -> None:
+        """Pick a replica for every task published right away.
 
-    def _build_recursive(self, node) -> Signature | float | int:
-        if isinstance(node, (int, float)):
+        Chord bodies and later chain steps are published once their inputs
+        are ready, when today's load no longer applies; they stay on the
+        shared queues.
+        """
+        if isinstance(sig, chord):
+            for task in sig.tasks:
+                self.route(task)
+        elif isinstance(sig, _chain):
+            self.route(sig.tasks[0])
+        elif isinstance(sig, group):
+            for task in sig.tasks:
+                self.route(task)
+        else:
+            self.router.route(sig, sig.type.queue)
+
+    def _build_recursive(
+        self, node, known: dict[str, int | float] | None = None
+    ) -> Signature | float | int:
+        if known and isinstance(node, ExpressionNode) and node.content_hash in known:
+            return known[node.content_hash]
+
+        workflow = self._build_node(node, known)
+        # Tag the task producing the subtree's value so it gets recorded.
+        if self.subtree_store is not None and isinstance(workflow, Signature):
+            self._tag_subtree(workflow, node.content_hash)
+        return workflow
+
+    def _build_node(
+        self, node, known: dict[str, int | float] | None
+    ) -> Signature | float | int:
+        if isinstance(node, CONSTANT_TYPES):
             return node
 
         if not isinstance(node, ExpressionNode):
             raise TypeError(f"Invalid node type: {type(node)}")
 
-        is_left_constant = isinstance(node.left, (int, float))
-        is_right_constant = isinstance(node.right, (int, float))
+        # The cost model prices scalar operations; arrays always distribute.
+        if self.planner is not None and not node.has_arrays:
+            decision = self.planner.decide(node)
+            if decision.mode == ExecutionMode.INLINE:
+                return evaluate_tree(node)
+            if decision.mode == ExecutionMode.FUSED:
+                return evaluate_expression_task.s(node.to_expression()).set(
+                    queue=decision.queue
+                )
+
+        is_left_constant = isinstance(node.left, CONSTANT_TYPES)
+        is_right_constant = isinstance(node.right, CONSTANT_TYPES)
 
         # Both are constants
         if is_left_constant and is_right_constant:
@@ -57,13 +191,19 @@ class WorkflowBuilder:
         if node.operation.is_commutative and (
             not is_left_constant or not is_right_constant
         ):
-            return self._build_flat_workflow(node)
+            return self._build_flat_workflow(node, known)
 
-        left_workflow = self._build_recursive(node.left)
-        right_workflow = self._build_recursive(node.right)
+        left_workflow = self._build_recursive(node.left, known)
+        right_workflow = self._build_recursive(node.right, known)
 
         op_task = self.task_map[node.operation]
 
+        # Subtrees evaluated inline or already known come back as constants
+        is_left_constant = not isinstance(left_workflow, Signature)
+        is_right_constant = not isinstance(right_workflow, Signature)
+        if is_left_constant and is_right_constant:
+            return op_task.s(left_workflow, right_workflow)
+
         # Left is constant, Right is OperationNode
         if not is_left_constant and is_right_constant:
             return left_workflow | op_task.s(y=right_workflow)
@@ -77,7 +217,9 @@ class WorkflowBuilder:
         parallel_tasks = group(left_workflow, right_workflow)
         return chord(parallel_tasks, op_chord_task.s())
 
-    def _build_flat_workflow(self, node: ExpressionNode) -> Signature | float:
+    def _build_flat_workflow(
+        self, node: ExpressionNode, known: dict[str, int | float] | None = None
+    ) -> Signature | float:
         op_task = self.task_map[node.operation]
         aggregator_task = (
             xsum_task if node.operation == OperationEnum.ADD else xprod_task
@@ -87,8 +229,21 @@ class WorkflowBuilder:
             node, node.operation
         )
 
+        if known:
+            flatten_commutative_nodes = [
+                known.get(sub_node.content_hash, sub_node)
+                if isinstance(sub_node, ExpressionNode)
+                else sub_node
+                for sub_node in flatten_commutative_nodes
+            ]
+
+        batch_tasks, flatten_commutative_nodes = self._build_leaf_batches(
+            flatten_commutative_nodes
+        )
+
         child_workflows = [
-            self._build_recursive(sub_node) for sub_node in flatten_commutative_nodes
+            self._build_recursive(sub_node, known)
+            for sub_node in flatten_commutative_nodes
         ]
 
         tasks = [
@@ -100,6 +255,14 @@ class WorkflowBuilder:
             if not isinstance(workflow, Signature)
         ]
 
+        # Case: Batched leaf operations, whose list results lead the chord header
+        if batch_tasks:
+            if constants:
+                tasks.append(aggregator_task.s(constants))
+            return self._build_reduction(
+                batch_tasks + tasks, aggregator_task, batches=len(batch_tasks)
+            )
+
         identity = 0.0 if node.operation == OperationEnum.ADD else 1.0
         num_tasks = len(tasks)
         num_constants = len(constants)
@@ -122,18 +285,112 @@ class WorkflowBuilder:
                 return tasks[0] | op_task.s(y=constants[0])
             # num_constants > 1
             tasks.append(aggregator_task.s(constants))
-            return chord(header=group(tasks), body=aggregator_task.s())
+            return self._build_reduction(tasks, aggregator_task)
 
         # Case: Multiple tasks
         if num_constants == 1:
-            return chord(header=group(tasks), body=aggregator_task.s()) | op_task.s(
+            return self._build_reduction(tasks, aggregator_task) | op_task.s(
                 y=constants[0]
             )
         if num_constants > 1:
             tasks.append(aggregator_task.s(constants))
-            return chord(header=group(tasks), body=aggregator_task.s())
+            return self._build_reduction(tasks, aggregator_task)
+
+        return self._build_reduction(tasks, aggregator_task)
 
-        return chord(header=group(tasks), body=aggregator_task.s())
+    def _tag_subtree(self, workflow: Signature, subtree_hash: str) -> None:
+        terminal = workflow
+        while isinstance(terminal, (chord, _chain)):
+            terminal = (
+                terminal.body if isinstance(terminal, chord) else terminal.tasks[-1]
+            )
+        headers = terminal.options.setdefault("headers", {})
+        headers.setdefault(SUBTREE_HASHES_HEADER, []).append(subtree_hash)
+
+    def _build_reduction(
+        self, tasks: list[Signature], aggregator_task, batches: int = 0
+    ) -> Signature:
+        """Reduce ``tasks`` with ``aggregator_task``, at most ``reduction_fan_in``
+        results per join.
+
+        Wide chords are split into partial chords whose results feed the next
+        level, so no single body task has to collect every header result. The
+        first ``batches`` tasks return lists that the aggregator unpacks.
+        """
+        fan_in = self.reduction_fan_in
+        if fan_in is None or len(tasks) <= fan_in:
+            return chord(
+                header=group(tasks),
+                body=self._aggregator_body(aggregator_task, batches),
+            )
+
+        partials = []
+        for start in range(0, len(tasks), fan_in):
+            members = tasks[start : start + fan_in]
+            member_batches = min(max(batches - start, 0), len(members))
+            if len(members) == 1 and not member_batches:
+                partials.append(members[0])
+            else:
+                partials.append(
+                    chord(
+                        header=group(members),
+                        body=self._aggregator_body(aggregator_task, member_batches),
+                    )
+                )
+        return self._build_reduction(partials, aggregator_task)
+
+    def _aggregator_body(self, aggregator_task, batches: int) -> Signature:
+        if batches:
+            return aggregator_task.s(batches=batches)
+        return aggregator_task.s()
+
+    def _build_leaf_batches(
+        self, nodes: list[ExpressionNode | float | int]
+    ) -> tuple[list[Signature], list[ExpressionNode | float | int]]:
+        """Pack leaf operations (both operands constant) into batch tasks.
+
+        Every batch task carries several operand pairs in one message and
+        returns one result per pair. Nodes that are not batched are returned
+        unchanged to be built as usual.
+        """
+        leaf_pairs: dict[OperationEnum, list[list[int | float]]] = {}
+        remaining = []
+        for sub_node in nodes:
+            if (
+                isinstance(sub_node, ExpressionNode)
+                and sub_node.operation in self.task_batch_map
+                and isinstance(sub_node.left, (int, float))
+                and isinstance(sub_node.right, (int, float))
+            ):
+                leaf_pairs.setdefault(sub_node.operation, []).append(
+                    [sub_node.left, sub_node.right]
+                )
+            else:
+                remaining.append(sub_node)
+
+        batch_tasks = []
+        for operation, pairs in leaf_pairs.items():
+            # Auto-tuned: sqrt(n) pairs per batch keeps both the message count
+            # and the work per message growing slowly.
+            batch_size = self.leaf_batch_size or math.ceil(math.sqrt(len(pairs)))
+            if batch_size < 2 or len(pairs) < 2:
+                remaining.extend(
+                    ExpressionNode(operation=operation, left=left, right=right)
+                    for left, right in pairs
+                )
+                continue
+
+            batch_task = self.task_batch_map[operation]
+            logger.info(
+                f"Batching {len(pairs)} {operation} leaf operations, "
+                f"{batch_size} per message"
+            )
+            batch_tasks.extend(
+                batch_task.s(pairs[start : start + batch_size])
+                for start in range(0, len(pairs), batch_size)
+            )
+
+        return batch_tasks, remaining
 
     def _flatten_commutative_operands(
         self, node, operation: OperationEnum
@@ -156,6 +413,38 @@ class WorkflowBuilder:
 
         return sub_commutative_expression
 
+    def _signature_shape(self, sig: Signature) -> tuple[str, int, int, int]:
+        """Return (shape, tasks, chords, depth) of a canvas."""
+        if isinstance(sig, chord):
+            header = [self._signature_shape(task) for task in sig.tasks]
+            body = self._signature_shape(sig.body)
+            return (
+                f"chord([{','.join(h[0] for h in header)}],{body[0]})",
+                sum(h[1] for h in header) + body[1],
+                sum(h[2] for h in header) + body[2] + 1,
+                max((h[3] for h in header), default=0) + body[3],
+            )
+
+        if isinstance(sig, _chain):
+            parts = [self._signature_shape(task) for task in sig.tasks]
+            return (
+                "|".join(p[0] for p in parts),
+                sum(p[1] for p in parts),
+                sum(p[2] for p in parts),
+                sum(p[3] for p in parts),
+            )
+
+        if hasattr(sig, "tasks"):
+            parts = [self._signature_shape(task) for task in sig.tasks]
+            return (
+                f"group([{','.join(p[0] for p in parts)}])",
+                sum(p[1] for p in parts),
+                sum(p[2] for p in parts),
+                max((p[3] for p in parts), default=0),
+            )
+
+        return str(sig.task).split(".")[-1], 1, 0, 1
+
     def _signature_to_string(self, sig: Signature) -> str:
         # Chord
         if isinstance(sig, chord):
@@ -214,17 +503,26 @@ class WorkflowBuilder:
             if isinstance(arg, (int, float)):
                 parts.append(str(arg))
             elif isinstance(arg, list):
-                list_str = ", ".join(str(x) for x in arg if isinstance(x, (int, float)))
-                parts.append(f"[{list_str}]")
+                parts.append(self._format_list(arg))
             else:
                 parts.append("?")
 
         for key, value in kwargs.items():
             if isinstance(value, (int, float)):
                 parts.append(f"{key}={value}")
+            elif isinstance(value, list):
+                parts.append(f"{key}={self._format_list(value)}")
             elif key in ["is_left_fixed"]:
                 parts.append(f"{key}={value}")
             else:
                 parts.append(f"{key}=?")
 
         return f"({', '.join(parts)})" if parts else ""
+
+    def _format_list(self, values: list) -> str:
+        items = [
+            self._format_list(x) if isinstance(x, list) else str(x)
+            for x in values
+            if isinstance(x, (int, float, list))
+        ]
+        return f"[{', '.join(items)}]"
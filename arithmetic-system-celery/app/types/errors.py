@@ -27,3 +27,39 @@ class UnsupportedOperatorError(ExpressionError):
         self.operator = operator
         self.message = message
         super().__init__(f"{message}: '{operator}'")
+
+
+class PreparedExpressionNotFoundError(ExpressionError):
+    def __init__(self, prepared_id: str):
+        self.prepared_id = prepared_id
+        super().__init__(f"Prepared expression not found: '{prepared_id}'")
+
+
+class VariableBindingError(ExpressionError):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class ArrayNotFoundError(ExpressionError):
+    def __init__(self, array_id: str):
+        self.array_id = array_id
+        super().__init__(f"Array not found: '{array_id}'")
+
+
+class ArrayShapeError(ExpressionError):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
+
+
+class ProfileNotFoundError(Exception):
+    def __init__(self, name: str):
+        self.name = name
+        super().__init__(f"Profile not found: '{name}'")
+
+
+class ServiceUnavailableError(Exception):
+    def __init__(self, message: str):
+        self.message = message
+        super().__init__(message)
@@ -6,6 +6,13 @@ from .xsum_service import xsum_task
 from .xprod_service import xprod_task
 from .sub_list_service import subtract_list_task
 from .div_list_service import divide_list_task
+from .eval_columns_service import evaluate_columns_task
+from .concat_service import concat_task
+from .add_batch_service import add_batch_task
+from .sub_batch_service import subtract_batch_task
+from .mul_batch_service import multiply_batch_task
+from .div_batch_service import divide_batch_task
+from .eval_expression_service import evaluate_expression_task
 
 __all__ = [
     "add_task",
@@ -16,4 +23,11 @@ __all__ = [
     "xprod_task",
     "subtract_list_task",
     "divide_list_task",
+    "evaluate_columns_task",
+    "concat_task",
+    "add_batch_task",
+    "subtract_batch_task",
+    "multiply_batch_task",
+    "divide_batch_task",
+    "evaluate_expression_task",
 ]
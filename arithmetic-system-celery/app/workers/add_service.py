@@ -1,14 +1,20 @@
 from ..celery import app
+from ..services.expression_parser import OperationEnum
+from ..services.vector_evaluator import Operand, describe_operand, elementwise
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@app.task(name="add_task", queue="add_tasks")
-def add_task(x: int | float, y: int | float, is_left_fixed: bool = False) -> float:
+@app.task(name="add_task", queue="add_tasks", memoize=True)
+def add_task(x: Operand, y: Operand, is_left_fixed: bool = False) -> Operand:
     try:
-        logger.info(f"Adding {x} + {y} (Left fixed: {is_left_fixed}) Result: {x + y}")
-        return x + y
+        result = elementwise(OperationEnum.ADD, x, y)
+        logger.info(
+            f"Adding {describe_operand(x)} + {describe_operand(y)} "
+            f"(Left fixed: {is_left_fixed}) Result: {describe_operand(result)}"
+        )
+        return result
     except Exception as exc:
         logger.error(f"Error in add_task: {exc}")
         raise
@@ -0,0 +1,160 @@
+from __future__ import annotations
+import logging
+import math
+from dataclasses import dataclass
+from time import monotonic
+
+from celery.worker import state
+from celery.worker.autoscale import AUTOSCALE_KEEPALIVE, Autoscaler
+
+from ..config import get_settings
+from ..services.cost_model import Ewma, QueueProbe, broker_queue_probe
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ScalingPolicy:
+    """Size a pool so queued work drains within ``target_wait_seconds``.
+
+    Growing happens at once; shrinking happens one process at a time and only
+    after the worker has seen neither backlog nor reserved tasks for
+    ``idle_seconds``.
+    """
+
+    target_wait_seconds: float
+    idle_seconds: float
+
+    def target(
+        self,
+        processes: int,
+        min_processes: int,
+        max_processes: int,
+        reserved: int,
+        backlog: int,
+        consumers: int,
+        task_seconds: float,
+        idle_for: float,
+    ) -> int:
+        # Consumers of a queue share its backlog evenly.
+        pending = reserved + backlog / max(consumers, 1)
+        wanted = math.ceil(pending * task_seconds / self.target_wait_seconds)
+
+        if wanted > processes:
+            target = wanted
+        elif wanted < processes and idle_for >= self.idle_seconds:
+            target = max(wanted, processes - 1)
+        else:
+            target = processes
+        return min(max(target, min_processes), max_processes)
+
+
+class QueueDepthAutoscaler(Autoscaler):
+    """Autoscaler sizing the pool from broker backlog and task latency.
+
+    Celery's default autoscaler only looks at the tasks this worker already
+    reserved, which with ``worker_prefetch_multiplier=1`` is at most one per
+    process, so it never sees a queue backing up. This one probes the backlog
+    of the queues the worker consumes and estimates task latency from the
+    worker's own throughput. Enabled with ``--autoscale=max,min``.
+    """
+
+    def __init__(
+        self,
+        pool,
+        max_concurrency,
+        min_concurrency=0,
+        worker=None,
+        keepalive=AUTOSCALE_KEEPALIVE,
+        mutex=None,
+        queue_probe: QueueProbe = broker_queue_probe,
+    ):
+        super().__init__(
+            pool, max_concurrency, min_concurrency, worker, keepalive, mutex
+        )
+        settings = get_settings()
+        self.interval = settings.autoscale_interval_seconds
+        self.policy = ScalingPolicy(
+            settings.autoscale_target_wait_seconds, settings.autoscale_idle_seconds
+        )
+        self.queue_probe = queue_probe
+        self.task_seconds = Ewma(0.01)
+        self.scale_ups = 0
+        self.scale_downs = 0
+        self.backlog = 0
+        self._checked_at = monotonic()
+        self._busy_at = self._checked_at
+        self._accepted = state.all_total_count[0]
+
+    def _maybe_scale(self, req=None):
+        now = monotonic()
+        if now - self._checked_at < self.interval:
+            return False
+        elapsed, self._checked_at = now - self._checked_at, now
+
+        processes = self.processes
+        accepted = state.all_total_count[0] - self._accepted
+        self._accepted += accepted
+        # Throughput only reflects task latency while every process is busy.
+        if accepted and self.backlog:
+            self.task_seconds.update(processes * elapsed / accepted)
+
+        backlog, consumers = self._probe_backlog()
+        self.backlog = backlog
+        reserved = self.qty
+        if reserved or backlog:
+            self._busy_at = now
+
+        target = self.policy.target(
+            processes,
+            self.min_concurrency,
+            self.max_concurrency,
+            reserved,
+            backlog,
+            consumers,
+            self.task_seconds.value,
+            now - self._busy_at,
+        )
+        if target == processes:
+            return False
+
+        logger.info(
+            f"Autoscale decision: processes={processes} target={target} "
+            f"backlog={backlog} consumers={consumers} reserved={reserved} "
+            f"task_seconds={self.task_seconds.value:.4f}"
+        )
+        if target > processes:
+            self.scale_ups += 1
+            self.scale_up(target - processes)
+        else:
+            self.scale_downs += 1
+            self._shrink(processes - target)
+        return True
+
+    def info(self):
+        return {
+            **super().info(),
+            "backlog": self.backlog,
+            "task_seconds": self.task_seconds.value,
+            "scale_ups": self.scale_ups,
+            "scale_downs": self.scale_downs,
+        }
+
+    def _probe_backlog(self) -> tuple[int, int]:
+        backlog, consumers = 0, 0
+        for queue in self._queues():
+            try:
+                messages, queue_consumers = self.queue_probe(queue)
+            except Exception as e:
+                logger.warning(f"Could not probe backlog of queue {queue}: {e}")
+                continue
+            backlog += messages
+            consumers = max(consumers, queue_consumers)
+        return backlog, consumers
+
+    def _queues(self) -> list[str]:
+        consumer = getattr(self.worker, "consumer", None)
+        task_consumer = getattr(consumer, "task_consumer", None)
+        if task_consumer is None:
+            return []
+        return [queue.name for queue in task_consumer.queues]
@@ -0,0 +1,271 @@
+"""Consume an arithmetic queue in micro-batches instead of one task per message.
+
+Usage: python -m app.workers.batch_consumer --queue add_tasks [--batch-size 64]
+       [--max-wait-ms 5]
+"""
+
+from __future__ import annotations
+import argparse
+import logging
+import signal
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from celery import Celery, states
+from celery.app.task import Context
+from celery.app.trace import build_tracer
+from celery.backends.redis import RedisBackend
+from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+from kombu import Connection, Consumer
+from kombu.message import Message
+
+from ..celery import app as celery_app
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    messages: int = 0
+    seconds: float = 0.0
+
+
+class BatchConsumer:
+    """Pull up to ``batch_size`` messages, or whatever arrived within
+    ``max_wait_ms``, run them back to back and store their results together.
+
+    Tasks run through Celery's tracer, so chains, chords and failures behave
+    as on a regular worker. Successful results skip the tracer's per-task
+    write: on Redis they are stored with the metadata ``store_result`` writes
+    in a single pipeline per batch, elsewhere with ``store_result``. Messages
+    are acknowledged with one multiple-ack once their results are stored.
+    Tasks run in the consumer's main
+    thread, where soft and hard time limits are raised as exceptions by
+    ``time_limits``: a hard limit fails the task but, unlike on the prefork
+    pool, cannot stop one stuck outside the interpreter.
+    """
+
+    def __init__(
+        self,
+        queue: str,
+        batch_size: int,
+        max_wait_ms: float,
+        app: Celery = celery_app,
+        connection: Connection | None = None,
+    ):
+        self.app = app
+        self.queue = app.amqp.queues[queue]
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.connection = connection or app.connection_for_read()
+        # Virtual transports (memory, filesystem) ignore multiple-ack.
+        self._multiple_ack = self.connection.transport.driver_type == "amqp"
+        self.hostname = f"batch@{socket.gethostname()}"
+        self.stats = BatchStats()
+        self._tracers: dict[str, Any] = {}
+        self._buffer: list[Message] = []
+
+    def run(self, idle_timeout: float | None = None) -> None:
+        """Consume until interrupted, or until no message arrives for
+        ``idle_timeout`` seconds."""
+        with self._consumer():
+            while True:
+                if not self._fill(idle_timeout) and idle_timeout is not None:
+                    return
+                self.process(self._buffer)
+                self._buffer = []
+
+    def process(self, messages: list[Message]) -> None:
+        if not messages:
+            return
+
+        started = time.perf_counter()
+        results = [self._execute(message) for message in messages]
+        self._store([result for result in results if result is not None])
+        if self._multiple_ack:
+            messages[-1].ack(multiple=True)
+        else:
+            for message in messages:
+                message.ack()
+
+        self.stats.batches += 1
+        self.stats.messages += len(messages)
+        self.stats.seconds += time.perf_counter() - started
+        logger.debug(f"Processed batch of {len(messages)} messages")
+
+    def _consumer(self) -> Consumer:
+        channel = self.connection.default_channel
+        return Consumer(
+            channel,
+            queues=[self.queue],
+            callbacks=[lambda body, message: self._buffer.append(message)],
+            accept=self.app.conf.accept_content,
+            prefetch_count=self.batch_size,
+        )
+
+    def _fill(self, idle_timeout: float | None) -> bool:
+        # Block for the first message, then top up until the batch is full
+        # or max_wait has passed.
+        try:
+            self.connection.drain_events(timeout=idle_timeout)
+        except socket.timeout:
+            return False
+
+        deadline = time.monotonic() + self.max_wait
+        while len(self._buffer) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                self.connection.drain_events(timeout=remaining)
+            except socket.timeout:
+                break
+        return True
+
+    def _execute(self, message: Message) -> tuple[str, Any, Context] | None:
+        args, kwargs, embed = message.decode()
+        request = dict(message.headers)
+        request.update(
+            {
+                "args": args,
+                "kwargs": kwargs,
+                "hostname": self.hostname,
+                "is_eager": False,
+                "delivery_info": message.delivery_info,
+                # The result is stored with the rest of the batch in _store.
+                "ignore_result": True,
+            },
+            **(embed or {}),
+        )
+        task_id = request["id"]
+        task = self.app.tasks[request["task"]]
+        hard, soft = request.get("timelimit") or (None, None)
+
+        try:
+            with time_limits(
+                soft or task.soft_time_limit or self.app.conf.task_soft_time_limit,
+                hard or task.time_limit or self.app.conf.task_time_limit,
+            ):
+                retval, failure, _, _ = self._tracer(request["task"])(
+                    task_id, args, kwargs, request
+                )
+        except TimeLimitExceeded as e:
+            # The limit expired after the task, inside the tracer.
+            logger.warning(f"Task {task_id} exceeded its time limit: {e}")
+            self.app.backend.mark_as_failure(task_id, e)
+            return None
+        if failure is not None:
+            # Failures went through the tracer's regular store path.
+            return None
+        return task_id, retval, Context(request)
+
+    def _tracer(self, name: str):
+        tracer = self._tracers.get(name)
+        if tracer is None:
+            task = self.app.tasks[name]
+            tracer = self._tracers[name] = build_tracer(
+                name, task, app=self.app, hostname=self.hostname
+            )
+        return tracer
+
+    def _store(self, results: list[tuple[str, Any, Context]]) -> None:
+        backend = self.app.backend
+        if not isinstance(backend, RedisBackend) or self.app.conf.result_extended:
+            for task_id, retval, request in results:
+                backend.store_result(task_id, retval, states.SUCCESS, request=request)
+            return
+
+        keys = [backend.get_key_for_task(task_id) for task_id, _, _ in results]
+        current = backend.mget(keys)
+        with backend.client.pipeline() as pipe:
+            for key, existing, (task_id, retval, request) in zip(
+                keys, current, results
+            ):
+                # Like store_result, never overwrite a result that already
+                # succeeded (e.g. a redelivered duplicate).
+                if existing and backend.decode(existing)["status"] == states.SUCCESS:
+                    continue
+                value = backend.encode(_result_meta(backend, task_id, retval, request))
+                if backend.expires:
+                    pipe.setex(key, backend.expires, value)
+                else:
+                    pipe.set(key, value)
+                pipe.publish(key, value)
+            pipe.execute()
+
+
+def _result_meta(backend: RedisBackend, task_id: str, retval, request: Context):
+    """What ``store_result`` records for a success, without extended
+    results (those go through ``store_result`` itself)."""
+    meta = {
+        "status": states.SUCCESS,
+        "result": backend.encode_result(retval, states.SUCCESS),
+        "traceback": None,
+        "children": backend.current_task_children(request),
+        "date_done": backend.app.now().isoformat(),
+    }
+    if request.group:
+        meta["group_id"] = request.group
+    if request.parent_id:
+        meta["parent_id"] = request.parent_id
+    meta["task_id"] = task_id
+    return meta
+
+
+@contextmanager
+def time_limits(soft: float | None, hard: float | None) -> Iterator[None]:
+    """Raise ``SoftTimeLimitExceeded`` in the running code after ``soft``
+    seconds and ``TimeLimitExceeded`` after ``hard``. Signal-based, so only
+    for the main thread."""
+    pending = sorted(
+        (limit, error)
+        for limit, error in ((soft, SoftTimeLimitExceeded), (hard, TimeLimitExceeded))
+        if limit
+    )
+    if not pending:
+        yield
+        return
+
+    def expire(signum, frame):
+        limit, error = pending.pop(0)
+        if pending:
+            signal.setitimer(signal.ITIMER_REAL, pending[0][0] - limit)
+        raise error(limit)
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, pending[0][0])
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queue", required=True)
+    parser.add_argument("--batch-size", type=int, default=settings.consumer_batch_size)
+    parser.add_argument(
+        "--max-wait-ms", type=float, default=settings.consumer_batch_max_wait_ms
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    logger.info(
+        f"Consuming {args.queue} in batches of up to {args.batch_size} "
+        f"messages or {args.max_wait_ms} ms"
+    )
+    BatchConsumer(args.queue, args.batch_size, args.max_wait_ms).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+from ..celery import app
+from ..services.vector_evaluator import ARRAY_TYPES
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(name="concat_task", queue="prepared_tasks")
+def concat_task(chunks: list[list[float]]) -> list[float]:
+    if not isinstance(chunks, list):
+        raise TypeError(f"chunks must be a list, got {type(chunks).__name__}")
+
+    if not all(isinstance(chunk, ARRAY_TYPES) for chunk in chunks):
+        raise TypeError("All elements in chunks must be lists.")
+
+    try:
+        logger.info(f"Concatenating {len(chunks)} chunks")
+        return [value for chunk in chunks for value in chunk]
+    except Exception as e:
+        logger.error(f"Error in concat task: {e}")
+        raise
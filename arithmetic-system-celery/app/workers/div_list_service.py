@@ -1,10 +1,14 @@
+import numpy as np
+
 from ..celery import app
+from ..services.expression_parser import OperationEnum
+from ..services.vector_evaluator import describe_operand, elementwise
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@app.task(name="divide_list_task", queue="div_tasks")
+@app.task(name="divide_list_task", queue="div_tasks", memoize=True)
 def divide_list_task(x: list[int | float]):
     if not isinstance(x, list):
         raise TypeError(f"Divide task expects a list, got {type(x).__name__}")
@@ -12,12 +16,16 @@ def divide_list_task(x: list[int | float]):
     if len(x) != 2:
         raise ValueError(f"Divide task expects 2 elements from chord, got {len(x)}")
 
-    if x[1] == 0:
+    if np.any(np.asarray(x[1]) == 0):
         raise ZeroDivisionError("Cannot divide by zero.")
 
     try:
-        logger.info(f"Dividing {x[0]} / {x[1]} Result: {x[0] / x[1]}")
-        return x[0] / x[1]
+        result = elementwise(OperationEnum.DIV, x[0], x[1])
+        logger.info(
+            f"Dividing {describe_operand(x[0])} / {describe_operand(x[1])} "
+            f"Result: {describe_operand(result)}"
+        )
+        return result
     except Exception as e:
         logger.error(f"Error in division: {e}")
         raise
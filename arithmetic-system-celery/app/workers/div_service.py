@@ -1,26 +1,44 @@
+import numpy as np
+
 from ..celery import app
+from ..services.expression_parser import OperationEnum
+from ..services.vector_evaluator import (
+    Operand,
+    describe_operand,
+    elementwise,
+    is_operand,
+)
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-@app.task(name="divide_task", queue="div_tasks")
-def divide_task(x: int | float, y: int | float, is_left_fixed: bool = False) -> float:
-    if not isinstance(x, (int, float)):
-        raise TypeError(f"x must be int or float, got {type(x).__name__}")
+@app.task(name="divide_task", queue="div_tasks", memoize=True)
+def divide_task(x: Operand, y: Operand, is_left_fixed: bool = False) -> Operand:
+    if not is_operand(x):
+        raise TypeError(f"x must be int, float or an array, got {type(x).__name__}")
 
-    if y is not None and not isinstance(y, (int, float)):
-        raise TypeError(f"y must be int or float, got {type(y).__name__}")
+    if y is not None and not is_operand(y):
+        raise TypeError(f"y must be int, float or an array, got {type(y).__name__}")
 
     dividend, divisor = (y, x) if is_left_fixed else (x, y)
 
-    if divisor == 0:
-        raise ZeroDivisionError(f"Cannot divide {dividend} by zero.")
+    # Array divisors include claim-checked ones, resolved to ndarrays.
+    if np.ndim(divisor):
+        if np.any(np.asarray(divisor) == 0):
+            raise ZeroDivisionError("Cannot divide by zero.")
+    elif divisor == 0:
+        raise ZeroDivisionError(f"Cannot divide {describe_operand(dividend)} by zero.")
 
     try:
-        logger.info(f"Dividing {dividend} / {divisor}")
-        return dividend / divisor
+        logger.info(
+            f"Dividing {describe_operand(dividend)} / {describe_operand(divisor)}"
+        )
+        return elementwise(OperationEnum.DIV, dividend, divisor)
     except Exception as e:
-        logger.error(f"Error in division: {dividend} / {divisor}: {e}")
+        logger.error(
+            f"Error in division: {describe_operand(dividend)} / "
+            f"{describe_operand(divisor)}: {e}"
+        )
         raise
@@ -0,0 +1,35 @@
+from functools import lru_cache
+
+import numpy as np
+
+from ..celery import app
+from ..services.expression_parser import ExpressionParser
+from ..services.vector_evaluator import evaluate_columns
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=256)
+def _parse(expression: str):
+    return ExpressionParser(allow_variables=True).parse(expression)
+
+
+@app.task(name="evaluate_columns_task", queue="prepared_tasks")
+def evaluate_columns_task(
+    expression: str, bindings: dict[str, list[float]], rows: int
+) -> list[float]:
+    if not isinstance(bindings, dict):
+        raise TypeError(f"bindings must be a dict, got {type(bindings).__name__}")
+
+    try:
+        columns = {
+            name: np.asarray(values, dtype=np.float64)
+            for name, values in bindings.items()
+        }
+        result = evaluate_columns(_parse(expression), columns)
+        logger.info(f"Evaluated '{expression}' over {rows} rows")
+        return np.broadcast_to(result, (rows,)).tolist()
+    except Exception as e:
+        logger.error(f"Error evaluating '{expression}' over columns: {e}")
+        raise
@@ -0,0 +1,27 @@
+from functools import lru_cache
+
+from ..celery import app
+from ..services.evaluator import evaluate_tree
+from ..services.expression_parser import ExpressionParser
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def _parse(expression: str):
+    return ExpressionParser().parse(expression)
+
+
+@app.task(name="evaluate_expression_task", queue="add_tasks")
+def evaluate_expression_task(expression: str) -> float:
+    if not isinstance(expression, str):
+        raise TypeError(f"expression must be a str, got {type(expression).__name__}")
+
+    try:
+        result = evaluate_tree(_parse(expression))
+        logger.info(f"Evaluating fused subtree {expression} Result: {result}")
+        return result
+    except Exception as e:
+        logger.error(f"Error evaluating fused subtree {expression}: {e}")
+        raise
@@ -0,0 +1,70 @@
+"""Report this worker's load with every heartbeat.
+
+Sends a ``worker-load`` event next to each ``worker-heartbeat``: the queues
+consumed (including the worker's direct queue), messages received but not
+finished, pool size, how long the oldest running task has run, and the hits
+and misses of the task memo. The API's ``LoadAwareRouter`` and
+``AffinityRouter`` pick replicas from these reports.
+"""
+
+from __future__ import annotations
+import logging
+import time
+
+from celery.signals import heartbeat_sent, worker_init, worker_ready
+from celery.worker import state
+
+from ..services.load_router import LOAD_EVENT
+from ..services.task_memo import get_task_memo
+
+logger = logging.getLogger(__name__)
+
+_consumer = None
+
+
+@worker_init.connect
+def create_task_memo(**kwargs):
+    # Before the pool forks, so its children share the memo and its counters.
+    get_task_memo()
+
+
+@worker_ready.connect
+def remember_consumer(sender=None, **kwargs):
+    global _consumer
+    _consumer = sender
+
+
+def load_report() -> dict:
+    # Requests stamp time_start with the monotonic clock.
+    now = time.monotonic()
+    started = [
+        request.time_start
+        for request in list(state.active_requests)
+        if request.time_start
+    ]
+    pool = getattr(_consumer, "pool", None)
+    concurrency = getattr(pool, "num_processes", None) or getattr(
+        getattr(_consumer, "controller", None), "concurrency", 1
+    )
+    queues = (
+        [queue.name for queue in _consumer.task_consumer.queues]
+        if _consumer is not None and _consumer.task_consumer is not None
+        else []
+    )
+    memo = get_task_memo()
+    return {
+        "queues": queues,
+        "backlog": len(state.reserved_requests),
+        "concurrency": concurrency or 1,
+        "busy_seconds": now - min(started) if started else 0.0,
+        "memo_hits": memo.hits if memo is not None else 0,
+        "memo_misses": memo.misses if memo is not None else 0,
+    }
+
+
+@heartbeat_sent.connect
+def report_load(sender=None, **kwargs):
+    try:
+        sender.eventer.send(LOAD_EVENT, **load_report())
+    except Exception as e:
+        logger.warning(f"Could not report worker load: {e}")
@@ -0,0 +1,74 @@
+"""Per-task memory sampling and worker process accounting.
+
+A share of tasks (``task_memory_sample_rate``) runs under tracemalloc; its peak
+allocation and the growth of the process' peak RSS are added to Redis, along
+with a count of worker processes started per host. Pair with
+``worker_max_memory_per_child`` to see which tasks drive recycling.
+"""
+
+from __future__ import annotations
+import logging
+import random
+import resource
+import socket
+import tracemalloc
+
+from celery.signals import task_postrun, task_prerun, worker_process_init
+
+from ..config import get_settings
+from ..services.memory_stats import MemoryStatsStore
+
+logger = logging.getLogger(__name__)
+
+_store: MemoryStatsStore | None = None
+# task_id -> peak RSS (KiB) when the sampled task started
+_sampled: dict[str, int] = {}
+
+
+def _get_store() -> MemoryStatsStore | None:
+    global _store
+    if _store is None:
+        url = get_settings().memory_stats_redis_url
+        if url:
+            _store = MemoryStatsStore.from_url(url)
+    return _store
+
+
+def _max_rss_kib() -> int:
+    # ru_maxrss is reported in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+@worker_process_init.connect
+def record_process_start(**kwargs):
+    store = _get_store()
+    if store is None:
+        return
+    try:
+        store.record_process_start(socket.gethostname())
+    except Exception as e:
+        logger.warning(f"Could not record worker process start: {e}")
+
+
+@task_prerun.connect
+def start_sampling(task_id=None, task=None, **kwargs):
+    rate = get_settings().task_memory_sample_rate
+    if rate <= 0 or _get_store() is None or tracemalloc.is_tracing():
+        return
+    if random.random() >= rate:
+        return
+    _sampled[task_id] = _max_rss_kib()
+    tracemalloc.start()
+
+
+@task_postrun.connect
+def stop_sampling(task_id=None, task=None, **kwargs):
+    rss_before = _sampled.pop(task_id, None)
+    if rss_before is None:
+        return
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    try:
+        _get_store().record_task(task.name, peak, _max_rss_kib() - rss_before)
+    except Exception as e:
+        logger.warning(f"Could not record memory sample for {task.name}: {e}")
@@ -0,0 +1,21 @@
+from ..celery import app
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(name="multiply_batch_task", queue="mul_tasks", memoize=True)
+def multiply_batch_task(pairs: list[list[int | float]]) -> list[float]:
+    if not isinstance(pairs, list):
+        raise TypeError(f"pairs must be a list, got {type(pairs).__name__}")
+
+    if not all(isinstance(pair, list) and len(pair) == 2 for pair in pairs):
+        raise TypeError("All elements in pairs must be lists of two operands.")
+
+    try:
+        results = [x * y for x, y in pairs]
+        logger.info(f"Multiplying {len(pairs)} operand pairs in one batch")
+        return results
+    except Exception as e:
+        logger.error(f"Error in multiply_batch_task for input {pairs}: {e}")
+        raise
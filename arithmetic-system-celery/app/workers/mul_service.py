@@ -1,16 +1,20 @@
 from ..celery import app
+from ..services.expression_parser import OperationEnum
+from ..services.vector_evaluator import Operand, describe_operand, elementwise
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@app.task(name="multiply_task", queue="mul_tasks")
-def multiply_task(x: int | float, y: int | float, is_left_fixed: bool = False) -> float:
+@app.task(name="multiply_task", queue="mul_tasks", memoize=True)
+def multiply_task(x: Operand, y: Operand, is_left_fixed: bool = False) -> Operand:
     try:
+        result = elementwise(OperationEnum.MUL, x, y)
         logger.info(
-            f"Multiplying {x} * {y} (Left fixed: {is_left_fixed}) Result: {x * y}"
+            f"Multiplying {describe_operand(x)} * {describe_operand(y)} "
+            f"(Left fixed: {is_left_fixed}) Result: {describe_operand(result)}"
         )
-        return x * y
+        return result
     except Exception as exc:
         logger.error(f"Error in multiply_task: {exc}")
         raise
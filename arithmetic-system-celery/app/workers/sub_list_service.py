@@ -1,10 +1,12 @@
 from ..celery import app
+from ..services.expression_parser import OperationEnum
+from ..services.vector_evaluator import describe_operand, elementwise
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@app.task(name="subtract_list_task", queue="sub_tasks")
+@app.task(name="subtract_list_task", queue="sub_tasks", memoize=True)
 def subtract_list_task(x: list[int | float]):
     if not isinstance(x, list):
         raise TypeError(f"Sub task expects a list, got {type(x).__name__}")
@@ -13,8 +15,8 @@ def subtract_list_task(x: list[int | float]):
         raise ValueError(f"Sub task expects 2 elements from chord, got {len(x)}")
 
     try:
-        logger.info(f"Subtracting {x[0]} - {x[1]}")
-        return x[0] - x[1]
+        logger.info(f"Subtracting {describe_operand(x[0])} - {describe_operand(x[1])}")
+        return elementwise(OperationEnum.SUB, x[0], x[1])
     except Exception as e:
         logger.error(f"Error in subtraction: {e}")
         raise
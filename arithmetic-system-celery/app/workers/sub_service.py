@@ -1,24 +1,38 @@
 from ..celery import app
+from ..services.expression_parser import OperationEnum
+from ..services.vector_evaluator import (
+    Operand,
+    describe_operand,
+    elementwise,
+    is_operand,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@app.task(name="subtract_task", queue="sub_tasks")
-def subtract_task(x: float, y: float = None, is_left_fixed: bool = False) -> float:
-    if not isinstance(x, (int, float)):
-        raise TypeError(f"x must be int or float, got {type(x).__name__}")
+@app.task(name="subtract_task", queue="sub_tasks", memoize=True)
+def subtract_task(
+    x: Operand, y: Operand = None, is_left_fixed: bool = False
+) -> Operand:
+    if not is_operand(x):
+        raise TypeError(f"x must be int, float or an array, got {type(x).__name__}")
 
-    if not isinstance(y, (int, float)):
-        raise TypeError(f"y must be int or float, got {type(y).__name__}")
+    if not is_operand(y):
+        raise TypeError(f"y must be int, float or an array, got {type(y).__name__}")
 
     minuend, subtrahend = (y, x) if is_left_fixed else (x, y)
 
     try:
+        result = elementwise(OperationEnum.SUB, minuend, subtrahend)
         logger.info(
-            f"Subtracting {minuend} - {subtrahend} Result: {minuend - subtrahend} Is left fixed: {is_left_fixed}"
+            f"Subtracting {describe_operand(minuend)} - {describe_operand(subtrahend)} "
+            f"Result: {describe_operand(result)} Is left fixed: {is_left_fixed}"
         )
-        return minuend - subtrahend
+        return result
     except Exception as exc:
-        logger.error(f"Error in subtract task: {minuend} - {subtrahend}: {exc}")
+        logger.error(
+            f"Error in subtract task: {describe_operand(minuend)} - "
+            f"{describe_operand(subtrahend)}: {exc}"
+        )
         raise
@@ -0,0 +1,33 @@
+"""Record the values of subtrees that tasks compute.
+
+The builder tags the task producing each subtree's value with the subtree's
+content hash; once it succeeds its result goes to the subtree store, where
+the next plan containing the subtree picks it up.
+"""
+
+from __future__ import annotations
+import logging
+
+from celery import states
+from celery.signals import task_postrun
+
+from ..services.subtree_store import SUBTREE_HASHES_HEADER, get_subtree_store
+
+logger = logging.getLogger(__name__)
+
+
+@task_postrun.connect
+def record_subtree_values(task=None, retval=None, state=None, **kwargs):
+    if state != states.SUCCESS or not isinstance(retval, (int, float)):
+        return
+    request = task.request
+    # Worker requests carry custom headers as attributes, eager ones in headers.
+    hashes = getattr(request, SUBTREE_HASHES_HEADER, None) or (
+        request.headers or {}
+    ).get(SUBTREE_HASHES_HEADER)
+    if not hashes:
+        return
+    try:
+        get_subtree_store().put_many(dict.fromkeys(hashes, retval))
+    except Exception as e:
+        logger.warning(f"Could not record subtree values of {task.name}: {e}")
@@ -0,0 +1,35 @@
+"""Profile a share of worker tasks with cProfile.
+
+With ``profile_dir`` set, ``task_profile_sample_rate`` of the tasks a worker
+runs are profiled and written there, next to the API's request profiles.
+"""
+
+from __future__ import annotations
+import random
+from contextlib import AbstractContextManager
+
+from celery.signals import task_postrun, task_prerun
+
+from ..config import get_settings
+from ..services.profiler import ProfileMode, get_profile_store
+
+# task_id -> the open profile of a sampled task
+_profiles: dict[str, AbstractContextManager] = {}
+
+
+@task_prerun.connect
+def start_profile(task_id=None, task=None, **kwargs):
+    rate = get_settings().task_profile_sample_rate
+    store = get_profile_store()
+    if rate <= 0 or store is None or random.random() >= rate:
+        return
+    profile = store.profile("task", task.name, ProfileMode.CPROFILE)
+    profile.__enter__()
+    _profiles[task_id] = profile
+
+
+@task_postrun.connect
+def stop_profile(task_id=None, **kwargs):
+    profile = _profiles.pop(task_id, None)
+    if profile is not None:
+        profile.__exit__(None, None, None)
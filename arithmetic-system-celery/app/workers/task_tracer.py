@@ -0,0 +1,49 @@
+"""Record a span for every task of a traced workflow.
+
+The span is current while the task runs, so the messages it publishes (the
+next step of a chain, a chord's body) carry it as their parent.
+
+Worker processes only record spans with ``trace_file`` set, to a file shared
+with the API: the in-memory collector behind /api/traces lives in the API
+process, which only runs eager tasks.
+"""
+
+from __future__ import annotations
+from typing import Any
+
+from celery.signals import task_postrun, task_prerun
+
+from ..services.tracing import TRACE_HEADER, FileSpanExporter, Span, get_tracer
+
+# task_id -> the task's open span and the context token to restore
+_spans: dict[str, tuple[Span, Any]] = {}
+
+
+@task_prerun.connect
+def start_task_span(task_id=None, task=None, **kwargs):
+    tracer = get_tracer()
+    if tracer is None:
+        return
+    request = task.request
+    if not request.is_eager and not isinstance(tracer.exporter, FileSpanExporter):
+        return
+    # Worker requests carry custom headers as attributes, eager ones in headers.
+    context = getattr(request, TRACE_HEADER, None) or (request.headers or {}).get(
+        TRACE_HEADER
+    )
+    span, token = tracer.start_task_span(task.name, context)
+    if span is None:
+        return
+    span.attributes["queue"] = (request.delivery_info or {}).get("routing_key")
+    span.attributes["task_id"] = task_id
+    _spans[task_id] = span, token
+
+
+@task_postrun.connect
+def finish_task_span(task_id=None, state=None, **kwargs):
+    started = _spans.pop(task_id, None)
+    if started is None:
+        return
+    span, token = started
+    span.attributes["state"] = state
+    get_tracer().finish_task_span(span, token)
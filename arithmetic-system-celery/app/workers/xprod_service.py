@@ -1,18 +1,45 @@
 from ..celery import app
+from ..services.expression_parser import OperationEnum
+from ..services.vector_evaluator import (
+    ARRAY_TYPES,
+    describe_operand,
+    is_operand,
+    reduce_elementwise,
+)
+import numpy as np
 from math import prod
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@app.task(name="xprod_task", queue="mul_tasks")
-def xprod_task(numbers):
+@app.task(name="xprod_task", queue="mul_tasks", memoize=True)
+def xprod_task(numbers, batches: int = 0):
+    if isinstance(numbers, np.ndarray):
+        # Claim-checked operands arrive as one float64 array.
+        result = float(numbers.prod())
+        logger.info(
+            f"Calculating xprod of {describe_operand(numbers)} Result: {result}"
+        )
+        return result
+
     if not isinstance(numbers, list):
         raise TypeError(f"numbers must be a list, got {type(numbers).__name__}")
 
-    if not all(isinstance(i, (int, float)) for i in numbers):
-        raise TypeError("All elements in numbers must be int or float.")
+    # The first `batches` chord results are lists returned by *_batch_task.
+    numbers = [n for batch in numbers[:batches] for n in batch] + numbers[batches:]
+
+    if not all(is_operand(i) for i in numbers):
+        raise TypeError("All elements in numbers must be int, float or arrays.")
     try:
+        if any(isinstance(i, ARRAY_TYPES) for i in numbers):
+            # Array operands are multiplied element-wise.
+            result = reduce_elementwise(OperationEnum.MUL, numbers)
+            logger.info(
+                f"Calculating element-wise xprod of {len(numbers)} operands "
+                f"Result: {describe_operand(result)}"
+            )
+            return result
         logger.info(f"Calculating xprod for input: {numbers} Result: {prod(numbers)}")
         return prod(numbers)
     except Exception as e:
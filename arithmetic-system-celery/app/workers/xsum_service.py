@@ -1,18 +1,43 @@
 from ..celery import app
+from ..services.expression_parser import OperationEnum
+from ..services.vector_evaluator import (
+    ARRAY_TYPES,
+    describe_operand,
+    is_operand,
+    reduce_elementwise,
+)
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@app.task(name="xsum_task", queue="add_tasks")
-def xsum_task(numbers: list[float]) -> float:
+@app.task(name="xsum_task", queue="add_tasks", memoize=True)
+def xsum_task(numbers: list[float], batches: int = 0) -> float:
+    if isinstance(numbers, np.ndarray):
+        # Claim-checked operands arrive as one float64 array.
+        result = float(numbers.sum())
+        logger.info(f"Calculating xsum of {describe_operand(numbers)} Result: {result}")
+        return result
+
     if not isinstance(numbers, list):
         raise TypeError(f"numbers must be a list, got {type(numbers).__name__}")
 
-    if not all(isinstance(i, (int, float)) for i in numbers):
-        raise TypeError("All elements in numbers must be int or float.")
+    # The first `batches` chord results are lists returned by *_batch_task.
+    numbers = [n for batch in numbers[:batches] for n in batch] + numbers[batches:]
+
+    if not all(is_operand(i) for i in numbers):
+        raise TypeError("All elements in numbers must be int, float or arrays.")
 
     try:
+        if any(isinstance(i, ARRAY_TYPES) for i in numbers):
+            # Array operands are summed element-wise.
+            result = reduce_elementwise(OperationEnum.ADD, numbers)
+            logger.info(
+                f"Calculating element-wise xsum of {len(numbers)} operands "
+                f"Result: {describe_operand(result)}"
+            )
+            return result
         logger.info(f"Calculating xsum for input: {numbers} Result: {sum(numbers)}")
         return sum(numbers)
     except Exception as e:
@@ -0,0 +1,76 @@
+"""Watch a worker's pool follow the add_tasks backlog, without RabbitMQ or Redis.
+
+A filesystem broker and result backend in a temporary directory stand in for
+RabbitMQ and Redis. One worker subprocess runs with --autoscale, a burst of
+tasks is published, and the autoscaler's decisions are printed as they are
+logged.
+
+Usage: python -m benchmarks.bench_autoscaler [--tasks 2000] [--autoscale 8,1]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import configure_local_broker
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--autoscale", default="8,1")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        configure_local_broker(root)
+        os.environ["ARITHMETIC_AUTOSCALE_IDLE_SECONDS"] = "2"
+        from app.workers import add_task
+
+        worker = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "celery",
+                "-A",
+                "app.celery",
+                "worker",
+                "-Q",
+                "add_tasks",
+                f"--autoscale={args.autoscale}",
+                "--without-gossip",
+                "--without-mingle",
+                "--loglevel=info",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        started = time.monotonic()
+
+        def report():
+            for line in worker.stdout:
+                if "Autoscale decision" in line or "Scaling" in line:
+                    elapsed = time.monotonic() - started
+                    print(f"{elapsed:6.1f}s {line.split(': ', 1)[-1].strip()}")
+
+        threading.Thread(target=report, daemon=True).start()
+        time.sleep(3)
+
+        print(f"Publishing {args.tasks} add_task messages")
+        for i in range(args.tasks):
+            add_task.delay(i, 1)
+
+        try:
+            worker.wait(timeout=args.seconds)
+        except subprocess.TimeoutExpired:
+            worker.terminate()
+            worker.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Compare draining add_tasks per message (a solo Celery worker) with the
+micro-batching consumer at several batch sizes.
+
+A filesystem broker and result backend stand in for RabbitMQ and Redis, so
+the absolute numbers include filesystem polling; compare the columns with
+each other, not with a production deployment.
+
+Usage: python -m benchmarks.bench_batch_consumer [--tasks 2000]
+       [--batch-sizes 1 8 64 256]
+"""
+
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import configure_local_broker
+
+
+def publish(tasks: int):
+    from app.workers import add_task
+
+    return [add_task.delay(i, 1) for i in range(tasks)]
+
+
+def drain_with_worker(tasks: int) -> float:
+    from app.celery import app
+    from app.workers import add_task
+
+    worker = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "celery",
+            "-A",
+            "app.celery",
+            "worker",
+            "-Q",
+            "add_tasks",
+            "--pool=solo",
+            "--without-gossip",
+            "--without-mingle",
+            "--loglevel=warning",
+        ],
+    )
+    try:
+        # Warm the worker up, then pause it so the backlog builds as it does
+        # for the batch consumer.
+        add_task.delay(0, 0).get(timeout=60)
+        app.control.cancel_consumer("add_tasks", reply=True)
+        results = publish(tasks)
+
+        started = time.perf_counter()
+        app.control.add_consumer("add_tasks", reply=True)
+        # A solo worker runs the queue in order, so the last result is last.
+        results[-1].get(timeout=120, interval=0.01)
+        return time.perf_counter() - started
+    finally:
+        worker.terminate()
+        worker.wait()
+
+
+def drain_with_batches(tasks: int, batch_size: int) -> float:
+    from app.workers.batch_consumer import BatchConsumer
+
+    results = publish(tasks)
+    consumer = BatchConsumer("add_tasks", batch_size, max_wait_ms=5)
+    started = time.perf_counter()
+    consumer.run(idle_timeout=1.0)
+    elapsed = time.perf_counter() - started - 1.0
+    assert all(result.get(timeout=5) == i + 1 for i, result in enumerate(results))
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 64, 256])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        configure_local_broker(root)
+
+        rows = [("worker", drain_with_worker(args.tasks))]
+        for batch_size in args.batch_sizes:
+            rows.append(
+                (f"batch={batch_size}", drain_with_batches(args.tasks, batch_size))
+            )
+
+    print(f"{'mode':>10} {'seconds':>8} {'tasks/s':>9}")
+    for mode, seconds in rows:
+        print(f"{mode:>10} {seconds:>8.2f} {args.tasks / seconds:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
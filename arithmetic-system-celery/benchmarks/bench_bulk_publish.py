@@ -0,0 +1,89 @@
+"""Publish-phase latency of wide workflows: Celery's own apply_async versus
+the bulk publisher, which sends all messages of a workflow back to back over
+one pooled connection.
+
+Nothing consumes the messages; queues are purged between runs. The default
+in-memory broker has no publisher confirms, so it only shows the cost of
+laying out and sending the canvas. Point --broker-url at RabbitMQ and pass
+--confirm to compare one confirm wait per message with one per workflow.
+
+Usage: python -m benchmarks.bench_bulk_publish [--widths 10 50 250]
+       [--repeat 20] [--broker-url memory://] [--confirm]
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+from benchmarks.common import count_messages
+
+
+def wide_expression(width: int) -> str:
+    return " + ".join(f"({2 * i + 1} * {2 * i + 2})" for i in range(width))
+
+
+def measure(widths: list[int], repeat: int) -> list[tuple[int, int, float, float]]:
+    from app.celery import app
+    from app.config import Settings
+    from app.services.bulk_publisher import BulkPublisher
+    from app.services.orchestrator import WorkflowOrchestrator
+
+    # One message per leaf operation, so the width is the fan-out.
+    orchestrator = WorkflowOrchestrator(Settings(leaf_batch_size=1))
+    publisher = BulkPublisher(bulk=True)
+    rows = []
+    for width in widths:
+        template = orchestrator.builder.plan(
+            orchestrator.parser.parse(wide_expression(width))
+        )
+        timings = {"apply_async": [], "bulk": []}
+        for _ in range(repeat):
+            for mode, dispatch in (
+                ("apply_async", lambda workflow: workflow.apply_async()),
+                ("bulk", publisher.dispatch),
+            ):
+                workflow = template.clone()
+                started = time.perf_counter()
+                dispatch(workflow)
+                timings[mode].append(time.perf_counter() - started)
+                app.control.purge()
+        rows.append(
+            (
+                width,
+                count_messages(template),
+                statistics.median(timings["apply_async"]),
+                statistics.median(timings["bulk"]),
+            )
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--widths", type=int, nargs="+", default=[10, 50, 250])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--broker-url", default="memory://")
+    parser.add_argument("--confirm", action="store_true")
+    args = parser.parse_args()
+
+    from app.celery import app
+
+    logging.disable(logging.WARNING)
+    app.conf.update(
+        broker_url=args.broker_url,
+        broker_transport_options={"confirm_publish": args.confirm},
+        result_backend="cache+memory://",
+    )
+
+    rows = measure(args.widths, args.repeat)
+    print(f"{'width':>6} {'messages':>9} {'apply_async ms':>15} {'bulk ms':>9}")
+    for width, messages, default_seconds, bulk_seconds in rows:
+        print(
+            f"{width:>6} {messages:>9} {default_seconds * 1000:>15.2f} "
+            f"{bulk_seconds * 1000:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
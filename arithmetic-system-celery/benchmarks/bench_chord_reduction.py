@@ -0,0 +1,95 @@
+"""Compare flat chords with hierarchical reductions for wide sums.
+
+Usage: python -m benchmarks.bench_chord_reduction [--members 100 1000 5000] [--fan-in 32]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from celery import chord
+
+from app.services.expression_parser import ExpressionNode, OperationEnum
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.workflow_builder import WorkflowBuilder
+from benchmarks.common import TaskTimer, use_in_process_celery
+
+
+def sum_of_products(members: int) -> ExpressionNode:
+    # Built balanced so deep sums do not hit the parser's recursion limit.
+    nodes = [
+        ExpressionNode(operation=OperationEnum.MUL, left=i, right=2)
+        for i in range(members)
+    ]
+    while len(nodes) > 1:
+        nodes = [
+            ExpressionNode(operation=OperationEnum.ADD, left=left, right=right)
+            for left, right in zip(nodes[::2], nodes[1::2])
+        ] + nodes[len(nodes) - len(nodes) % 2 :]
+    return nodes[0]
+
+
+def widest_join(sig) -> int:
+    if isinstance(sig, chord):
+        return max([len(sig.tasks)] + [widest_join(task) for task in sig.tasks])
+    return max([widest_join(task) for task in getattr(sig, "tasks", [])] or [0])
+
+
+def run(builder: WorkflowBuilder, tree, timer: TaskTimer) -> dict:
+    timer.reset()
+    started = time.perf_counter()
+    workflow = builder.plan(tree)
+    plan_seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = builder.dispatch(workflow).get()
+    total_seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "result": result,
+        "widest_join": widest_join(workflow),
+        "plan_ms": plan_seconds * 1000,
+        "total_ms": total_seconds * 1000,
+        "max_join_ms": max(timer.durations, default=0.0) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--fan-in", type=int, default=32)
+    args = parser.parse_args()
+
+    use_in_process_celery()
+    orchestrator = WorkflowOrchestrator()
+    timer = TaskTimer({"xsum_task", "xprod_task"})
+    builders = {
+        "flat": WorkflowBuilder(orchestrator.task_map, orchestrator.task_map_chord),
+        f"fan-in {args.fan_in}": WorkflowBuilder(
+            orchestrator.task_map,
+            orchestrator.task_map_chord,
+            reduction_fan_in=args.fan_in,
+        ),
+    }
+
+    print(
+        f"{'members':>8} {'mode':>10} {'widest join':>12} {'plan ms':>9} "
+        f"{'total ms':>9} {'max join ms':>12} {'peak KiB':>9}"
+    )
+    for members in args.members:
+        tree = sum_of_products(members)
+        for mode, builder in builders.items():
+            stats = run(builder, tree, timer)
+            print(
+                f"{members:>8} {mode:>10} {stats['widest_join']:>12} "
+                f"{stats['plan_ms']:>9.1f} {stats['total_ms']:>9.1f} "
+                f"{stats['max_join_ms']:>12.3f} {stats['peak_kib']:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
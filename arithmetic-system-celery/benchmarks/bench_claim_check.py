@@ -0,0 +1,115 @@
+"""Message size and end-to-end latency of large operand lists, inline in
+the message versus claim-checked into a memory-mapped side store.
+
+An in-memory broker and result backend carry the messages to a worker
+thread, so the latency includes serializing, copying and decoding payloads
+but no network. Two payloads are measured: xsum_task over N constants (a
+large argument) and multiply_task over an N-element array (a large argument
+and a large result).
+
+Usage: python -m benchmarks.bench_claim_check [--sizes 1000 10000 100000]
+       [--repeat 5]
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import tempfile
+import time
+
+from celery.contrib.testing.worker import start_worker
+from celery.signals import before_task_publish
+
+
+def measure(sizes: list[int], repeat: int) -> dict[int, tuple[int, float, float]]:
+    from app.services.claim_check import get_claim_check_store, to_result
+    from app.workers import multiply_task, xsum_task
+
+    get_claim_check_store.cache_clear()
+    store = get_claim_check_store()
+
+    def offload(values):
+        return store.offload(values) if store is not None else values
+
+    def resolve(result):
+        return to_result(store.resolve(result)) if store is not None else result
+
+    message_bytes = []
+
+    def on_publish(body=None, **kwargs):
+        message_bytes.append(len(json.dumps(body)))
+
+    before_task_publish.connect(on_publish, weak=False)
+    rows = {}
+    try:
+        for size in sizes:
+            values = [float(i) for i in range(size)]
+            sum_seconds, mul_seconds = [], []
+            for _ in range(repeat):
+                message_bytes.clear()
+                started = time.perf_counter()
+                result = xsum_task.delay(offload(values)).get(
+                    timeout=120, interval=0.001
+                )
+                assert resolve(result) == sum(values)
+                sum_seconds.append(time.perf_counter() - started)
+
+                started = time.perf_counter()
+                result = multiply_task.delay(offload(values), 2).get(
+                    timeout=120, interval=0.001
+                )
+                assert len(resolve(result)) == size
+                mul_seconds.append(time.perf_counter() - started)
+            rows[size] = (
+                message_bytes[0],
+                statistics.median(sum_seconds),
+                statistics.median(mul_seconds),
+            )
+    finally:
+        before_task_publish.disconnect(on_publish)
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from app.celery import app
+    from app.config import get_settings
+
+    logging.disable(logging.WARNING)
+    app.conf.update(
+        broker_url="memory://",
+        broker_transport_options={"polling_interval": 0.001},
+        result_backend="cache+memory://",
+    )
+    settings = get_settings()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as claim_dir:
+        with start_worker(
+            app,
+            pool="solo",
+            queues=["add_tasks", "mul_tasks"],
+            perform_ping_check=False,
+        ):
+            results["inline"] = measure(args.sizes, args.repeat)
+            settings.claim_check_mmap_dir = claim_dir
+            settings.claim_check_min_items = 1
+            results["claim-check"] = measure(args.sizes, args.repeat)
+
+    print(f"{'size':>8} {'mode':>12} {'msg bytes':>10} {'xsum s':>8} {'array*2 s':>10}")
+    for size in args.sizes:
+        for mode, rows in results.items():
+            sent, sum_seconds, mul_seconds = rows[size]
+            print(
+                f"{size:>8} {mode:>12} {sent:>10} "
+                f"{sum_seconds:>8.4f} {mul_seconds:>10.4f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare expression latency of the embedded engine, eager Celery and workers.
+
+The distributed column needs RabbitMQ, Redis and the workers from
+docker-compose.yml; it is skipped unless --distributed is given.
+
+Usage: python -m benchmarks.bench_execution_modes [--repeat 200] [--distributed]
+"""
+
+import argparse
+import statistics
+import time
+
+from app.config import Settings
+from app.services.orchestrator import WorkflowOrchestrator
+from benchmarks.common import use_in_process_celery
+
+EXPRESSIONS = {
+    "binary": "1 + 2",
+    "nested": "((1 + 2) * 3 - 4) / 5",
+    "wide": " + ".join(f"({i} * {i} - 1)" for i in range(100)),
+}
+
+
+def measure(orchestrator: WorkflowOrchestrator, expression: str, repeat: int):
+    latencies = []
+    for _ in range(repeat):
+        # Every call parses and plans, so modes are compared end to end.
+        orchestrator.plan_cache.clear()
+        started = time.perf_counter()
+        orchestrator.calculate(expression)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--distributed", action="store_true")
+    args = parser.parse_args()
+
+    # Distributed runs go first: eager mode cannot be switched off again.
+    results = {}
+    if args.distributed:
+        orchestrator = WorkflowOrchestrator(Settings())
+        for name, expression in EXPRESSIONS.items():
+            results[name, "distributed"] = measure(
+                orchestrator, expression, args.repeat
+            )
+
+    use_in_process_celery()
+    modes = {
+        "eager": WorkflowOrchestrator(Settings()),
+        "embedded": WorkflowOrchestrator(Settings(execution_mode="embedded")),
+    }
+    for name, expression in EXPRESSIONS.items():
+        for mode, orchestrator in modes.items():
+            results[name, mode] = measure(orchestrator, expression, args.repeat)
+
+    print(f"{'expression':>10} {'mode':>11} {'p50 ms':>8} {'p99 ms':>8}")
+    for (name, mode), (p50, p99) in sorted(results.items()):
+        print(f"{name:>10} {mode:>11} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Show how many task messages leaf batching saves per expression.
+
+Usage: python -m benchmarks.bench_leaf_batching [--terms 9 99 999] [--batch-size N]
+"""
+
+import argparse
+import time
+
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.workflow_builder import WorkflowBuilder
+from benchmarks.bench_chord_reduction import sum_of_products
+from benchmarks.common import count_messages, use_in_process_celery
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--terms", type=int, nargs="+", default=[9, 99, 999])
+    parser.add_argument(
+        "--batch-size", type=int, default=None, help="Pairs per batch (auto if unset)"
+    )
+    args = parser.parse_args()
+
+    use_in_process_celery()
+    orchestrator = WorkflowOrchestrator()
+    builders = {
+        "per-leaf": WorkflowBuilder(
+            orchestrator.task_map,
+            orchestrator.task_map_chord,
+            reduction_fan_in=orchestrator.settings.reduction_fan_in,
+        ),
+        "batched": WorkflowBuilder(
+            orchestrator.task_map,
+            orchestrator.task_map_chord,
+            reduction_fan_in=orchestrator.settings.reduction_fan_in,
+            task_batch_map=orchestrator.task_map_batch,
+            leaf_batch_size=args.batch_size,
+        ),
+    }
+
+    print(f"{'terms':>6} {'mode':>9} {'messages':>9} {'total ms':>9}")
+    for terms in args.terms:
+        # (0 * 2) + (1 * 2) + ... + ((n - 1) * 2)
+        tree = sum_of_products(terms)
+        for mode, builder in builders.items():
+            workflow = builder.plan(tree)
+            started = time.perf_counter()
+            builder.dispatch(workflow).get()
+            total_ms = (time.perf_counter() - started) * 1000
+            print(
+                f"{terms:>6} {mode:>9} {count_messages(workflow):>9} {total_ms:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
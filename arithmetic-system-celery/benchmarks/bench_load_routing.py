@@ -0,0 +1,147 @@
+"""Tail latency of short tasks next to occasional long ones, on a shared
+queue versus routed by LoadAwareRouter.
+
+This is a discrete-event simulation: the filesystem broker used by the other
+benchmarks cannot carry several workers' heartbeat events reliably, and an
+in-process broker cannot host several workers with separate state. Each
+simulated replica runs one task at a time and, like a Celery worker with
+worker_prefetch_multiplier=1, holds one more message while it runs. On the
+shared queue that message may wait behind a long task. With routing, the
+real LoadAwareRouter picks replicas from load reports refreshed once per
+heartbeat interval, and replicas drain their direct queue before the shared
+one.
+
+Usage: python -m benchmarks.bench_load_routing [--workers 4] [--tasks 20000]
+       [--rate 150] [--long-share 0.02] [--long 0.5] [--short 0.005]
+       [--heartbeat 1.0]
+"""
+
+import argparse
+import heapq
+import random
+import statistics
+from collections import deque
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Replica:
+    hostname: str
+    queue: deque = field(default_factory=deque)
+    running: tuple | None = None
+    started: float = 0.0
+    reserved: tuple | None = None
+
+
+def simulate(args, routed: bool) -> list[float]:
+    from app.services.load_router import LoadAwareRouter
+
+    rng = random.Random(42)
+    replicas = [Replica(f"w{i}@sim") for i in range(args.workers)]
+    by_host = {replica.hostname: replica for replica in replicas}
+    shared: deque = deque()
+    now = 0.0
+    router = LoadAwareRouter(stale_after=float("inf"), clock=lambda: now)
+    latencies: list[float] = []
+    # (time, order, kind, payload)
+    events: list = []
+    order = 0
+
+    def push(time, kind, payload=None):
+        nonlocal order
+        order += 1
+        heapq.heappush(events, (time, order, kind, payload))
+
+    def report(now):
+        for replica in replicas:
+            backlog = (
+                len(replica.queue)
+                + (replica.running is not None)
+                + (replica.reserved is not None)
+            )
+            router.update(
+                {
+                    "hostname": replica.hostname,
+                    "queues": ["add_tasks"],
+                    "backlog": backlog,
+                    "concurrency": 1,
+                    "busy_seconds": now - replica.started if replica.running else 0.0,
+                }
+            )
+
+    def pump(now):
+        for replica in replicas:
+            # Replicas consume their direct queue and the shared one.
+            def take():
+                for source in (replica.queue, shared):
+                    if source:
+                        return source.popleft()
+                return None
+
+            if replica.running is None and replica.reserved is not None:
+                replica.running, replica.reserved = replica.reserved, None
+            if replica.running is None:
+                replica.running = take()
+            if replica.reserved is None:
+                replica.reserved = take()
+            if replica.running is not None and replica.running[2] is None:
+                arrived, duration, _ = replica.running
+                replica.running = (arrived, duration, now)
+                replica.started = now
+                push(now + duration, "done", replica.hostname)
+
+    arrival = 0.0
+    for _ in range(args.tasks):
+        arrival += rng.expovariate(args.rate)
+        long = rng.random() < args.long_share
+        push(arrival, "arrive", (arrival, args.long if long else args.short, None))
+    beat = 0.0
+    while beat < arrival:
+        push(beat, "heartbeat")
+        beat += args.heartbeat
+
+    while events:
+        now, _, kind, payload = heapq.heappop(events)
+        if kind == "arrive":
+            hostname = router.choose("add_tasks") if routed else None
+            (by_host[hostname].queue if hostname else shared).append(payload)
+        elif kind == "done":
+            replica = by_host[payload]
+            arrived, duration, _ = replica.running
+            if duration == args.short:
+                latencies.append(now - arrived)
+            replica.running = None
+        else:
+            report(now)
+        pump(now)
+    return latencies
+
+
+def percentile(values: list[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * percentile / 100), len(values) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=150)
+    parser.add_argument("--long-share", type=float, default=0.02)
+    parser.add_argument("--long", type=float, default=0.5)
+    parser.add_argument("--short", type=float, default=0.005)
+    parser.add_argument("--heartbeat", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'routing':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for mode, routed in (("shared", False), ("routed", True)):
+        latencies = simulate(args, routed)
+        print(
+            f"{mode:>8} {statistics.median(latencies) * 1000:>8.1f} "
+            f"{percentile(latencies, 95) * 1000:>8.1f} "
+            f"{percentile(latencies, 99) * 1000:>8.1f} {max(latencies) * 1000:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import json
+import logging
+import os
+import time
+
+from celery import chord
+from celery.signals import task_postrun, task_prerun
+
+
+def configure_local_broker(root: str) -> None:
+    """Use a filesystem broker and result backend under ``root``.
+
+    Call before ``app.celery`` is imported. Worker subprocesses started with
+    the same environment share the broker through the directory, so no
+    RabbitMQ or Redis is needed.
+    """
+    for folder in ("queues", "control", "results"):
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+    queues = os.path.join(root, "queues")
+    os.environ.update(
+        ARITHMETIC_BROKER_URL="filesystem://",
+        ARITHMETIC_BROKER_TRANSPORT_OPTIONS=json.dumps(
+            {
+                "data_folder_in": queues,
+                "data_folder_out": queues,
+                "control_folder": os.path.join(root, "control"),
+                "polling_interval": 0.01,
+            }
+        ),
+        ARITHMETIC_RESULT_BACKEND=f"file://{os.path.join(root, 'results')}",
+    )
+
+
+def use_in_process_celery() -> None:
+    """Run tasks eagerly with an in-memory result backend.
+
+    Benchmarks built on this measure the canvas shape and the work done inside
+    tasks; broker and network costs of a real deployment are not included.
+    """
+    from app.celery import app
+
+    logging.disable(logging.INFO)
+    app.conf.update(
+        task_always_eager=True,
+        task_store_eager_result=True,
+        result_backend="cache+memory://",
+    )
+
+
+class TaskTimer:
+    def __init__(self, task_names: set[str]):
+        self.task_names = task_names
+        self.durations: list[float] = []
+        self._started: dict[str, float] = {}
+        task_prerun.connect(self._on_prerun, weak=False)
+        task_postrun.connect(self._on_postrun, weak=False)
+
+    def reset(self) -> None:
+        self.durations.clear()
+        self._started.clear()
+
+    def _on_prerun(self, task_id=None, task=None, **kwargs):
+        if task.name in self.task_names:
+            self._started[task_id] = time.perf_counter()
+
+    def _on_postrun(self, task_id=None, task=None, **kwargs):
+        started = self._started.pop(task_id, None)
+        if started is not None:
+            self.durations.append(time.perf_counter() - started)
+
+
+def count_messages(sig) -> int:
+    """Number of task messages a canvas publishes, chord bodies included."""
+    if isinstance(sig, (int, float)):
+        return 0
+    if isinstance(sig, chord):
+        return sum(count_messages(task) for task in sig.tasks) + count_messages(
+            sig.body
+        )
+    if hasattr(sig, "tasks"):
+        return sum(count_messages(task) for task in sig.tasks)
+    return 1
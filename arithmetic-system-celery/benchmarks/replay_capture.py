@@ -0,0 +1,146 @@
+"""Replay captured /api/calculate traffic and compare latency distributions.
+
+Enable capture on the API with ARITHMETIC_CAPTURE_FILE. ``replay`` re-issues
+the captured expressions in arrival order against a running stack, each at
+its captured offset from the first request divided by --speed, and writes
+what it measured in the capture format. Latency is counted from the
+scheduled send time, so requests held back by a saturated client still show
+their delay. To compare two builds, replay the same capture against each and
+``compare`` the outputs; a capture can be compared with a replay the same way.
+
+Usage: python -m benchmarks.replay_capture replay capture.jsonl
+           --output build-a.jsonl [--url http://localhost:8000] [--speed 1.0]
+           [--concurrency 64] [--limit N]
+       python -m benchmarks.replay_capture compare build-a.jsonl build-b.jsonl
+"""
+
+import argparse
+import bisect
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from app.services.traffic_capture import CapturedRequest, read_capture
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+def replay(
+    requests: list[CapturedRequest],
+    url: str,
+    speed: float,
+    concurrency: int,
+) -> list[CapturedRequest]:
+    if not requests:
+        return []
+    origin = requests[0].arrived
+    results: list[CapturedRequest] = []
+    lock = threading.Lock()
+
+    with httpx.Client(base_url=url, timeout=60) as client:
+
+        def send(request: CapturedRequest, scheduled: float) -> None:
+            try:
+                status = client.get(
+                    "/api/calculate", params={"expression": request.expression}
+                ).status_code
+            except httpx.HTTPError:
+                status = 0
+            latency_ms = (time.time() - scheduled) * 1000
+            with lock:
+                results.append(
+                    CapturedRequest(scheduled, request.expression, latency_ms, status)
+                )
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            start = time.time()
+            for request in requests:
+                scheduled = start + (request.arrived - origin) / speed
+                delay = scheduled - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(send, request, scheduled)
+
+    return sorted(results, key=lambda r: r.arrived)
+
+
+def percentile(latencies: list[float], q: float) -> float:
+    index = min(int(len(latencies) * q / 100), len(latencies) - 1)
+    return latencies[index]
+
+
+def ks_statistic(a: list[float], b: list[float]) -> float:
+    """Largest gap between the two empirical distributions (0 = identical)."""
+    return max(
+        abs(bisect.bisect_right(a, x) / len(a) - bisect.bisect_right(b, x) / len(b))
+        for x in a + b
+    )
+
+
+def summarize(requests: list[CapturedRequest]) -> dict[str, float]:
+    answered = sorted(r.latency_ms for r in requests if r.status)
+    summary = {
+        "requests": len(requests),
+        "errors": sum(not r.status or r.status >= 500 for r in requests),
+    }
+    if answered:
+        summary["mean"] = statistics.fmean(answered)
+        summary.update({f"p{q:g}": percentile(answered, q) for q in PERCENTILES})
+        summary["max"] = answered[-1]
+    return summary
+
+
+def compare(baseline: list[CapturedRequest], candidate: list[CapturedRequest]):
+    before, after = summarize(baseline), summarize(candidate)
+    print(f"{'':>8} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for key in before:
+        if key not in after:
+            continue
+        change = (
+            f"{(after[key] - before[key]) / before[key] * 100:+7.1f}%"
+            if before[key]
+            else ""
+        )
+        print(f"{key:>8} {before[key]:>10.2f} {after[key]:>10.2f} {change:>8}")
+    a = sorted(r.latency_ms for r in baseline if r.status)
+    b = sorted(r.latency_ms for r in candidate if r.status)
+    if a and b:
+        print(f"latency distribution KS statistic: {ks_statistic(a, b):.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_parser = commands.add_parser("replay")
+    replay_parser.add_argument("capture")
+    replay_parser.add_argument("--output", required=True)
+    replay_parser.add_argument("--url", default="http://localhost:8000")
+    replay_parser.add_argument("--speed", type=float, default=1.0)
+    replay_parser.add_argument("--concurrency", type=int, default=64)
+    replay_parser.add_argument("--limit", type=int)
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        compare(list(read_capture(args.baseline)), list(read_capture(args.candidate)))
+        return
+
+    requests = sorted(read_capture(args.capture), key=lambda r: r.arrived)
+    requests = requests[: args.limit]
+    results = replay(requests, args.url, args.speed, args.concurrency)
+    with open(args.output, "wb") as f:
+        for result in results:
+            f.write(result.to_line() + b"\n")
+    print(f"Replayed {len(results)} requests to {args.output}")
+    print("\n".join(f"{k}: {v:.2f}" for k, v in summarize(results).items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.calculate_expression import orchestrator
+from app.config import get_settings
+from app.services.claim_check import MmapClaimCheckStore, get_claim_check_store
+
+
+def test_uploaded_arrays_can_be_referenced(client: TestClient):
+    upload = client.post("/api/arrays", json={"values": [1, 2, 3]})
+    assert upload.status_code == 201
+    array = upload.json()
+    assert array["length"] == 3
+
+    response = client.get(
+        "/api/calculate", params={"expression": f"{array['id']} * 2 + 1"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["result"] == [3.0, 5.0, 7.0]
+
+
+def test_unknown_array_reference_is_a_bad_request(client: TestClient):
+    response = client.get(
+        "/api/calculate", params={"expression": "arr_0123456789abcdef + 1"}
+    )
+
+    assert response.status_code == 400
+    assert "Array not found" in response.json()["detail"]
+
+
+def test_empty_arrays_cannot_be_uploaded(client: TestClient):
+    assert client.post("/api/arrays", json={"values": []}).status_code == 422
+
+
+@pytest.fixture
+def claim_check(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "claim_check_mmap_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "claim_check_min_items", 4)
+    monkeypatch.setattr(
+        orchestrator, "claim_check", MmapClaimCheckStore(str(tmp_path), 4, 60)
+    )
+    orchestrator.plan_cache.clear()
+    get_claim_check_store.cache_clear()
+    yield
+    get_claim_check_store.cache_clear()
+    orchestrator.plan_cache.clear()
+
+
+@pytest.mark.parametrize(
+    ("expression", "expected"),
+    [
+        ("[1,2,3,4,5] / [2,2,2,2,2]", [0.5, 1.0, 1.5, 2.0, 2.5]),
+        ("([1,2,3,4,5]+1) / ([2,2,2,2,2]+1)", [2 / 3, 1.0, 4 / 3, 5 / 3, 2.0]),
+    ],
+)
+def test_arrays_divide_with_the_claim_check_store(
+    client: TestClient, claim_check, expression, expected
+):
+    response = client.get("/api/calculate", params={"expression": expression})
+
+    assert response.status_code == 200
+    assert response.json()["result"] == pytest.approx(expected)
+
+
+def test_array_division_by_zero_with_the_claim_check_store(
+    client: TestClient, claim_check
+):
+    response = client.get(
+        "/api/calculate", params={"expression": "[1,2,3,4,5] / [2,2,0,2,2]"}
+    )
+
+    assert response.status_code == 400
@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.services.traffic_capture import get_traffic_capture, read_capture
+
+
+@pytest.fixture
+def capture_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "capture.jsonl")
+    monkeypatch.setattr(get_settings(), "capture_file", path)
+    get_traffic_capture.cache_clear()
+    yield path
+    get_traffic_capture().close()
+    get_traffic_capture.cache_clear()
+
+
+def test_calculate_requests_are_captured_with_their_outcome(
+    client: TestClient, capture_file
+):
+    assert client.get("/api/calculate", params={"expression": "1+2"}).status_code == 200
+    assert client.get("/api/calculate", params={"expression": "1/0"}).status_code == 400
+
+    captured = list(read_capture(capture_file))
+
+    assert [(r.expression, r.status) for r in captured] == [("1+2", 200), ("1/0", 400)]
+    assert captured[0].arrived <= captured[1].arrived
+    assert all(r.latency_ms > 0 for r in captured)
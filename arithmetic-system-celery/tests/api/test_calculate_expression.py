@@ -97,3 +97,42 @@ class TestCalculateAPI:
         assert any(
             "Field required" in str(error.get("msg", "")) for error in data["detail"]
         )
+
+    def test_calculate_wide_sum_uses_reduction_tree(self, client: TestClient):
+        """Tests that sums wider than the reduction fan-in still add up."""
+        expression = " + ".join(f"({i} * {i} - 1)" for i in range(1, 100))
+        response = client.get(
+            "/api/calculate", params={"expression": expression, "describe": True}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["result"] == sum(i * i - 1 for i in range(1, 100))
+        assert data["workflow"].startswith("chord([chord([")
+
+    def test_calculate_batches_leaf_operations(self, client: TestClient):
+        """Tests that leaf operations of a sum share batch task messages."""
+        expression = " + ".join(f"({i} * {i})" for i in range(1, 100))
+        response = client.get(
+            "/api/calculate", params={"expression": expression, "describe": True}
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["result"] == sum(i * i for i in range(1, 100))
+        assert data["workflow"].count("multiply_batch_task") == 10
+        assert "multiply_task" not in data["workflow"]
+        assert data["workflow"].endswith("xsum_task(batches=10))")
+
+    def test_calculate_returns_compact_summary_by_default(self, client: TestClient):
+        """Tests that the full workflow is only rendered on request."""
+        response = client.get("/api/calculate", params={"expression": "(1 + 2) * 3"})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["result"] == 9
+        assert "workflow" not in data
+        assert data["summary"]["tasks"] == 2
+        assert data["summary"]["chords"] == 0
+        assert data["summary"]["depth"] == 2
+        assert len(data["summary"]["shape_hash"]) == 16
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import calculate_stream
+from app.config import Settings
+from app.services.orchestrator import WorkflowOrchestrator
+
+
+@pytest.fixture(autouse=True)
+def orchestrator(monkeypatch):
+    # Eager Celery guards result.get() with a process-wide flag, so
+    # concurrent eager workflows trip over each other; the embedded engine
+    # runs the same plans without it.
+    orchestrator = WorkflowOrchestrator(Settings(execution_mode="embedded"))
+    monkeypatch.setattr(calculate_stream, "orchestrator", orchestrator)
+    return orchestrator
+
+
+class TestCalculateStreamAPI:
+    """Test suite for the /api/ws/calculate WebSocket endpoint."""
+
+    def _receive(self, websocket, count: int) -> dict:
+        replies = [websocket.receive_json() for _ in range(count)]
+        return {reply["tag"]: reply for reply in replies}
+
+    def test_replies_are_matched_by_tag(self, client: TestClient):
+        with client.websocket_connect("/api/ws/calculate") as websocket:
+            websocket.send_json({"tag": "a", "expression": "1 + 2"})
+            websocket.send_json({"tag": "b", "expression": "(2 + 3) * 4"})
+            websocket.send_json({"tag": "c", "expression": "10 / 4", "describe": True})
+            replies = self._receive(websocket, 3)
+
+        assert replies["a"]["result"] == 3
+        assert replies["b"]["result"] == 20
+        assert replies["b"]["summary"]["tasks"] == 2
+        assert "workflow" not in replies["b"]
+        assert replies["c"]["workflow"] == "divide_task(10, 4)"
+
+    def test_errors_are_reported_per_request(self, client: TestClient):
+        with client.websocket_connect("/api/ws/calculate") as websocket:
+            websocket.send_json({"tag": "zero", "expression": "1 / 0"})
+            websocket.send_json({"tag": "bad", "expression": "2 +"})
+            websocket.send_json({"tag": "missing"})
+            websocket.send_json({"tag": "ok", "expression": "2 * 3"})
+            replies = self._receive(websocket, 4)
+
+        assert replies["zero"]["error"] == {
+            "code": 400,
+            "message": "Cannot divide by zero",
+        }
+        assert replies["bad"]["error"]["code"] == 400
+        assert replies["missing"]["error"]["code"] == 422
+        assert replies["ok"]["result"] == 6
+
+    def test_outstanding_requests_are_capped(
+        self, client: TestClient, monkeypatch, orchestrator
+    ):
+        monkeypatch.setattr(orchestrator.settings, "websocket_max_outstanding", 2)
+        release = threading.Event()
+        running, peak = [0], [0]
+        lock = threading.Lock()
+        calculate = orchestrator.calculate
+
+        def slow_calculate(expression, describe=False):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            release.wait(timeout=5)
+            with lock:
+                running[0] -= 1
+            return calculate(expression, describe)
+
+        monkeypatch.setattr(orchestrator, "calculate", slow_calculate)
+
+        with client.websocket_connect("/api/ws/calculate") as websocket:
+            for i in range(5):
+                websocket.send_json({"tag": str(i), "expression": f"{i} + 1"})
+            time.sleep(0.2)
+            assert peak[0] == 2
+            release.set()
+            replies = self._receive(websocket, 5)
+
+        assert {tag: reply["result"] for tag, reply in replies.items()} == {
+            str(i): i + 1 for i in range(5)
+        }
+        assert peak[0] == 2
+
+    def test_expressions_run_outside_the_shared_threadpool(
+        self, client: TestClient, monkeypatch, orchestrator
+    ):
+        threads = []
+        calculate = orchestrator.calculate
+
+        def recording_calculate(expression, describe=False):
+            threads.append(threading.current_thread().name)
+            return calculate(expression, describe)
+
+        monkeypatch.setattr(orchestrator, "calculate", recording_calculate)
+
+        with client.websocket_connect("/api/ws/calculate") as websocket:
+            websocket.send_json({"tag": "a", "expression": "1 + 2"})
+            assert websocket.receive_json()["result"] == 3
+
+        assert threads[0].startswith("calculate-stream")
@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+
+
+def _tasks(node):
+    if node["kind"] == "task":
+        yield node
+    for child in node.get("children", []):
+        yield from _tasks(child)
+
+
+def test_explain_describes_the_plan_without_running_it(client: TestClient):
+    response = client.get(
+        "/api/explain", params={"expression": "(1+2)*(3+4)*(5-6) + 7*8"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["operations"] == 7
+    assert not data["analyzed"] and "result" not in data
+    assert data["tasks_per_queue"] == {"add_tasks": 2, "sub_tasks": 1, "mul_tasks": 2}
+    assert data["estimated_messages"] == data["summary"]["tasks"] == 5
+    assert data["chord_widths"] == [2, 2]
+    assert data["critical_path_depth"] == data["summary"]["depth"]
+    tasks = list(_tasks(data["plan"]))
+    assert len(tasks) == data["estimated_messages"]
+    assert data["estimated_bytes"] == sum(task["body_bytes"] for task in tasks)
+    assert all("finished_ms" not in task for task in tasks)
+
+
+def test_explain_analyze_runs_the_plan_and_times_every_node(client: TestClient):
+    response = client.get(
+        "/api/explain",
+        params={"expression": "(1+2)*(3+4)*(5-6) + 7*8", "analyze": True},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["analyzed"]
+    assert data["result"] == 35
+    assert data["execution_ms"] > 0
+    plan = data["plan"]
+    assert plan["kind"] == "chord"
+    body = plan["children"][-1]
+    header_finished = max(child["finished_ms"] for child in plan["children"][:-1])
+    assert body["finished_ms"] >= header_finished
+    assert plan["finished_ms"] == body["finished_ms"]
+    assert all(task["elapsed_ms"] >= 0 for task in _tasks(plan))
+
+
+def test_explain_constant_expression_has_no_plan(client: TestClient):
+    data = client.get("/api/explain", params={"expression": "42"}).json()
+
+    assert data["estimated_messages"] == 0
+    assert data["tasks_per_queue"] == {}
+    assert "plan" not in data
+
+
+def test_explain_rejects_invalid_expressions(client: TestClient):
+    response = client.get("/api/explain", params={"expression": "1 +"})
+
+    assert response.status_code == 400
@@ -0,0 +1,81 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.prepared_expression import prepared_service
+
+
+class TestPreparedExpressionAPI:
+    """Test suite for the /api/prepared endpoints."""
+
+    def _prepare(self, client: TestClient, expression: str) -> dict:
+        response = client.post("/api/prepared", json={"expression": expression})
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    def test_prepare_reports_variables(self, client: TestClient):
+        data = self._prepare(client, "a * x + b")
+        assert data["variables"] == ["a", "b", "x"]
+        assert data["expression"] == "a*x+b"
+        assert data["id"] == self._prepare(client, " a*x + b ")["id"]
+
+    def test_evaluate_columns(self, client: TestClient):
+        prepared = self._prepare(client, "(x + y) * 2 - x / y")
+        response = client.post(
+            f"/api/prepared/{prepared['id']}/evaluate",
+            json={"bindings": {"x": [1, 2, 3], "y": [1, 4, 0.5]}},
+        )
+
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["rows"] == 3
+        assert data["result"] == pytest.approx([3.0, 11.5, 1.0])
+
+    def test_evaluate_is_sharded_by_row_chunks(self, client: TestClient, monkeypatch):
+        monkeypatch.setattr(prepared_service.settings, "prepared_chunk_size", 2)
+        prepared = self._prepare(client, "x * x")
+        response = client.post(
+            f"/api/prepared/{prepared['id']}/evaluate",
+            json={"bindings": {"x": [1, 2, 3, 4, 5]}},
+        )
+
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["chunks"] == 3
+        assert data["result"] == [1, 4, 9, 16, 25]
+
+    def test_evaluate_without_variables_returns_single_row(self, client: TestClient):
+        prepared = self._prepare(client, "6 * 7")
+        response = client.post(
+            f"/api/prepared/{prepared['id']}/evaluate", json={"bindings": {}}
+        )
+        assert response.json()["result"] == [42]
+
+    @pytest.mark.parametrize(
+        "bindings, error_message_part",
+        [
+            ({"x": [1, 2]}, "Missing bindings for variables: y"),
+            ({"x": [1], "y": [1], "z": [1]}, "unknown variables: z"),
+            ({"x": [1, 2], "y": [1]}, "same length"),
+            ({"x": [1, 2], "y": [1, 0]}, "Cannot divide by zero"),
+        ],
+    )
+    def test_evaluate_invalid_bindings(
+        self, client: TestClient, bindings: dict, error_message_part: str
+    ):
+        prepared = self._prepare(client, "x / y")
+        response = client.post(
+            f"/api/prepared/{prepared['id']}/evaluate", json={"bindings": bindings}
+        )
+        assert response.status_code == 400
+        assert error_message_part in response.json()["detail"]
+
+    def test_evaluate_unknown_prepared_expression(self, client: TestClient):
+        response = client.post(
+            "/api/prepared/doesnotexist/evaluate", json={"bindings": {}}
+        )
+        assert response.status_code == 404
+
+    def test_prepare_invalid_expression(self, client: TestClient):
+        response = client.post("/api/prepared", json={"expression": "x +"})
+        assert response.status_code == 400
+        assert "invalid syntax" in response.json()["detail"]
@@ -0,0 +1,45 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import get_settings
+from app.services.profiler import get_profile_store
+
+
+@pytest.fixture
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(get_settings(), "profile_dir", str(tmp_path))
+    get_profile_store.cache_clear()
+    yield tmp_path
+    get_profile_store.cache_clear()
+
+
+@pytest.mark.parametrize("mode", ["cprofile", "sample"])
+def test_profiled_requests_can_be_listed_and_downloaded(
+    client: TestClient, profile_dir, mode
+):
+    response = client.get(
+        "/api/calculate", params={"expression": "(1+2)*3"}, headers={"X-Profile": mode}
+    )
+    assert response.status_code == 200
+    assert response.json()["result"] == 9
+    name = response.headers["X-Profile-Name"]
+
+    listing = client.get("/api/profiles").json()
+    assert listing["enabled"]
+    assert [p["name"] for p in listing["profiles"]] == [name]
+    assert listing["profiles"][0]["mode"] == mode
+
+    download = client.get(f"/api/profiles/{name}")
+    assert download.status_code == 200
+    assert download.content == (profile_dir / name).read_bytes()
+
+
+def test_requests_are_not_profiled_unless_asked(client: TestClient, profile_dir):
+    response = client.get("/api/calculate", params={"expression": "1+2"})
+
+    assert "X-Profile-Name" not in response.headers
+    assert client.get("/api/profiles").json()["profiles"] == []
+
+
+def test_unknown_profiles_are_not_found(client: TestClient, profile_dir):
+    assert client.get("/api/profiles/1-task-missing.pstats").status_code == 404
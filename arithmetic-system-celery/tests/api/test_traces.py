@@ -0,0 +1,31 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.calculate_expression import orchestrator
+from app.config import get_settings
+from app.services.tracing import get_tracer
+from app.workers import task_tracer  # noqa: F401
+
+
+@pytest.fixture
+def tracing(monkeypatch):
+    monkeypatch.setattr(get_settings(), "tracing_enabled", True)
+    get_tracer.cache_clear()
+    monkeypatch.setattr(orchestrator, "tracer", get_tracer())
+    yield
+    get_tracer.cache_clear()
+
+
+def test_traces_of_requests_can_be_fetched(client: TestClient, tracing):
+    response = client.get("/api/calculate", params={"expression": "(5+6)*(7+8)"})
+    trace_id = response.json()["trace_id"]
+
+    assert client.get("/api/traces").json()[0] == trace_id
+    trace = client.get(f"/api/traces/{trace_id}").json()
+    spans = {span["span_id"]: span for span in trace["spans"]}
+    assert spans[trace["critical_path"][0]]["name"] == "calculate"
+    assert any("queue_wait_seconds" in span["attributes"] for span in spans.values())
+
+
+def test_unknown_traces_are_not_found(client: TestClient):
+    assert client.get("/api/traces/0123").status_code == 404
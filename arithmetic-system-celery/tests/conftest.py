@@ -6,10 +6,125 @@ from app.celery import app as celery_app
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_celery_for_testing():
-    celery_app.conf.update(task_always_eager=True)
+    celery_app.conf.update(
+        task_always_eager=True,
+        task_store_eager_result=True,
+        result_backend="cache+memory://",
+    )
 
 
 @pytest.fixture(scope="module")
 def client():
     with TestClient(fastapi_app) as c:
         yield c
+
+
+def _encode(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakeRedis:
+    """In-memory stand-in for the ``redis.Redis`` commands the app uses.
+
+    Values come back as bytes like from a real server. Every applied command
+    is logged in ``commands``; the commands of each executed pipeline are
+    also logged together in ``pipelines``.
+    """
+
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+        self.hashes: dict[str, dict[str, int]] = {}
+        self.sets: dict[str, set[str]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.commands: list[tuple] = []
+        self.pipelines: list[list[tuple]] = []
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.commands.append(("set", key, value))
+        self.data[key] = _encode(value)
+        return True
+
+    def setex(self, key, seconds, value):
+        self.commands.append(("setex", key, value))
+        self.data[key] = _encode(value)
+        return True
+
+    def delete(self, key):
+        self.commands.append(("delete", key))
+        return int(self.data.pop(key, None) is not None)
+
+    def publish(self, channel, message):
+        self.commands.append(("publish", channel, message))
+        return 0
+
+    def sadd(self, key, member):
+        self.sets.setdefault(key, set()).add(member)
+
+    def smembers(self, key):
+        return {_encode(member) for member in self.sets.get(key, set())}
+
+    def hincrby(self, key, field, amount=1):
+        fields = self.hashes.setdefault(key, {})
+        fields[field] = fields.get(field, 0) + amount
+        return fields[field]
+
+    def hgetall(self, key):
+        return {
+            _encode(field): _encode(value)
+            for field, value in self.hashes.get(key, {}).items()
+        }
+
+    def zadd(self, key, mapping, gt=False):
+        scores = self.zsets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not gt or score > scores.get(member, float("-inf")):
+                scores[member] = score
+
+    def zscore(self, key, member):
+        return self.zsets.get(key, {}).get(member)
+
+
+class FakePipeline:
+    """Queues commands and applies them to the client on ``execute``."""
+
+    def __init__(self, client: FakeRedis):
+        self.client = client
+        self._queued = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self._queued.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self):
+        logged = len(self.client.commands)
+        results = [command(*args, **kwargs) for command, args, kwargs in self._queued]
+        self.client.pipelines.append(self.client.commands[logged:])
+        self._queued = []
+        return results
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
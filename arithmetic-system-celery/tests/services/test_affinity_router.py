@@ -0,0 +1,151 @@
+import multiprocessing
+
+import pytest
+from celery import chord
+
+from app.config import Settings, get_settings
+from app.services.affinity_router import AffinityRouter, HashRing
+from app.services.load_router import LoadAwareRouter
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.task_memo import TaskMemo, get_task_memo
+from app.workers import add_task, evaluate_expression_task, load_reporter
+
+
+def _report(hostname, queues=("add_tasks",), memo_hits=0, memo_misses=0):
+    return {
+        "hostname": hostname,
+        "queues": list(queues),
+        "backlog": 0,
+        "concurrency": 1,
+        "busy_seconds": 0.0,
+        "memo_hits": memo_hits,
+        "memo_misses": memo_misses,
+    }
+
+
+def _affinity(*hostnames, fallback=False):
+    workers = LoadAwareRouter(stale_after=10)
+    for hostname in hostnames:
+        workers.update(_report(hostname))
+    return AffinityRouter(
+        workers, 64, 512, fallback=workers if fallback else None
+    ), workers
+
+
+@pytest.fixture
+def task_memo(monkeypatch):
+    monkeypatch.setattr(get_settings(), "task_memo_size", 16)
+    get_task_memo.cache_clear()
+    yield get_task_memo()
+    get_task_memo.cache_clear()
+
+
+def test_ring_moves_only_the_keys_of_a_joining_replica():
+    keys = [f"add_task {i}".encode() for i in range(2000)]
+    before = HashRing(frozenset({"w1@a", "w2@b", "w3@c"}), 64)
+    after = HashRing(frozenset({"w1@a", "w2@b", "w3@c", "w4@d"}), 64)
+
+    moved = [key for key in keys if before.lookup(key) != after.lookup(key)]
+
+    assert all(after.lookup(key) == "w4@d" for key in moved)
+    assert 0.15 < len(moved) / len(keys) < 0.35
+
+
+def test_same_arguments_go_to_the_same_replica():
+    affinity, _ = _affinity("w1@a", "w2@b", "w3@c")
+
+    hostnames = set()
+    for _ in range(5):
+        sig = add_task.s(1, 1)
+        affinity.route(sig, "add_tasks")
+        hostnames.add(sig.options["routing_key"])
+    spread = set()
+    for i in range(50):
+        sig = add_task.s(i, 1)
+        affinity.route(sig, "add_tasks")
+        spread.add(sig.options["routing_key"])
+
+    assert len(hostnames) == 1
+    assert spread == {"w1@a", "w2@b", "w3@c"}
+    assert affinity.stats(enabled=True).routed == 55
+
+
+def test_replica_leaving_only_moves_its_own_keys():
+    affinity, workers = _affinity("w1@a", "w2@b", "w3@c")
+    keys = [add_task.s(i, 2) for i in range(100)]
+    for sig in keys:
+        affinity.route(sig, "add_tasks")
+    before = [sig.options["routing_key"] for sig in keys]
+
+    workers.remove({"hostname": "w3@c"})
+    for sig in keys:
+        affinity.route(sig, "add_tasks")
+
+    for old, sig in zip(before, keys):
+        assert old == "w3@c" or sig.options["routing_key"] == old
+
+
+def test_unmemoizable_and_unrouted_tasks_stay_on_the_shared_queue():
+    affinity, _ = _affinity("w1@a", "w2@b")
+    sig = evaluate_expression_task.s("1+2")
+    affinity.route(sig, "add_tasks")
+    assert "routing_key" not in sig.options
+
+    lonely, _ = _affinity("w1@a")
+    sig = add_task.s(1, 1)
+    lonely.route(sig, "add_tasks")
+    assert "routing_key" not in sig.options
+    assert lonely.stats(enabled=True).shared == 1
+
+
+def test_builder_routes_chord_headers_by_arguments():
+    affinity, _ = _affinity("w1@a", "w2@b")
+    orchestrator = WorkflowOrchestrator(Settings(leaf_batch_size=1))
+    builder = orchestrator.builder
+    builder.router = affinity
+    workflow = builder.plan(orchestrator.parser.parse("(1+1)*(2+2)"))
+    assert isinstance(workflow, chord)
+
+    builder.route(workflow)
+    first = [task.options["routing_key"] for task in workflow.tasks]
+    builder.route(workflow)
+
+    assert [task.options["routing_key"] for task in workflow.tasks] == first
+
+
+def test_memoized_tasks_answer_repeats_from_memory(task_memo):
+    assert add_task.apply(args=(1, 1)).get() == 2
+    assert add_task.apply(args=(1, 1)).get() == 2
+    assert add_task.apply(args=(1.0, 1)).get() == 2.0
+    assert evaluate_expression_task.memoize is False
+
+    assert (task_memo.hits, task_memo.misses) == (1, 2)
+
+
+def test_memo_is_shared_by_forked_pool_processes():
+    memo = TaskMemo(capacity=8, max_key_bytes=64, max_result_bytes=64)
+    key = memo.key("add_task", (1, 2), {})
+
+    child = multiprocessing.get_context("fork").Process(target=memo.put, args=(key, 3))
+    child.start()
+    child.join(timeout=5)
+
+    assert memo.get(key) == 3
+    assert memo.get(memo.key("add_task", (2, 2), {})) is None
+    memo.put(key, list(range(100)))
+    assert memo.get(key) == 3
+    assert (memo.hits, memo.misses) == (2, 1)
+
+
+def test_workers_report_memo_hit_rates(task_memo, monkeypatch):
+    monkeypatch.setattr(load_reporter, "_consumer", None)
+    add_task.apply(args=(3, 4))
+    add_task.apply(args=(3, 4))
+    report = load_reporter.load_report()
+    assert (report["memo_hits"], report["memo_misses"]) == (1, 1)
+
+    affinity, workers = _affinity()
+    workers.update(_report("w1@a", memo_hits=3, memo_misses=1))
+    stats = affinity.stats(enabled=True).workers
+
+    assert stats["w1@a"].hit_rate == 0.75
@@ -1,9 +1,16 @@
+import numpy as np
 import pytest
 from app.workers.add_service import add_task
 from app.workers.sub_service import subtract_task
 from app.workers.mul_service import multiply_task
 from app.workers.div_service import divide_task
+from app.workers.div_list_service import divide_list_task
 from app.workers.xsum_service import xsum_task
+from app.workers.xprod_service import xprod_task
+from app.workers.add_batch_service import add_batch_task
+from app.workers.div_batch_service import divide_batch_task
+from app.workers.mul_batch_service import multiply_batch_task
+from app.workers.sub_batch_service import subtract_batch_task
 
 
 def test_add_task():
@@ -78,3 +85,40 @@ def test_add_parametrized(a, b, expected):
 )
 def test_xsum_parametrized(numbers, expected):
     assert xsum_task(numbers) == pytest.approx(expected)
+
+
+def test_batch_tasks():
+    pairs = [[6, 3], [1.5, 0.5], [-4, 2]]
+    assert add_batch_task(pairs) == [9, 2.0, -2]
+    assert subtract_batch_task(pairs) == [3, 1.0, -6]
+    assert multiply_batch_task(pairs) == [18, 0.75, -8]
+    assert divide_batch_task(pairs) == [2.0, 3.0, -2.0]
+    assert add_batch_task([]) == []
+
+
+def test_batch_tasks_invalid_input():
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        divide_batch_task([[1, 1], [1, 0]])
+    with pytest.raises(TypeError, match="lists of two operands"):
+        add_batch_task([[1, 2, 3]])
+
+
+def test_aggregators_unpack_leading_batches():
+    assert xsum_task([[1, 2], [3], 4, 5], batches=2) == 15
+    assert xprod_task([[2, 3], 4], batches=1) == 24
+
+
+def test_tasks_apply_element_wise_to_arrays():
+    assert add_task([1, 2, 3], [10, 20, 30]) == [11, 22, 33]
+    assert subtract_task(10, [1, 2], is_left_fixed=True) == [-9, -8]
+    assert multiply_task([1.5, 2], 2) == [3.0, 4.0]
+    assert divide_task([3, 9], 3) == [1.0, 3.0]
+    assert list(divide_task.run(np.arange(1, 5.0), np.ones(4))) == [1, 2, 3, 4]
+    assert list(divide_list_task.run([np.arange(1, 3.0), np.full(2, 2.0)])) == [
+        0.5,
+        1.0,
+    ]
+    assert xsum_task([[1, 2], 10, [100, 200]]) == [111, 212]
+    assert xprod_task([[1, 2], 3, [4, 5]]) == [12, 30]
+    with pytest.raises(ZeroDivisionError, match="Cannot divide by zero"):
+        divide_task([1, 2], [1, 0])
@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.workers.autoscaler import QueueDepthAutoscaler, ScalingPolicy
+
+
+class FakePool:
+    def __init__(self, processes):
+        self.num_processes = processes
+
+    def grow(self, n):
+        self.num_processes += n
+
+    def shrink(self, n):
+        self.num_processes -= n
+
+    def maintain_pool(self):
+        pass
+
+
+def _worker(*queues):
+    task_consumer = SimpleNamespace(queues=[SimpleNamespace(name=q) for q in queues])
+    return SimpleNamespace(consumer=SimpleNamespace(task_consumer=task_consumer))
+
+
+@pytest.fixture
+def policy():
+    return ScalingPolicy(target_wait_seconds=0.5, idle_seconds=10)
+
+
+def test_policy_grows_to_drain_backlog_in_target_wait(policy):
+    # 200 messages shared by 2 consumers at 10 ms each: 1 s of work per worker.
+    assert policy.target(1, 1, 8, 0, 200, 2, 0.01, 0) == 2
+    assert policy.target(1, 1, 8, 0, 2000, 2, 0.01, 0) == 8
+
+
+def test_policy_shrinks_one_process_at_a_time_after_idle(policy):
+    assert policy.target(6, 1, 8, 0, 0, 1, 0.01, idle_for=5) == 6
+    assert policy.target(6, 1, 8, 0, 0, 1, 0.01, idle_for=10) == 5
+    assert policy.target(1, 1, 8, 0, 0, 1, 0.01, idle_for=60) == 1
+
+
+def test_autoscaler_scales_from_queue_depth():
+    pool = FakePool(1)
+    backlog = {"add_tasks": (1000, 1)}
+    scaler = QueueDepthAutoscaler(
+        pool,
+        max_concurrency=4,
+        min_concurrency=1,
+        worker=_worker("add_tasks"),
+        queue_probe=lambda queue: backlog[queue],
+    )
+    scaler.interval = 0
+
+    scaler.maybe_scale()
+    assert pool.num_processes == 4
+    assert scaler.info()["scale_ups"] == 1
+
+    backlog["add_tasks"] = (0, 1)
+    scaler.policy.idle_seconds = 0
+    scaler.maybe_scale()
+    assert pool.num_processes == 3
+    assert scaler.info()["scale_downs"] == 1
+    assert scaler.info()["backlog"] == 0
+
+
+def test_autoscaler_keeps_pool_when_probe_fails():
+    def failing_probe(queue):
+        raise ConnectionError("broker down")
+
+    pool = FakePool(2)
+    scaler = QueueDepthAutoscaler(
+        pool, 4, 1, worker=_worker("add_tasks"), queue_probe=failing_probe
+    )
+    scaler.interval = 0
+
+    scaler.maybe_scale()
+    assert pool.num_processes == 2
@@ -0,0 +1,108 @@
+import time
+import warnings
+from types import SimpleNamespace
+
+import pytest
+from celery import states
+from celery.app.task import Context
+from celery.backends.redis import RedisBackend
+from celery.exceptions import SoftTimeLimitExceeded, TimeLimitExceeded
+from kombu import Connection
+
+from app.celery import app as celery_app
+from app.workers import add_task
+from app.workers.batch_consumer import BatchConsumer, time_limits
+
+
+@pytest.fixture
+def connection():
+    with Connection("memory://") as connection:
+        yield connection
+
+
+def _send(connection, name, *args, **options):
+    with warnings.catch_warnings():
+        # The suite runs with task_always_eager; these messages must really
+        # go through the broker.
+        warnings.simplefilter("ignore")
+        with celery_app.producer_or_acquire(
+            celery_app.amqp.Producer(connection.default_channel)
+        ) as producer:
+            return celery_app.send_task(
+                name,
+                args,
+                queue=celery_app.tasks[name].queue,
+                producer=producer,
+                **options,
+            )
+
+
+def test_consumer_runs_messages_in_batches(connection):
+    results = [_send(connection, "add_task", i, 1) for i in range(5)]
+    consumer = BatchConsumer("add_tasks", 2, 1, connection=connection)
+
+    consumer.run(idle_timeout=0.05)
+
+    assert [celery_app.backend.get_result(r.id) for r in results] == [1, 2, 3, 4, 5]
+    assert consumer.stats.messages == 5
+    assert consumer.stats.batches == 3
+
+
+def test_consumer_stores_task_failures(connection):
+    failed = _send(connection, "divide_task", 1, 0)
+    consumer = BatchConsumer("div_tasks", 8, 1, connection=connection)
+
+    consumer.run(idle_timeout=0.05)
+
+    assert celery_app.backend.get_state(failed.id) == states.FAILURE
+
+
+def test_redis_results_are_written_in_one_pipeline(connection, fake_redis):
+    backend = RedisBackend(app=celery_app, url="redis://localhost:6379/0")
+    backend.__dict__["client"] = fake_redis
+    backend.store_result("done", 0, states.SUCCESS)
+    backend.store_result("reference", 3, states.SUCCESS, request=Context(group="g"))
+    consumer = BatchConsumer("add_tasks", 8, 1, connection=connection)
+    consumer.app = SimpleNamespace(backend=backend, conf=celery_app.conf)
+    fake_redis.pipelines.clear()
+
+    consumer._store(
+        [
+            ("a", 1, Context()),
+            ("done", 2, Context()),
+            ("b", 3, Context(group="g")),
+        ]
+    )
+
+    assert len(fake_redis.pipelines) == 1
+    written = [key for op, key, _ in fake_redis.pipelines[0] if op == "setex"]
+    assert written == [backend.get_key_for_task("a"), backend.get_key_for_task("b")]
+    assert backend.get_result("done") == 0
+    stored = backend.get_task_meta("b")
+    expected = backend.get_task_meta("reference")
+    assert stored.keys() == expected.keys()
+    for field in ("status", "result", "traceback", "children", "group_id"):
+        assert stored[field] == expected[field]
+
+
+def test_consumer_applies_time_limits(connection, monkeypatch):
+    monkeypatch.setattr(add_task, "run", lambda x, y: time.sleep(1))
+    slow = _send(connection, "add_task", 1, 2, soft_time_limit=0.02)
+    consumer = BatchConsumer("add_tasks", 8, 1, connection=connection)
+
+    consumer.run(idle_timeout=0.05)
+
+    assert celery_app.backend.get_state(slow.id) == states.FAILURE
+    assert isinstance(celery_app.backend.get_result(slow.id), SoftTimeLimitExceeded)
+
+
+def test_hard_limit_follows_the_soft_limit():
+    with pytest.raises(SoftTimeLimitExceeded):
+        with time_limits(0.01, 0.5):
+            time.sleep(1)
+    with pytest.raises(TimeLimitExceeded):
+        with time_limits(0.01, 0.03):
+            try:
+                time.sleep(1)
+            except SoftTimeLimitExceeded:
+                time.sleep(1)
@@ -0,0 +1,89 @@
+import orjson
+import pytest
+
+from app.config import Settings
+from app.services.bulk_evaluator import Checkpoint, read_lines, run
+from app.services.orchestrator import WorkflowOrchestrator
+
+EXPRESSIONS = ["1 + 2", "", "(1+2)*(3+4)", "1/0", "2 ^^ 3", "10 - 4 - 3"]
+EXPECTED = [
+    {"line": 1, "result": 3},
+    {"line": 3, "result": 21},
+    {"line": 4, "error": "Cannot divide by zero"},
+    {"line": 6, "result": 3},
+]
+
+
+def _write_input(tmp_path, expressions=EXPRESSIONS):
+    path = tmp_path / "input.txt"
+    path.write_text("\n".join(expressions) + "\n")
+    return str(path)
+
+
+def _read_output(path):
+    return [orjson.loads(line) for line in open(path, "rb")]
+
+
+def _without_syntax_error(records):
+    # The parser's message for line 5 is not part of what is checked.
+    assert "error" in records[3] and records[3]["line"] == 5
+    return records[:3] + records[4:]
+
+
+def test_lines_are_read_from_an_offset(tmp_path):
+    path = _write_input(tmp_path)
+    lines = list(read_lines(path))
+
+    assert [(line, expression) for line, _, expression in lines] == [
+        (1, "1 + 2"),
+        (3, "(1+2)*(3+4)"),
+        (4, "1/0"),
+        (5, "2 ^^ 3"),
+        (6, "10 - 4 - 3"),
+    ]
+    line, offset, _ = lines[1]
+    assert [item[0] for item in read_lines(path, offset, line)] == [4, 5, 6]
+
+
+@pytest.mark.parametrize("window", [1, 2, 64])
+def test_celery_results_are_written_in_input_order(tmp_path, window):
+    output = str(tmp_path / "output.jsonl")
+    orchestrator = WorkflowOrchestrator(Settings(leaf_batch_size=1))
+
+    evaluated = run(
+        _write_input(tmp_path), output, window=window, orchestrator=orchestrator
+    )
+
+    assert evaluated == 5
+    assert _without_syntax_error(_read_output(output)) == EXPECTED
+
+
+def test_interrupted_run_resumes_from_its_checkpoint(tmp_path, monkeypatch):
+    input_path = _write_input(tmp_path)
+    output = str(tmp_path / "output.jsonl")
+    orchestrator = WorkflowOrchestrator(Settings())
+    submit = orchestrator.submit
+
+    def interrupt_at_line_six(expression):
+        if expression == "10 - 4 - 3":
+            raise KeyboardInterrupt
+        return submit(expression)
+
+    monkeypatch.setattr(orchestrator, "submit", interrupt_at_line_six)
+    with pytest.raises(KeyboardInterrupt):
+        run(input_path, output, window=1, checkpoint_every=3, orchestrator=orchestrator)
+    # Line 5 was written after the last checkpoint and is redone.
+    assert Checkpoint.load(f"{output}.checkpoint").line == 4
+    assert len(_read_output(output)) == 4
+
+    monkeypatch.setattr(orchestrator, "submit", submit)
+    assert run(input_path, output, window=1, orchestrator=orchestrator) == 2
+    assert _without_syntax_error(_read_output(output)) == EXPECTED
+
+
+def test_local_process_pool_matches_celery(tmp_path):
+    output = str(tmp_path / "output.jsonl")
+
+    run(_write_input(tmp_path), output, mode="local", processes=2, chunk_size=2)
+
+    assert _without_syntax_error(_read_output(output)) == EXPECTED
@@ -0,0 +1,92 @@
+import pytest
+from amqp import spec
+from amqp.exceptions import MessageNacked
+from celery.signals import before_task_publish
+from kombu import Connection
+
+from app.celery import ArithmeticCelery, app as celery_app
+from app.config import Settings
+from app.services.bulk_publisher import BulkPublisher, wait_for_confirms
+from app.services.orchestrator import WorkflowOrchestrator
+
+
+class FakeConfirmChannel:
+    def __init__(self, confirms):
+        self.confirms = list(confirms)
+        self.waits = 0
+
+    def wait(self, methods, callback, timeout=None):
+        self.waits += 1
+        callback(*self.confirms.pop(0))
+
+
+def test_wait_for_confirms_covers_single_and_multiple_acks():
+    channel = FakeConfirmChannel(
+        [
+            (spec.Basic.Ack, 5, False),
+            (spec.Basic.Ack, 4, True),
+            (spec.Basic.Ack, 6, False),
+        ]
+    )
+
+    wait_for_confirms(channel, {3, 4, 5, 6}, timeout=1)
+
+    assert channel.waits == 3
+    assert channel.confirms == []
+
+
+def test_wait_for_confirms_raises_on_nack():
+    channel = FakeConfirmChannel(
+        [(spec.Basic.Ack, 1, False), (spec.Basic.Nack, 2, False)]
+    )
+
+    with pytest.raises(MessageNacked):
+        wait_for_confirms(channel, {1, 2}, timeout=1)
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    # The suite runs with task_always_eager; these messages must really go
+    # through a broker.
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", False)
+    app = ArithmeticCelery(broker="memory://", backend="cache+memory://")
+    published = []
+
+    def on_publish(routing_key=None, **kwargs):
+        published.append(routing_key)
+
+    before_task_publish.connect(on_publish, weak=False)
+    yield app, published
+    before_task_publish.disconnect(on_publish)
+
+
+def test_bulk_publisher_sends_every_message_of_the_canvas(broker):
+    app, published = broker
+    orchestrator = WorkflowOrchestrator(Settings(reduction_fan_in=2))
+    workflow = orchestrator.builder.plan(
+        orchestrator.parser.parse("((1+2)*(3+4))/(5-6) + (7*8) - 9 - 10")
+    )
+    publisher = BulkPublisher(bulk=True, app=app)
+
+    publisher.dispatch(workflow)
+
+    stats = publisher.stats()
+    assert stats.workflows == 1
+    assert stats.messages == len(published) > 1
+    with Connection("memory://") as connection:
+        channel = connection.default_channel
+        queued = sum(
+            channel.queue_declare(queue, passive=True).message_count
+            for queue in set(published)
+        )
+    assert queued == len(published)
+
+
+def test_eager_workflows_are_published_as_before():
+    orchestrator = WorkflowOrchestrator(Settings(bulk_publish=True))
+
+    response = orchestrator.calculate("(1+2)*(3+4)")
+
+    assert response.result == 21
+    assert orchestrator.metrics().publishing.workflows == 1
+    assert orchestrator.metrics().publishing.messages == 0
@@ -0,0 +1,172 @@
+import pytest
+from celery.exceptions import TimeoutError as ResultTimeoutError
+
+from app.config import Settings
+from app.services.circuit_breaker import (
+    BreakerState,
+    CircuitBreaker,
+    ConsumerCheck,
+    workflow_queues,
+)
+from app.services.orchestrator import WorkflowOrchestrator
+from app.types.errors import ServiceUnavailableError
+
+
+class FakeConsumers:
+    def __init__(self):
+        self.without_consumers: list[str] = []
+
+    def missing(self, queues):
+        return sorted(set(queues) & set(self.without_consumers))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _breaker(**overrides):
+    clock = FakeClock()
+    consumers = FakeConsumers()
+    settings = Settings(
+        breaker_failure_threshold=3, breaker_reset_seconds=10, **overrides
+    )
+    return CircuitBreaker(settings, consumers=consumers, clock=clock), clock, consumers
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker, _, _ = _breaker()
+
+    for _ in range(2):
+        assert breaker.allow({"add_tasks"})
+        breaker.record_failure("timeout")
+    breaker.record_success(0.01, 0.1)
+    for _ in range(3):
+        breaker.record_failure("timeout")
+
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow({"add_tasks"})
+    stats = breaker.stats(enabled=True)
+    assert (stats.state, stats.trips, stats.last_trip_reason) == ("open", 1, "timeout")
+
+
+def test_slow_workflows_count_as_failures():
+    breaker, _, _ = _breaker(
+        breaker_slow_publish_seconds=0.5, breaker_slow_result_seconds=2.0
+    )
+
+    breaker.record_success(0.6, 0.7)
+    breaker.record_success(None, 2.5)
+    breaker.record_success(0.1, 3.0)
+
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.last_trip_reason == "Result took 3.000s"
+
+
+def test_missing_consumers_open_the_breaker_at_once():
+    breaker, _, consumers = _breaker()
+    consumers.without_consumers = ["mul_tasks"]
+
+    assert breaker.allow({"add_tasks"})
+    assert not breaker.allow({"add_tasks", "mul_tasks"})
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.last_trip_reason == "No consumers on mul_tasks"
+
+
+def test_half_open_probe_closes_or_reopens_the_breaker():
+    breaker, clock, _ = _breaker()
+    for _ in range(3):
+        breaker.record_failure("timeout")
+
+    clock.now = 10
+    assert breaker.allow({"add_tasks"})
+    assert breaker.state == BreakerState.HALF_OPEN
+    # Only one probe at a time.
+    assert not breaker.allow({"add_tasks"})
+    breaker.record_failure("timeout")
+    assert breaker.state == BreakerState.OPEN
+    assert not breaker.allow({"add_tasks"})
+
+    clock.now = 20
+    assert breaker.allow({"add_tasks"})
+    breaker.record_success(0.01, 0.1)
+
+    assert breaker.state == BreakerState.CLOSED
+    assert breaker.allow({"add_tasks"})
+    assert breaker.stats(enabled=True).transitions == {
+        "open": 2,
+        "half_open": 2,
+        "closed": 1,
+    }
+
+
+def test_consumer_check_is_skipped_for_eager_tasks():
+    assert ConsumerCheck(interval=5).missing({"add_tasks"}) == []
+
+
+def test_workflow_queues_cover_headers_and_bodies():
+    orchestrator = WorkflowOrchestrator(Settings(leaf_batch_size=1))
+    workflow = orchestrator.builder.plan(orchestrator.parser.parse("(1+2)*(3-4)*(5+6)"))
+
+    assert workflow_queues(workflow) == {"add_tasks", "sub_tasks", "mul_tasks"}
+
+
+def _degraded_orchestrator(monkeypatch, **overrides):
+    orchestrator = WorkflowOrchestrator(
+        Settings(breaker_enabled=True, breaker_failure_threshold=1, **overrides)
+    )
+    orchestrator.breaker.consumers = FakeConsumers()
+
+    def dispatch(workflow):
+        raise ResultTimeoutError("The operation timed out.")
+
+    monkeypatch.setattr(orchestrator.builder, "dispatch", dispatch)
+    return orchestrator
+
+
+def test_orchestrator_evaluates_locally_when_workers_fail(monkeypatch):
+    orchestrator = _degraded_orchestrator(monkeypatch)
+
+    first = orchestrator.calculate("(1+2)*(3+4)")
+    second = orchestrator.calculate("(2+2)*(3+4)")
+
+    assert (first.result, first.evaluated_locally) == (21, True)
+    assert (second.result, second.evaluated_locally) == (28, True)
+    stats = orchestrator.metrics().circuit_breaker
+    assert (stats.state, stats.trips, stats.fallbacks) == ("open", 1, 2)
+
+
+def test_orchestrator_rejects_large_expressions_while_open(monkeypatch):
+    orchestrator = _degraded_orchestrator(
+        monkeypatch, breaker_fallback_max_operations=2
+    )
+
+    with pytest.raises(ServiceUnavailableError):
+        orchestrator.calculate("1+2+3+4")
+    assert orchestrator.metrics().circuit_breaker.rejected == 1
+
+
+def test_task_error_on_the_probe_closes_the_breaker(monkeypatch):
+    orchestrator = _degraded_orchestrator(monkeypatch, breaker_reset_seconds=0)
+    orchestrator.calculate("1+2")
+    monkeypatch.undo()
+
+    with pytest.raises(ZeroDivisionError):
+        orchestrator.calculate("1/(2-2)")
+    assert orchestrator.metrics().circuit_breaker.state == "closed"
+    response = orchestrator.calculate("(1+2)*(3+4)")
+
+    assert (response.result, response.evaluated_locally) == (21, None)
+    assert orchestrator.metrics().circuit_breaker.state == "closed"
+
+
+def test_healthy_workers_are_not_flagged():
+    orchestrator = WorkflowOrchestrator(Settings(breaker_enabled=True))
+
+    response = orchestrator.calculate("(1+2)*(3+4)")
+
+    assert (response.result, response.evaluated_locally) == (21, None)
+    assert orchestrator.metrics().circuit_breaker.state == "closed"
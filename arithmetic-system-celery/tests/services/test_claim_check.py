@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from app.config import Settings, get_settings
+from app.services.claim_check import (
+    CLAIM_CHECK_KEY,
+    ClaimCheckStore,
+    MmapClaimCheckStore,
+    RedisClaimCheckStore,
+    get_claim_check_store,
+)
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.prepared_expressions import PreparedExpressionService
+
+
+@pytest.fixture
+def mmap_store(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "claim_check_mmap_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "claim_check_min_items", 8)
+    get_claim_check_store.cache_clear()
+    yield get_claim_check_store()
+    get_claim_check_store.cache_clear()
+
+
+def test_only_large_flat_lists_are_offloaded(tmp_path):
+    store = MmapClaimCheckStore(str(tmp_path), min_items=4, ttl_seconds=60)
+
+    assert store.offload([1, 2, 3]) == [1, 2, 3]
+    assert store.offload([[1, 2]] * 4) == [[1, 2]] * 4
+    reference = store.offload([1, 2, 3, 4.5])
+    assert set(reference) == {CLAIM_CHECK_KEY}
+    assert store.offload([1, 2, 3, 4.5]) == reference
+
+    resolved = store.resolve(reference)
+    assert isinstance(resolved, np.memmap)
+    assert resolved.tolist() == [1.0, 2.0, 3.0, 4.5]
+    assert [x.tolist() for x in store.resolve([reference, reference])] == [
+        [1.0, 2.0, 3.0, 4.5]
+    ] * 2
+    assert store.resolve({"x": reference, "y": 2})["x"].tolist() == [1, 2, 3, 4.5]
+
+
+def test_redis_store_resolves_to_array_views(fake_redis):
+    store = RedisClaimCheckStore(fake_redis, min_items=2, ttl_seconds=60)
+
+    resolved = store.resolve(store.offload([0.5, 1.5, 2.5]))
+
+    assert resolved.tolist() == [0.5, 1.5, 2.5]
+    assert not resolved.flags.writeable
+    with pytest.raises(KeyError):
+        store.get("missing")
+
+
+def test_stores_must_implement_put_and_get():
+    with pytest.raises(TypeError):
+        ClaimCheckStore(min_items=2)
+
+
+def test_workflow_arguments_and_results_use_the_side_store(mmap_store, tmp_path):
+    orchestrator = WorkflowOrchestrator(
+        Settings(claim_check_mmap_dir=str(tmp_path), claim_check_min_items=8)
+    )
+    plain = WorkflowOrchestrator(Settings())
+    sum_expression = " + ".join(str(i) for i in range(20)) + " + (1 - 2)"
+    array_expression = f"{list(range(10))} * 3"
+
+    assert orchestrator.calculate(sum_expression).result == pytest.approx(
+        plain.calculate(sum_expression).result
+    )
+    assert orchestrator.calculate(array_expression).result == [
+        float(i * 3) for i in range(10)
+    ]
+    assert len(list(tmp_path.iterdir())) >= 3
+
+
+def test_prepared_bindings_use_the_side_store(mmap_store, tmp_path):
+    service = PreparedExpressionService(
+        Settings(
+            prepared_chunk_size=10,
+            claim_check_mmap_dir=str(tmp_path),
+            claim_check_min_items=8,
+        )
+    )
+    prepared = service.register("x * 2")
+
+    evaluation = service.evaluate(prepared.id, {"x": list(range(25))})
+
+    assert evaluation.result == [float(i * 2) for i in range(25)]
+    assert evaluation.chunks == 3
+    assert list(tmp_path.iterdir())
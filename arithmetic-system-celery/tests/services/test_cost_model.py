@@ -0,0 +1,196 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from celery import Signature
+
+from app.config import Settings
+from app.services.cost_model import (
+    ExecutionMode,
+    TelemetryCostModel,
+    critical_path,
+)
+from app.services.evaluator import evaluate_tree
+from app.services.expression_parser import ExpressionParser, OperationEnum
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.workflow_builder import WorkflowBuilder
+from app.workers import add_task, subtract_task, multiply_task, divide_task
+
+QUEUES = {
+    OperationEnum.ADD: "add_tasks",
+    OperationEnum.SUB: "sub_tasks",
+    OperationEnum.MUL: "mul_tasks",
+    OperationEnum.DIV: "div_tasks",
+}
+
+
+class FakeProbe:
+    def __init__(self, backlog=None):
+        self.backlog = backlog or {}
+        self.calls = 0
+
+    def __call__(self, queue):
+        self.calls += 1
+        return self.backlog.get(queue, (0, 1))
+
+
+def _model(probe=None, **settings):
+    return TelemetryCostModel(Settings(**settings), QUEUES, probe or FakeProbe())
+
+
+def _parse(expression):
+    return ExpressionParser().parse(expression)
+
+
+def test_critical_path_counts_flattened_commutative_chains_once():
+    assert critical_path(_parse("1 + 2 + 3 + 4 + 5")) == 1
+    assert critical_path(_parse("(1 - 2) - 3")) == 2
+    assert critical_path(_parse("(1 * 2 - 3) + 4 + 5")) == 3
+
+
+def test_small_expression_is_evaluated_inline():
+    decision = _model().decide(_parse("(2 + 3) * 4"))
+
+    assert decision.mode == ExecutionMode.INLINE
+    assert decision.operations == 2
+
+
+def test_expression_over_inline_limit_is_fused():
+    model = _model(inline_max_operations=1)
+    decision = model.decide(_parse("((1 - 2) - 3) - 4"))
+
+    assert decision.mode == ExecutionMode.FUSED
+    assert decision.queue == "sub_tasks"
+    assert model.stats(True).decisions["fused"] == 1
+
+
+def test_costly_compute_over_shallow_plan_is_distributed():
+    model = _model(inline_max_operations=0)
+    model.inline_operation.value = 1.0
+    decision = model.decide(_parse("1 + 2 + 3 + 4"))
+
+    assert decision.mode == ExecutionMode.DISTRIBUTED
+    assert decision.hops == 1
+
+
+def test_backlog_is_probed_at_most_once_per_refresh_interval():
+    probe = FakeProbe({"add_tasks": (100, 2)})
+    model = _model(probe, telemetry_refresh_seconds=60)
+
+    first = model.predict(_parse("1 + 2"))
+    model.predict(_parse("3 + 4"))
+
+    assert probe.calls == len(QUEUES)
+    assert model.stats(True).queues["add_tasks"].backlog == 100
+    assert first.predicted_seconds == pytest.approx(model.inline_operation.value)
+
+
+class SlowRefreshSettings:
+    def __init__(self, settings):
+        self.settings = settings
+
+    def __getattr__(self, name):
+        return getattr(self.settings, name)
+
+    @property
+    def telemetry_refresh_seconds(self):
+        # Yield between reading and claiming the refresh to widen the race.
+        time.sleep(0.005)
+        return 60
+
+
+def test_concurrent_predictions_probe_the_backlog_once():
+    probe = FakeProbe()
+    model = TelemetryCostModel(SlowRefreshSettings(Settings()), QUEUES, probe)
+    start = threading.Barrier(8)
+
+    def predict(expression):
+        start.wait()
+        return model.predict(_parse(expression))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(predict, [f"{i} + 1" for i in range(8)]))
+
+    assert probe.calls == len(QUEUES)
+
+
+def test_observations_update_estimates_and_prediction_error():
+    model = _model()
+    decision = model.decide(_parse("1 + 2 * 3"))
+    model.observe(decision, decision.predicted_seconds + 0.5)
+    model.observe(None, 1.0)
+
+    stats = model.stats(True)
+    assert stats.workflows == 2
+    assert stats.mean_absolute_error_seconds == pytest.approx(0.5)
+    assert stats.mean_latency_seconds > 0.5
+    assert stats.inline_operation_seconds > 2e-6
+
+
+def test_builder_follows_planner_per_subtree():
+    model = _model(inline_max_operations=1)
+    builder = WorkflowBuilder(
+        {
+            OperationEnum.ADD: add_task,
+            OperationEnum.SUB: subtract_task,
+            OperationEnum.MUL: multiply_task,
+            OperationEnum.DIV: divide_task,
+        },
+        planner=model,
+    )
+
+    assert builder.plan(_parse("2 * 3")) == 6
+    fused = builder.plan(_parse("(1 + 2) * (3 - 4)"))
+    assert isinstance(fused, Signature)
+    assert builder.describe(fused) == "evaluate_expression_task(?)"
+    assert fused.args == ("((1 + 2) * (3 - 4))",)
+    assert fused.options["queue"] == "mul_tasks"
+
+
+def test_to_expression_round_trips_through_parser():
+    tree = _parse("2 * (3 + -4.5) / (0 - (1 - 7))")
+    rendered = tree.to_expression()
+
+    assert _parse(rendered) == tree
+    assert evaluate_tree(_parse(rendered)) == pytest.approx(-0.5)
+    with pytest.raises(ZeroDivisionError):
+        evaluate_tree(_parse("1 / (2 - 2)"))
+
+
+def test_to_expression_writes_floats_without_exponents():
+    tree = _parse("(1 + 0.00001) * (2 - 100000000000000000000.5) / -0.0000003")
+    rendered = tree.to_expression()
+
+    assert "e" not in rendered
+    assert _parse(rendered) == tree
+    assert evaluate_tree(_parse(rendered)) == pytest.approx(evaluate_tree(tree))
+
+
+def test_orchestrator_reports_planner_metrics():
+    orchestrator = WorkflowOrchestrator(
+        Settings(adaptive_planner=True, inline_max_operations=2)
+    )
+    orchestrator.cost_model.queue_probe = FakeProbe()
+
+    assert orchestrator.calculate("(1 + 2) * 3").result == 9
+    assert (
+        orchestrator.calculate("(1 + 2) * 3", describe=True).workflow == "constant(9)"
+    )
+    assert orchestrator.calculate("((1 + 2) * 3 - 4) / 5").result == 1
+
+    planner = orchestrator.metrics().planner
+    assert planner.enabled
+    assert planner.workflows == 3
+    assert planner.decisions["inline"] == 2
+    assert planner.decisions["fused"] == 1
+
+
+def test_static_configuration_still_reports_latency():
+    orchestrator = WorkflowOrchestrator(Settings())
+    orchestrator.calculate("4 - 1")
+
+    planner = orchestrator.metrics().planner
+    assert not planner.enabled
+    assert planner.workflows == 1
+    assert sum(planner.decisions.values()) == 0
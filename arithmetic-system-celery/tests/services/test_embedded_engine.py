@@ -0,0 +1,47 @@
+import pytest
+
+from app.config import Settings
+from app.services.embedded_engine import EmbeddedEngine
+from app.services.orchestrator import WorkflowOrchestrator
+
+EXPRESSIONS = [
+    "7",
+    "1 + 2",
+    "(1 + 2) * (3 - 4)",
+    "((1 + 2) * 3 - 4) / 5",
+    "(1 - 2) - (3 - 4)",
+    "2 * 3 + 4 * 5 + 6 - 1",
+    "10 - (2 + 3 + 4) * 2",
+    " + ".join(f"({i} * {i} - 1)" for i in range(40)),
+]
+
+
+@pytest.fixture
+def orchestrator():
+    return WorkflowOrchestrator(Settings(execution_mode="embedded"))
+
+
+@pytest.mark.parametrize("expression", EXPRESSIONS)
+def test_engine_matches_celery_execution(expression):
+    distributed = WorkflowOrchestrator(Settings())
+    workflow = distributed.builder.plan(distributed.parser.parse(expression))
+
+    expected = distributed.builder.dispatch(workflow).get()
+    assert EmbeddedEngine().execute(workflow) == pytest.approx(expected)
+
+
+def test_embedded_mode_never_dispatches(orchestrator, monkeypatch):
+    def fail_dispatch(workflow):
+        raise AssertionError("embedded mode must not dispatch to Celery")
+
+    monkeypatch.setattr(orchestrator.builder, "dispatch", fail_dispatch)
+
+    response = orchestrator.calculate("(1 + 2) * (3 - 4)", describe=True)
+    assert response.result == -3
+    assert response.summary.chords == 1
+    assert response.workflow.startswith("chord(")
+
+
+def test_embedded_mode_raises_task_errors(orchestrator):
+    with pytest.raises(ZeroDivisionError):
+        orchestrator.calculate("1 / (2 - 2)")
@@ -3,7 +3,10 @@ from app.services.expression_parser import (
     ExpressionParser,
     ExpressionNode,
     OperationEnum,
+    VariableNode,
+    collect_variables,
 )
+from app.types.errors import ExpressionSyntaxError, UnsupportedNodeError
 
 
 @pytest.fixture
@@ -125,3 +128,31 @@ def test_parse_complex_expression(parser):
     assert right.left.operation == OperationEnum.MUL
     assert right.left.left == 3
     assert right.left.right.operation == OperationEnum.SUB
+
+
+def test_parse_variables_rejected_by_default(parser):
+    with pytest.raises(ExpressionSyntaxError, match="invalid characters"):
+        parser.parse("x + 1")
+
+
+def test_parse_variables_when_allowed():
+    tree = ExpressionParser(allow_variables=True).parse("price * (1 + rate) - -x")
+    assert tree.operation == OperationEnum.SUB
+    assert tree.left.left == VariableNode("price")
+    assert tree.left.right.right == VariableNode("rate")
+    assert tree.right.right == VariableNode("x")
+    assert collect_variables(tree) == ["price", "rate", "x"]
+
+
+def test_parse_variables_rejects_operands_split_by_spaces():
+    parser = ExpressionParser(allow_variables=True)
+    for expression in ("a b + c", "price 2", "1 .5 * x"):
+        with pytest.raises(ExpressionSyntaxError, match="separated by an operator"):
+            parser.parse(expression)
+
+
+def test_parse_variables_rejects_non_numeric_constants():
+    parser = ExpressionParser(allow_variables=True)
+    for expression in ("None + 1", "True * x", "2 * 3j"):
+        with pytest.raises(UnsupportedNodeError):
+            parser.parse(expression)
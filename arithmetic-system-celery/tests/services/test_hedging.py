@@ -0,0 +1,115 @@
+import itertools
+import time
+
+from app.config import Settings
+from app.services.hedging import HedgedExecutor, LatencyTracker, workflow_task_ids
+from app.services.orchestrator import WorkflowOrchestrator
+
+_ids = itertools.count()
+
+
+class FakeResult:
+    def __init__(self, task_id, delay, value):
+        self.id = task_id
+        self.ready_at = time.perf_counter() + delay
+        self.value = value
+
+    def ready(self):
+        return time.perf_counter() >= self.ready_at
+
+    def get(self, timeout=None):
+        time.sleep(max(self.ready_at - time.perf_counter(), 0))
+        return self.value
+
+
+class FakeWorkflow:
+    def __init__(self, delay, value):
+        self.delay = delay
+        self.value = value
+        self.options = {}
+
+    def freeze(self):
+        self.options["task_id"] = f"task-{next(_ids)}"
+
+    def apply_async(self):
+        return FakeResult(self.options["task_id"], self.delay, self.value)
+
+
+def _executor(revoked, **settings):
+    settings = Settings(hedge_min_samples=5, hedge_poll_interval=0.001, **settings)
+    executor = HedgedExecutor(settings, revoke=revoked.extend)
+    for _ in range(5):
+        executor.tracker.record("shape", 0.01)
+    return executor
+
+
+def _copies(*workflows):
+    return iter(workflows).__next__
+
+
+def test_tracker_needs_min_samples_before_giving_threshold():
+    tracker = LatencyTracker(window=4, min_samples=2)
+    tracker.record("a", 0.5)
+    assert tracker.threshold("a", 95) is None
+
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        tracker.record("a", seconds)
+    assert tracker.threshold("a", 50) == 0.3
+    assert tracker.threshold("b", 50) is None
+
+
+def test_fast_workflow_is_not_hedged():
+    revoked = []
+    executor = _executor(revoked)
+
+    assert executor.run("shape", _copies(FakeWorkflow(0, 1)), timeout=1) == 1
+    assert executor.hedged == 0
+    assert revoked == []
+
+
+def test_straggler_is_hedged_and_loser_revoked():
+    revoked = []
+    executor = _executor(revoked)
+    straggler, backup = FakeWorkflow(1.0, "slow"), FakeWorkflow(0, "fast")
+
+    started = time.perf_counter()
+    assert executor.run("shape", _copies(straggler, backup), timeout=3) == "fast"
+    assert time.perf_counter() - started < 0.5
+    assert revoked == [straggler.options["task_id"]]
+
+    stats = executor.stats(True)
+    assert stats.hedged == stats.hedge_wins == 1
+    assert stats.hedge_rate == 1.0
+
+
+def test_original_can_still_win_after_hedging():
+    revoked = []
+    executor = _executor(revoked)
+    original, backup = FakeWorkflow(0.05, "original"), FakeWorkflow(1.0, "backup")
+
+    assert executor.run("shape", _copies(original, backup), timeout=3) == "original"
+    assert revoked == [backup.options["task_id"]]
+    assert executor.hedged == 1
+    assert executor.hedge_wins == 0
+
+
+def test_workflow_task_ids_covers_every_task_of_a_chord():
+    orchestrator = WorkflowOrchestrator(Settings())
+    workflow = orchestrator.builder.plan(orchestrator.parser.parse("(1 - 2) - (3 - 4)"))
+    final = workflow.freeze()
+
+    task_ids = workflow_task_ids(workflow)
+    assert len(task_ids) == 3
+    assert task_ids[-1] == final.id
+
+
+def test_orchestrator_runs_workflows_through_hedger():
+    orchestrator = WorkflowOrchestrator(Settings(hedge_enabled=True))
+
+    assert orchestrator.calculate("(1 - 2) - (3 - 4)").result == 0
+    assert orchestrator.calculate("(1 + 2) * 3").result == 9
+
+    hedging = orchestrator.metrics().hedging
+    assert hedging.enabled
+    assert hedging.workflows == 2
+    assert hedging.p99_seconds > 0
@@ -0,0 +1,108 @@
+import time
+from types import SimpleNamespace
+
+from celery import chord
+
+from app.config import Settings
+from app.services.load_router import LoadAwareRouter
+from app.services.orchestrator import WorkflowOrchestrator
+from app.workers import load_reporter
+
+
+def _report(
+    hostname, backlog=0, busy_seconds=0.0, queues=("add_tasks",), concurrency=1
+):
+    return {
+        "hostname": hostname,
+        "queues": list(queues),
+        "backlog": backlog,
+        "concurrency": concurrency,
+        "busy_seconds": busy_seconds,
+    }
+
+
+def test_tasks_go_to_the_least_loaded_replica():
+    router = LoadAwareRouter(stale_after=10)
+    router.update(_report("w1@a", backlog=1, busy_seconds=2.0, concurrency=2))
+    router.update(_report("w2@b", backlog=1, busy_seconds=0.1, concurrency=2))
+    router.update(_report("w3@c", backlog=0, queues=("mul_tasks",)))
+
+    assert router.choose("add_tasks") == "w2@b"
+
+
+def test_replicas_only_take_messages_for_their_free_slots():
+    router = LoadAwareRouter(stale_after=10)
+    router.update(_report("w1@a", concurrency=2))
+    router.update(_report("w2@b"))
+
+    chosen = [router.choose("add_tasks") for _ in range(4)]
+
+    assert chosen[:3].count("w1@a") == 2 and "w2@b" in chosen[:3]
+    assert chosen[3] is None
+    router.update(_report("w2@b"))
+    assert router.choose("add_tasks") == "w2@b"
+
+
+def test_shared_queue_without_two_fresh_replicas():
+    router = LoadAwareRouter(stale_after=10)
+    router.update(_report("w1@a"))
+    router.update(_report("w2@b"))
+    router._workers["w2@b"].seen = time.monotonic() - 60
+
+    assert router.choose("add_tasks") is None
+    router.remove({"hostname": "w1@a"})
+    assert router.choose("add_tasks") is None
+    assert router.stats(enabled=True).shared == 2
+
+
+def test_builder_routes_tasks_published_right_away():
+    router = LoadAwareRouter(stale_after=10)
+    for hostname in ("w1@a", "w2@b"):
+        router.update(
+            _report(
+                hostname, queues=("add_tasks", "mul_tasks", "sub_tasks"), concurrency=4
+            )
+        )
+    orchestrator = WorkflowOrchestrator(Settings(leaf_batch_size=1))
+    builder = orchestrator.builder
+    builder.router = router
+    workflow = builder.plan(orchestrator.parser.parse("(1+2)*(3+4)*(5+6)"))
+    assert isinstance(workflow, chord)
+
+    builder.route(workflow)
+
+    assert {task.options.get("routing_key") for task in workflow.tasks} == {
+        "w1@a",
+        "w2@b",
+    }
+    assert all(task.options["exchange"] == "C.dq2" for task in workflow.tasks)
+    assert "routing_key" not in workflow.body.options
+
+    router.remove({"hostname": "w2@b"})
+    builder.route(workflow)
+    assert all("routing_key" not in task.options for task in workflow.tasks)
+
+
+def test_workers_report_backlog_and_busy_time(monkeypatch):
+    request = SimpleNamespace(time_start=time.monotonic() - 3)
+    monkeypatch.setattr(load_reporter.state, "active_requests", [request])
+    monkeypatch.setattr(load_reporter.state, "reserved_requests", [request, object()])
+    consumer = SimpleNamespace(
+        pool=SimpleNamespace(num_processes=4),
+        task_consumer=SimpleNamespace(
+            queues=[SimpleNamespace(name="add_tasks"), SimpleNamespace(name="w1@a.dq2")]
+        ),
+    )
+    monkeypatch.setattr(load_reporter, "_consumer", consumer)
+    sent = []
+    heart = SimpleNamespace(
+        eventer=SimpleNamespace(send=lambda type, **fields: sent.append((type, fields)))
+    )
+
+    load_reporter.report_load(sender=heart)
+
+    [(event_type, report)] = sent
+    assert event_type == "worker-load"
+    assert report["queues"] == ["add_tasks", "w1@a.dq2"]
+    assert (report["backlog"], report["concurrency"]) == (2, 4)
+    assert 3 <= report["busy_seconds"] < 60
@@ -0,0 +1,54 @@
+import pytest
+
+from app.services.memory_stats import MemoryStatsStore
+from app.workers import add_task, memory_monitor
+
+
+def test_task_stats_aggregate_samples(fake_redis):
+    store = MemoryStatsStore(fake_redis)
+    store.record_task("add_task", 1000, 0)
+    store.record_task("add_task", 3000, 8)
+    store.record_task("mul_task", 500, 0)
+
+    by_task = {stats.task: stats for stats in store.task_stats()}
+
+    assert by_task["add_task"].samples == 2
+    assert by_task["add_task"].mean_peak_bytes == 2000
+    assert by_task["add_task"].max_peak_bytes == 3000
+    assert by_task["add_task"].mean_rss_growth_kib == 4
+    assert by_task["mul_task"].samples == 1
+
+
+def test_process_starts_are_counted_per_host(fake_redis):
+    store = MemoryStatsStore(fake_redis)
+    store.record_process_start("worker-a")
+    store.record_process_start("worker-a")
+    store.record_process_start("worker-b")
+
+    assert store.process_starts() == {"worker-a": 2, "worker-b": 1}
+
+
+@pytest.fixture
+def sampled_store(monkeypatch, fake_redis):
+    store = MemoryStatsStore(fake_redis)
+    monkeypatch.setattr(memory_monitor, "_store", store)
+    settings = memory_monitor.get_settings()
+    monkeypatch.setattr(settings, "task_memory_sample_rate", 1.0)
+    return store
+
+
+def test_sampled_tasks_report_memory(sampled_store):
+    assert add_task.delay(2, 3).get() == 5
+
+    [stats] = sampled_store.task_stats()
+    assert stats.task == add_task.name
+    assert stats.samples == 1
+    assert stats.max_peak_bytes >= 0
+
+
+def test_unsampled_tasks_report_nothing(sampled_store, monkeypatch):
+    monkeypatch.setattr(memory_monitor.get_settings(), "task_memory_sample_rate", 0.0)
+
+    add_task.delay(2, 3).get()
+
+    assert sampled_store.task_stats() == []
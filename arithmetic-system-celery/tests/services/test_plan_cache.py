@@ -0,0 +1,120 @@
+import json
+
+import pytest
+from celery import Signature
+
+from app.config import Settings
+from app.models.models import WorkflowSummary
+from app.services.lru_cache import LRUCache
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.plan_cache import CachedPlan, PlanCache, clone_workflow
+from app.workers import add_task, xsum_task
+
+
+@pytest.fixture
+def orchestrator():
+    return WorkflowOrchestrator(Settings(plan_cache_size=2))
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+    assert cache.hits == 3
+
+
+def test_lru_cache_with_zero_capacity_stores_nothing():
+    cache = LRUCache(0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert cache.misses == 1
+
+
+def test_clone_workflow_returns_independent_signature():
+    workflow = add_task.s(1, 2) | xsum_task.s()
+    clone = clone_workflow(workflow)
+
+    assert isinstance(clone, Signature)
+    assert json.dumps(clone) == json.dumps(workflow)
+    assert clone is not workflow
+    assert clone.tasks[0] is not workflow.tasks[0]
+    assert clone_workflow(42) == 42
+
+
+def test_plan_cache_returns_fresh_clone_and_tracks_saved_time():
+    cache = PlanCache(4)
+    plan = CachedPlan(
+        tree=None,
+        workflow=add_task.s(1, 2),
+        summary=WorkflowSummary(tasks=1, chords=0, depth=1, shape_hash="0" * 16),
+        plan_seconds=0.5,
+    )
+    cache.put("1+2", plan)
+
+    first = cache.get("1+2")
+    second = cache.get("1+2")
+    cache.record_dispatch(first)
+    cache.record_dispatch(plan)
+    assert first.workflow.task == plan.workflow.task
+    assert list(first.workflow.args) == [1, 2]
+    assert first.workflow is not second.workflow
+    assert cache.get("3+4") is None
+
+    # Only dispatched plans count; second and the failed lookup do not.
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.hit_rate == pytest.approx(0.5)
+    assert stats.saved_seconds == pytest.approx(0.5)
+
+
+def test_orchestrator_reuses_plan_for_equivalent_expressions(orchestrator):
+    first = orchestrator.calculate("(1 + 2) * 3")
+    second = orchestrator.calculate("(1+2)*3")
+
+    assert first.result == second.result == 9
+    assert first.summary == second.summary
+    stats = orchestrator.metrics().plan_cache
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.size == 1
+    assert stats.saved_seconds > 0
+
+
+def test_replanned_hits_save_no_planning_time():
+    orchestrator = WorkflowOrchestrator(Settings(subtree_reuse=True))
+    orchestrator.calculate("(1 + 2) * 3")
+    orchestrator.calculate("(1 + 2) * 3")
+
+    stats = orchestrator.metrics().plan_cache
+    assert (stats.hits, stats.replanned, stats.misses) == (0, 1, 1)
+    assert stats.hit_rate == 0.0
+    assert stats.saved_seconds == 0.0
+
+
+def test_metrics_endpoint_reports_plan_cache(client):
+    client.get("/api/calculate", params={"expression": "7 * 6"})
+    client.get("/api/calculate", params={"expression": "7 * 6"})
+
+    response = client.get("/api/metrics")
+    assert response.status_code == 200
+    plan_cache = response.json()["plan_cache"]
+    assert plan_cache["hits"] >= 1
+    assert 0 < plan_cache["hit_rate"] <= 1
+
+
+def test_workflow_description_is_truncated():
+    orchestrator = WorkflowOrchestrator(Settings(workflow_description_max_chars=20))
+    expression = " + ".join(f"({i} - 1)" for i in range(10))
+
+    response = orchestrator.calculate(expression, describe=True)
+    assert response.result == 35
+    assert len(response.workflow) == 23
+    assert response.workflow.endswith("...")
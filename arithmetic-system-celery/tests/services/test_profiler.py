@@ -0,0 +1,102 @@
+import pstats
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from app.config import get_settings
+from app.services.profiler import ProfileMode, ProfileStore, get_profile_store
+from app.types.errors import ProfileNotFoundError
+from app.workers import add_task
+from app.workers import task_profiler  # noqa: F401
+
+
+def _busy():
+    return sum(i * i for i in range(200_000))
+
+
+# cProfile records every thread of the interpreter, so the profiled block runs
+# in a fresh one where stray threads (e.g. idle anyio workers) cannot garble it.
+PROFILE_IN_FRESH_INTERPRETER = textwrap.dedent(
+    """
+    import sys
+
+    from app.services.profiler import ProfileMode, ProfileStore
+
+
+    def _busy_profiled_in_isolation():
+        return sum(i * i for i in range(200_000))
+
+
+    store = ProfileStore(sys.argv[1])
+    with store.profile("request", "calculate", ProfileMode.CPROFILE) as captured:
+        _busy_profiled_in_isolation()
+    print(captured[0])
+    """
+)
+
+
+def test_cprofile_output_is_readable_with_pstats(tmp_path):
+    store = ProfileStore(str(tmp_path))
+
+    captured = subprocess.run(
+        [sys.executable, "-c", PROFILE_IN_FRESH_INTERPRETER, str(tmp_path)],
+        cwd=Path(__file__).parents[2],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+
+    [profile] = store.list()
+    assert captured == [profile.name]
+    assert (profile.kind, profile.target, profile.mode) == (
+        "request",
+        "calculate",
+        "cprofile",
+    )
+    stats = pstats.Stats(store.path(profile.name)).stats
+    [cumulative] = [
+        cumulative
+        for (_, _, function), (_, _, _, cumulative, _) in stats.items()
+        if function == "_busy_profiled_in_isolation"
+    ]
+    assert cumulative > 0
+
+
+def test_sampled_stacks_are_folded(tmp_path):
+    store = ProfileStore(str(tmp_path), sample_interval_ms=0.5)
+
+    with store.profile("request", "calculate", ProfileMode.SAMPLE) as captured:
+        _busy()
+
+    with open(store.path(captured[0])) as f:
+        lines = f.read().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("test_profiler:_busy" in line for line in lines)
+
+
+def test_only_profiles_in_the_directory_can_be_opened(tmp_path):
+    store = ProfileStore(str(tmp_path))
+    (tmp_path / "notes.txt").write_text("not a profile")
+
+    for name in ("notes.txt", "../1-task-x.pstats", "1-task-missing.pstats"):
+        with pytest.raises(ProfileNotFoundError):
+            store.path(name)
+
+
+def test_worker_tasks_are_profiled_at_the_sample_rate(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "task_profile_sample_rate", 1.0)
+    get_profile_store.cache_clear()
+    try:
+        assert add_task.delay(1, 2).get() == 3
+        [profile] = get_profile_store().list()
+    finally:
+        get_profile_store.cache_clear()
+
+    assert (profile.kind, profile.target) == ("task", add_task.name)
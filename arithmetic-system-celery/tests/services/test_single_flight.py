@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from app.config import Settings
+from app.models.models import WorkflowSummary
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.single_flight import (
+    InFlightWorkflow,
+    RedisInFlightRegistry,
+    SingleFlight,
+)
+from app.celery import app as celery_app
+
+
+SUMMARY = WorkflowSummary(tasks=1, chords=0, depth=1, shape_hash="0" * 16)
+
+
+def _run_concurrently(single_flight, fn, callers, results):
+    threads = [
+        threading.Thread(target=lambda: results.append(single_flight.do("k", fn)))
+        for _ in range(callers)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return 42
+
+    results = []
+    threads = _run_concurrently(single_flight, slow_call, 1, results)
+    started.wait(timeout=5)
+    more_threads = _run_concurrently(single_flight, slow_call, 4, results)
+    deadline = time.monotonic() + 5
+    while single_flight.followers < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads + more_threads:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [42] * 5
+    stats = single_flight.stats()
+    assert stats.leaders == 1
+    assert stats.followers == 4
+    assert stats.coalescing_rate == pytest.approx(0.8)
+
+
+def test_single_flight_shares_errors_and_forgets_finished_calls():
+    single_flight = SingleFlight()
+
+    with pytest.raises(ZeroDivisionError):
+        single_flight.do("k", lambda: 1 / 0)
+    assert single_flight.do("k", lambda: 7) == 7
+    assert single_flight.leaders == 2
+
+
+def test_registry_only_releases_its_own_claim(fake_redis):
+    registry = RedisInFlightRegistry(fake_redis, ttl_seconds=3)
+    mine = InFlightWorkflow("task-1", SUMMARY)
+    theirs = InFlightWorkflow("task-2", SUMMARY)
+
+    assert registry.claim("1+2", mine)
+    assert not registry.claim("1+2", theirs)
+    registry.release("1+2", theirs)
+    assert registry.lookup("1+2") == mine
+    registry.release("1+2", mine)
+    assert registry.lookup("1+2") is None
+
+
+def test_orchestrator_joins_workflow_of_another_replica(fake_redis):
+    orchestrator = WorkflowOrchestrator(Settings())
+    orchestrator.in_flight_registry = RedisInFlightRegistry(fake_redis, 3)
+    celery_app.backend.store_result("remote-task", 3, "SUCCESS")
+    orchestrator.in_flight_registry.claim(
+        "1+2", InFlightWorkflow("remote-task", SUMMARY)
+    )
+
+    response = orchestrator.calculate("1 + 2")
+
+    assert response.result == 3
+    assert response.summary == SUMMARY
+    stats = orchestrator.metrics().single_flight
+    assert (stats.leaders, stats.remote_followers) == (0, 1)
+    assert stats.coalescing_rate == 1.0
+    assert orchestrator.metrics().plan_cache.misses == 0
+
+    described = orchestrator.calculate("1 + 2", describe=True)
+    assert described.result == 3
+    assert described.workflow == "add_task(1, 2)"
+    # Planned only to be described, never dispatched.
+    plan_cache = orchestrator.metrics().plan_cache
+    assert (plan_cache.hits, plan_cache.misses) == (0, 0)
+
+
+def test_orchestrator_registers_and_releases_its_workflow(fake_redis):
+    orchestrator = WorkflowOrchestrator(Settings())
+    orchestrator.in_flight_registry = RedisInFlightRegistry(fake_redis, 3)
+
+    assert orchestrator.calculate("2 * 3").result == 6
+    assert [command[0] for command in fake_redis.commands] == ["set", "delete"]
+    assert fake_redis.data == {}
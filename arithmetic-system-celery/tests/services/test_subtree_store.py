@@ -0,0 +1,95 @@
+import pytest
+
+from app.config import Settings
+from app.services.evaluator import evaluate_tree
+from app.services.expression_parser import ExpressionNode, ExpressionParser
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.subtree_store import RedisSubtreeResultStore, get_subtree_store
+
+# Workers import the recorder through the Celery app's include list.
+from app.workers import subtree_recorder  # noqa: F401
+
+EXPRESSION = "((1 - 2) - (3 - 4)) * ((5 - 6) - (7 / 8)) + (9 - 10) * 11"
+EDITED = "((1 - 2) - (3 - 4)) * ((5 - 6) - (7 / 8)) + (9 - 10) * 12"
+
+
+@pytest.fixture(autouse=True)
+def fresh_store():
+    get_subtree_store.cache_clear()
+    yield
+    get_subtree_store.cache_clear()
+
+
+def _subtrees(node):
+    if not isinstance(node, ExpressionNode):
+        return []
+    return [node] + _subtrees(node.left) + _subtrees(node.right)
+
+
+def test_content_hash_changes_only_along_the_edited_path():
+    parser = ExpressionParser()
+    original = parser.parse(EXPRESSION)
+    edited = parser.parse(EDITED)
+
+    assert original.content_hash != edited.content_hash
+    assert original.left.content_hash == edited.left.content_hash
+    assert original.right.left.content_hash == edited.right.left.content_hash
+    assert (
+        parser.parse("(1 - 2) * 3").left.content_hash
+        == parser.parse("4 + (1 - 2)").right.content_hash
+    )
+
+
+@pytest.mark.parametrize("execution_mode", ["distributed", "embedded"])
+def test_recorded_values_match_their_subtrees(execution_mode):
+    orchestrator = WorkflowOrchestrator(
+        Settings(subtree_reuse=True, execution_mode=execution_mode)
+    )
+    orchestrator.calculate(EXPRESSION)
+
+    subtrees = _subtrees(orchestrator.parser.parse(EXPRESSION))
+    known = get_subtree_store().get_many([node.content_hash for node in subtrees])
+    by_hash = {node.content_hash: node for node in subtrees}
+    assert subtrees[0].content_hash in known
+    assert len(known) > 1
+    for subtree_hash, value in known.items():
+        assert value == pytest.approx(evaluate_tree(by_hash[subtree_hash]))
+
+
+def test_edited_expression_dispatches_only_the_changed_parts():
+    orchestrator = WorkflowOrchestrator(Settings(subtree_reuse=True))
+    scratch = WorkflowOrchestrator(Settings())
+
+    first = orchestrator.calculate(EXPRESSION)
+    edited = orchestrator.calculate(EDITED)
+    expected = scratch.calculate(EDITED)
+
+    assert edited.result == pytest.approx(expected.result)
+    assert edited.summary.tasks < expected.summary.tasks
+    assert first.summary.tasks == expected.summary.tasks
+
+    stats = orchestrator.metrics().subtree_reuse
+    assert stats.enabled
+    assert stats.reused > 0
+    assert 0 < stats.dispatch_savings < 1
+    assert stats.saved_operations > 0
+
+
+def test_resubmitted_expression_is_answered_from_the_store():
+    orchestrator = WorkflowOrchestrator(Settings(subtree_reuse=True))
+
+    first = orchestrator.calculate(EXPRESSION)
+    again = orchestrator.calculate(EXPRESSION)
+
+    assert again.result == first.result
+    assert again.summary.tasks == 0
+
+
+def test_redis_store_round_trips_values(fake_redis):
+    store = RedisSubtreeResultStore(fake_redis, ttl_seconds=60)
+    store.put_many({"a": 1.5, "b": -2})
+
+    assert store.get_many(["a", "b", "c"]) == {"a": 1.5, "b": -2}
+    assert RedisSubtreeResultStore(fake_redis, ttl_seconds=60).get_many(["a"]) == {
+        "a": 1.5
+    }
@@ -0,0 +1,134 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import Settings, get_settings
+from app.services.orchestrator import WorkflowOrchestrator
+from app.services.tracing import (
+    TRACE_HEADER,
+    FileSpanExporter,
+    InMemorySpanExporter,
+    Span,
+    Tracer,
+    critical_path,
+    format_critical_path,
+    get_tracer,
+    inject_trace_context,
+    read_spans,
+)
+from app.workers import task_tracer  # noqa: F401
+
+
+@pytest.fixture
+def tracing(monkeypatch):
+    monkeypatch.setattr(get_settings(), "tracing_enabled", True)
+    get_tracer.cache_clear()
+    yield get_tracer()
+    get_tracer.cache_clear()
+
+
+def test_eager_tasks_join_the_trace_of_the_request(tracing):
+    orchestrator = WorkflowOrchestrator(Settings(tracing_enabled=True))
+
+    response = orchestrator.calculate("(1+2)*(3+4)")
+
+    spans = tracing.exporter.spans(response.trace_id)
+    by_id = {span.span_id: span for span in spans}
+    names = {span.name for span in spans}
+    assert {"calculate", "plan", "execute"} <= names
+    tasks = [span for span in spans if "queue_wait_seconds" in span.attributes]
+    assert tasks
+    for task in tasks:
+        assert task.attributes["state"] == "SUCCESS"
+        assert by_id[task.parent_id].name in ("execute", *(t.name for t in tasks))
+    assert [span.name for span in critical_path(spans)][:2] == ["calculate", "execute"]
+
+
+def test_published_messages_carry_the_current_span(tracing):
+    headers = {}
+    with tracing.span("execute") as span:
+        inject_trace_context(headers=headers)
+
+    context = headers[TRACE_HEADER]
+    assert (context["trace_id"], context["parent_id"]) == (span.trace_id, span.span_id)
+
+    task_span, token = tracing.start_task_span(
+        "add", {**context, "published_at": context["published_at"] - 0.5}
+    )
+    tracing.finish_task_span(task_span, token)
+    assert task_span.parent_id == span.span_id
+    assert task_span.attributes["queue_wait_seconds"] >= 0.5
+    assert task_span.attributes["execution_seconds"] == pytest.approx(
+        task_span.duration - task_span.attributes["queue_wait_seconds"]
+    )
+
+
+def _worker_task(context):
+    request = SimpleNamespace(
+        is_eager=False, headers={TRACE_HEADER: context}, delivery_info={}
+    )
+    return SimpleNamespace(name="add_task", request=request)
+
+
+def test_workers_record_spans_only_to_a_trace_file(tmp_path, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "tracing_enabled", True)
+    context = {"trace_id": "t" * 32, "parent_id": "p" * 16, "published_at": 0.0}
+    try:
+        for trace_file in (None, str(tmp_path / "traces.jsonl")):
+            monkeypatch.setattr(settings, "trace_file", trace_file)
+            get_tracer.cache_clear()
+            task_tracer.start_task_span("task-1", _worker_task(context))
+            task_tracer.finish_task_span("task-1", state="SUCCESS")
+            if trace_file is None:
+                assert get_tracer().exporter.spans("t" * 32) == []
+    finally:
+        get_tracer.cache_clear()
+
+    [span] = read_spans(str(tmp_path / "traces.jsonl"))["t" * 32]
+    assert (span.name, span.parent_id) == ("add_task", "p" * 16)
+
+
+def test_messages_outside_a_trace_are_left_alone():
+    headers = {}
+    inject_trace_context(headers=headers)
+    assert headers == {}
+
+
+def test_critical_path_follows_the_child_that_finished_last():
+    spans = [
+        Span("t", "root", None, "calculate", 0.0, 10.0),
+        Span("t", "plan", "root", "plan", 0.0, 1.0),
+        Span("t", "exec", "root", "execute", 1.0, 10.0),
+        Span("t", "a", "exec", "add", 1.0, 3.0),
+        Span("t", "b", "exec", "add", 1.0, 6.0),
+        Span("t", "body", "b", "xsum", 6.0, 9.0),
+    ]
+
+    assert [span.span_id for span in critical_path(spans)] == [
+        "root",
+        "exec",
+        "b",
+        "body",
+    ]
+
+
+def test_file_exporter_round_trips_for_the_viewer(tmp_path):
+    path = str(tmp_path / "traces.jsonl")
+    tracer = Tracer(FileSpanExporter(path))
+    with tracer.span("calculate") as root:
+        with tracer.span("execute"):
+            pass
+
+    traces = read_spans(path)
+    assert list(traces) == [root.trace_id]
+    assert "calculate" in format_critical_path(traces[root.trace_id])
+
+
+def test_collector_keeps_the_most_recent_traces():
+    collector = InMemorySpanExporter(max_traces=2)
+    for trace_id in ("a", "b", "c"):
+        collector.export(Span(trace_id, trace_id, None, "calculate", 0.0, 1.0))
+
+    assert collector.trace_ids() == ["c", "b"]
+    assert collector.spans("a") == []
@@ -0,0 +1,37 @@
+import itertools
+
+from app.services.traffic_capture import (
+    CapturedRequest,
+    TrafficCapture,
+    capture_files,
+    read_capture,
+)
+
+
+def test_capture_rotates_and_reads_back_in_arrival_order(tmp_path):
+    path = str(tmp_path / "capture.jsonl")
+    capture = TrafficCapture(path, max_bytes=200, backup_count=10)
+    recorded = [
+        CapturedRequest(1700000000.0 + i, f"{i} + 1", 1.5, 200) for i in range(20)
+    ]
+    for request in recorded:
+        capture.record(request)
+    capture.close()
+
+    assert len(capture_files(path)) > 2
+    assert list(read_capture(path)) == recorded
+
+
+def test_capture_keeps_a_sample_of_requests(tmp_path):
+    draws = itertools.cycle([0.05, 0.5, 0.95, 0.2])
+    capture = TrafficCapture(
+        str(tmp_path / "capture.jsonl"), sample_rate=0.25, rand=lambda: next(draws)
+    )
+
+    assert [capture.sampled() for _ in range(4)] == [True, False, False, True]
+
+
+def test_captured_lines_are_compact():
+    line = CapturedRequest(1700000000.1234567, "1 + 2", 12.34567, 400).to_line()
+
+    assert line == b'{"t":1700000000.123457,"e":"1 + 2","l":12.346,"s":400}'
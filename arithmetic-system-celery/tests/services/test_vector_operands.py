@@ -0,0 +1,68 @@
+import pytest
+
+from app.config import Settings
+from app.services.array_store import ArrayStore
+from app.services.expression_parser import ExpressionParser
+from app.services.orchestrator import WorkflowOrchestrator
+from app.types.errors import (
+    ArrayNotFoundError,
+    ArrayShapeError,
+    ExpressionSyntaxError,
+)
+
+EXPRESSION = "([1, 2, 3, 4, 5] - 1) * [2, 2, 2, 2, 2] + 10 / [1, 2, 4, 5, 10]"
+EXPECTED = [10.0, 7.0, 6.5, 8.0, 9.0]
+
+
+def test_parser_reads_array_literals_and_references():
+    store = ArrayStore(capacity=8)
+    array_id = store.put([1.5, -2.0])
+    parser = ExpressionParser(allow_arrays=True, array_lookup=store.get)
+
+    node = parser.parse(f"-[1, -2] + {array_id}")
+
+    assert node.left == [-1, 2]
+    assert node.right == [1.5, -2.0]
+    assert node.has_arrays
+
+
+@pytest.mark.parametrize(
+    "expression, error",
+    [
+        ("[] + 1", ExpressionSyntaxError),
+        ("[1, [2]] + 1", ExpressionSyntaxError),
+        ("[1 + 2] * 3", ExpressionSyntaxError),
+        ("arr_0123456789abcdef + 1", ArrayNotFoundError),
+    ],
+)
+def test_parser_rejects_invalid_arrays(expression, error):
+    parser = ExpressionParser(allow_arrays=True, array_lookup=lambda _: None)
+    with pytest.raises(error):
+        parser.parse(expression)
+
+
+@pytest.mark.parametrize("execution_mode", ["distributed", "embedded"])
+def test_array_expressions_evaluate_element_wise(execution_mode):
+    orchestrator = WorkflowOrchestrator(Settings(execution_mode=execution_mode))
+
+    response = orchestrator.calculate(EXPRESSION)
+
+    assert response.result == pytest.approx(EXPECTED)
+
+
+def test_long_arrays_are_split_across_tasks():
+    whole = WorkflowOrchestrator(Settings())
+    chunked = WorkflowOrchestrator(Settings(array_chunk_size=2))
+
+    expected = whole.calculate(EXPRESSION)
+    response = chunked.calculate(EXPRESSION)
+
+    assert response.result == pytest.approx(expected.result)
+    assert response.summary.chords == expected.summary.chords * 3 + 1
+    assert "concat_task" in chunked.calculate(EXPRESSION, describe=True).workflow
+
+
+def test_arrays_of_different_lengths_are_rejected():
+    orchestrator = WorkflowOrchestrator(Settings())
+    with pytest.raises(ArrayShapeError):
+        orchestrator.calculate("[1, 2] + [1, 2, 3]")
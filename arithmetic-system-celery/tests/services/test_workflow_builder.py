@@ -58,7 +58,14 @@ def mock_tasks():
         side_effect=create_signature_mock("app.workers.divide_list_task")
     )
 
+    multiply_batch_task = Mock()
+    multiply_batch_task.name = "multiply_batch_task"
+    multiply_batch_task.s = Mock(
+        side_effect=create_signature_mock("app.workers.multiply_batch_task")
+    )
+
     return {
+        "multiply_batch": multiply_batch_task,
         "add": add_task,
         "subtract": subtract_task,
         "multiply": multiply_task,
@@ -265,3 +272,120 @@ class TestWorkflowBuilderIntegration:
         # Invalid node type in recursive method
         with pytest.raises(TypeError, match="Invalid node type"):
             workflow_builder._build_recursive("not a node")
+
+
+class TestHierarchicalReduction:
+    """Tests for multi-level reduction of wide commutative chords"""
+
+    @staticmethod
+    def _sum_of_products(count):
+        node = ExpressionNode(operation=OperationEnum.MUL, left=1, right=1)
+        for i in range(2, count + 1):
+            node = ExpressionNode(
+                operation=OperationEnum.ADD,
+                left=node,
+                right=ExpressionNode(operation=OperationEnum.MUL, left=i, right=i),
+            )
+        return node
+
+    def test_wide_chord_is_split_by_fan_in(self, task_map, task_chord_map):
+        builder = WorkflowBuilder(task_map, task_chord_map, reduction_fan_in=2)
+        workflow_str = builder.describe(builder.plan(self._sum_of_products(5)))
+
+        assert workflow_str == (
+            "chord([chord([chord([multiply_task(1, 1), multiply_task(2, 2)], xsum_task), "
+            "chord([multiply_task(3, 3), multiply_task(4, 4)], xsum_task)], xsum_task), "
+            "multiply_task(5, 5)], xsum_task)"
+        )
+
+    def test_narrow_chord_stays_flat(self, task_map, task_chord_map):
+        builder = WorkflowBuilder(task_map, task_chord_map, reduction_fan_in=8)
+        workflow_str = builder.describe(builder.plan(self._sum_of_products(3)))
+
+        assert workflow_str == (
+            "chord([multiply_task(1, 1), multiply_task(2, 2), multiply_task(3, 3)], "
+            "xsum_task)"
+        )
+
+    def test_invalid_fan_in(self, task_map, task_chord_map):
+        with pytest.raises(ValueError, match="reduction_fan_in"):
+            WorkflowBuilder(task_map, task_chord_map, reduction_fan_in=1)
+
+
+class TestLeafBatching:
+    """Tests for packing leaf operations into batch tasks"""
+
+    def _builder(self, task_map, task_chord_map, mock_tasks, **kwargs):
+        return WorkflowBuilder(
+            task_map,
+            task_chord_map,
+            task_batch_map={OperationEnum.MUL: mock_tasks["multiply_batch"]},
+            **kwargs,
+        )
+
+    def test_leaf_operations_are_batched(self, task_map, task_chord_map, mock_tasks):
+        builder = self._builder(task_map, task_chord_map, mock_tasks, leaf_batch_size=2)
+        node = TestHierarchicalReduction._sum_of_products(3)
+        node = ExpressionNode(operation=OperationEnum.ADD, left=node, right=7)
+
+        workflow_str = builder.describe(builder.plan(node))
+        assert workflow_str == (
+            "chord([multiply_batch_task([[1, 1], [2, 2]]), "
+            "multiply_batch_task([[3, 3]]), xsum_task([7])], xsum_task(batches=2))"
+        )
+
+    def test_batch_size_is_auto_tuned(self, task_map, task_chord_map, mock_tasks):
+        builder = self._builder(task_map, task_chord_map, mock_tasks)
+        node = TestHierarchicalReduction._sum_of_products(9)
+
+        workflow_str = builder.describe(builder.plan(node))
+        assert workflow_str.count("multiply_batch_task") == 3
+        assert workflow_str.endswith("xsum_task(batches=3))")
+
+    def test_batches_are_split_across_reduction_levels(
+        self, task_map, task_chord_map, mock_tasks
+    ):
+        builder = self._builder(
+            task_map,
+            task_chord_map,
+            mock_tasks,
+            leaf_batch_size=2,
+            reduction_fan_in=2,
+        )
+        node = TestHierarchicalReduction._sum_of_products(6)
+
+        workflow_str = builder.describe(builder.plan(node))
+        assert workflow_str == (
+            "chord([chord([multiply_batch_task([[1, 1], [2, 2]]), "
+            "multiply_batch_task([[3, 3], [4, 4]])], xsum_task(batches=2)), "
+            "chord([multiply_batch_task([[5, 5], [6, 6]])], xsum_task(batches=1))], "
+            "xsum_task)"
+        )
+
+    def test_single_leaf_is_not_batched(self, task_map, task_chord_map, mock_tasks):
+        builder = self._builder(task_map, task_chord_map, mock_tasks)
+        node = ExpressionNode(
+            operation=OperationEnum.ADD,
+            left=ExpressionNode(operation=OperationEnum.MUL, left=2, right=3),
+            right=4,
+        )
+
+        builder.plan(node)
+        mock_tasks["multiply"].s.assert_called_with(2, 3)
+        mock_tasks["multiply_batch"].s.assert_not_called()
+
+
+def test_summarize_hashes_structure_not_operands():
+    from app.services.orchestrator import WorkflowOrchestrator
+
+    orchestrator = WorkflowOrchestrator()
+    builder, parser = orchestrator.builder, orchestrator.parser
+
+    first = builder.summarize(builder.plan(parser.parse("(1 - 2) - (3 - 4)")))
+    second = builder.summarize(builder.plan(parser.parse("(5 - 6) - (7 - 8)")))
+    other = builder.summarize(builder.plan(parser.parse("(5 - 6) - 7")))
+
+    assert first == second
+    assert (first.tasks, first.chords, first.depth) == (3, 1, 2)
+    assert other.shape_hash != first.shape_hash
+    assert builder.summarize(42).tasks == 0